@@ -0,0 +1,120 @@
+"""
+Mesure du coût CPU de l'envoi d'un fichier sur une connexion TCP locale.
+
+Compare trois façons d'alimenter le canal de données :
+
+- la boucle de `storbinary` (lecture de blocs de 8 Kio puis `sendall`) ;
+- `send_file` avec un tampon réutilisé (`--block-size`) ;
+- `send_file` avec `socket.sendfile`.
+
+Le récepteur tourne dans un processus séparé, pour que seul le temps CPU de
+l'émetteur soit compté. Exemple :
+
+    python -m benchmarks.data_channel --size 1024 --block-size 262144
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import socket
+import tempfile
+import time
+
+from src.core.data_channel import send_file
+
+
+def _sink(listener):
+    """
+    Reçoit et jette les données de chaque connexion acceptée.
+    """
+    buffer = bytearray(1024 * 1024)
+    while True:
+        conn, _ = listener.accept()
+        with conn:
+            while conn.recv_into(buffer):
+                pass
+            conn.sendall(b'x')
+
+
+def _storbinary_loop(conn, file, _block_size):
+    """
+    Reproduit la boucle d'envoi de `ftplib.FTP.storbinary`.
+    """
+    while True:
+        block = file.read(8192)
+        if not block:
+            break
+        conn.sendall(block)
+
+
+def _buffer(conn, file, block_size):
+    send_file(conn, file, 0, block_size, use_sendfile=False)
+
+
+def _sendfile(conn, file, block_size):
+    send_file(conn, file, 0, block_size, use_sendfile=True)
+
+
+MODES = [
+    ("storbinary (8 Kio)", _storbinary_loop),
+    ("tampon memoryview", _buffer),
+    ("sendfile", _sendfile),
+]
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run(path, address, send, block_size):
+    """
+    Envoie le fichier une fois et retourne `(durée, temps CPU)`.
+    """
+    with open(path, 'rb') as file, \
+            socket.create_connection(address) as conn:
+        started, cpu = time.perf_counter(), _cpu_seconds()
+        send(conn, file, block_size)
+        conn.shutdown(socket.SHUT_WR)
+        conn.recv(1)
+        return time.perf_counter() - started, _cpu_seconds() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=512,
+                        help="taille du fichier envoyé, en Mio")
+    parser.add_argument('--block-size', type=int, default=256 * 1024,
+                        help="taille des blocs du tampon, en octets")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="nombre d'envois par mode (le meilleur compte)")
+    args = parser.parse_args()
+
+    listener = socket.create_server(('127.0.0.1', 0))
+    sink = multiprocessing.Process(target=_sink, args=(listener,),
+                                   daemon=True)
+    sink.start()
+    address = listener.getsockname()
+
+    with tempfile.NamedTemporaryFile(delete=False) as file:
+        chunk = os.urandom(1024 * 1024)
+        for _ in range(args.size):
+            file.write(chunk)
+        path = file.name
+    try:
+        gib = args.size / 1024
+        print(f"{'mode':<20} {'Mio/s':>10} {'CPU s/Gio':>10}")
+        for name, send in MODES:
+            runs = [run(path, address, send, args.block_size)
+                    for _ in range(args.repeat)]
+            elapsed, cpu = min(runs, key=lambda item: item[1])
+            print(f"{name:<20} {args.size / elapsed:>10.0f} "
+                  f"{cpu / gib:>10.3f}")
+    finally:
+        os.unlink(path)
+        sink.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,405 @@
+"""
+Banc d'essai de bout en bout contre un serveur FTP local.
+
+Un serveur pyftpdlib est lancé dans un processus séparé, puis chaque charge
+de travail est écrite dans un répertoire surveillé par la chaîne réelle de
+l'application : MyHandler et le stabilisateur d'écriture, la file de
+transfert, le FTPManager (ou le moteur asynchrone) et l'écriture par lots
+de l'historique. Avec `--gui`, la chaîne est construite par la fenêtre
+FileWatcher (plateforme Qt "offscreen") ; sinon par le WatchService seul,
+comme le démon.
+
+Charges de travail (`--scale` multiplie le nombre de fichiers) :
+
+- tiny : 2000 fichiers de 1 Kio ;
+- mixed : 400 fichiers de 1 Kio à 4 Mio (tailles log-uniformes) ;
+- huge : 3 fichiers de 64 Mio ;
+- deep : 1000 fichiers de 4 Kio dans une arborescence de profondeur 5.
+
+Pour chaque charge sont mesurés le débit (fichiers/s et Mo/s, de la
+première écriture au dernier enregistrement validé) et les percentiles
+p50/p95/p99 de la latence entre la détection d'un fichier et la validation
+de son enregistrement dans l'historique. Les résultats sont écrits en JSON
+pour comparer des commits :
+
+    python -m benchmarks.end_to_end --output avant.json
+    python -m benchmarks.end_to_end --engine async --compare avant.json
+
+La configuration de départ est le config.yaml du dépôt ; `--set
+section.cle=valeur` en modifie un réglage (valeur lue en YAML).
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+KiB = 1024
+MiB = 1024 * KiB
+
+WORKLOADS = ('tiny', 'mixed', 'huge', 'deep')
+
+
+def _serve(root, connection):
+    """
+    Sert `root` en FTP (utilisateur "bench", mot de passe "bench") et
+    transmet le port d'écoute. Exécuté dans un processus séparé.
+    """
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.servers import ThreadedFTPServer
+
+    # Sans gestionnaire, pyftpdlib journalise chaque commande.
+    server_logger = logging.getLogger('pyftpdlib')
+    server_logger.addHandler(logging.StreamHandler())
+    server_logger.setLevel(logging.WARNING)
+    authorizer = DummyAuthorizer()
+    authorizer.add_user('bench', 'bench', root, perm='elradfmwMT')
+    handler = type('BenchHandler', (FTPHandler,), {'authorizer': authorizer})
+    server = ThreadedFTPServer(('127.0.0.1', 0), handler)
+    server.max_cons = 512
+    connection.send(server.socket.getsockname()[1])
+    connection.close()
+    # terminate() interrompt serve_forever, qui ferme alors le serveur.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    server.serve_forever()
+
+
+def plan(workload, scale, seed=0):
+    """
+    Retourne la liste `(chemin relatif, taille)` des fichiers d'une charge.
+    """
+    rng = random.Random(seed)
+    count = {'tiny': 2000, 'mixed': 400, 'huge': 3, 'deep': 1000}[workload]
+    count = max(1, round(count * scale))
+    if workload == 'tiny':
+        return [(f'tiny_{i:06d}.bin', KiB) for i in range(count)]
+    if workload == 'mixed':
+        low, high = math.log(KiB), math.log(4 * MiB)
+        return [(f'mixed_{i:06d}.bin', int(math.exp(rng.uniform(low, high))))
+                for i in range(count)]
+    if workload == 'huge':
+        return [(f'huge_{i:03d}.bin', 64 * MiB) for i in range(count)]
+    files = []
+    for i in range(count):
+        # Noms uniques : le fichier distant ne garde que le nom de base.
+        parts = [f'd{rng.randrange(3)}' for _ in range(5)]
+        files.append((os.path.join(*parts, f'deep_{i:06d}.bin'), 4 * KiB))
+    return files
+
+
+def percentile(values, fraction):
+    """
+    Retourne le percentile `fraction` (entre 0 et 1) par rang le plus
+    proche, ou None si `values` est vide.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Probe:
+    """
+    Horodate la détection des fichiers par MyHandler et la validation de
+    leur enregistrement par l'écrivain de l'historique.
+    """
+
+    def __init__(self, service, recorder):
+        self.detected = {}
+        self.durable = {}
+        touch = service.write_stabilizer.touch
+        write = recorder._write
+
+        def timed_touch(path):
+            self.detected.setdefault(os.path.basename(path),
+                                     time.monotonic())
+            touch(path)
+
+        def timed_write(connection, rows):
+            write(connection, rows)
+            now = time.monotonic()
+            for row in rows:
+                self.durable[row[0]] = (now, row[2])
+
+        service.write_stabilizer.touch = timed_touch
+        recorder._write = timed_write
+
+
+def run_workload(workload, files, service, probe, watched, remote,
+                 timeout, pump):
+    """
+    Écrit les fichiers d'une charge dans le répertoire surveillé et attend
+    leur enregistrement. Retourne le dictionnaire des mesures.
+    """
+    block = os.urandom(MiB)
+    written = {}
+    started = time.monotonic()
+    for relative, size in files:
+        path = os.path.join(watched, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            remaining = size
+            while remaining:
+                chunk = min(remaining, len(block))
+                file.write(block[:chunk])
+                remaining -= chunk
+        written[os.path.basename(relative)] = time.monotonic()
+        pump()
+    write_seconds = time.monotonic() - started
+
+    names = set(written)
+    deadline = time.monotonic() + timeout
+    while not names <= probe.durable.keys():
+        if time.monotonic() > deadline:
+            break
+        pump()
+        time.sleep(0.01)
+    done = [name for name in names if name in probe.durable]
+    finished = max((probe.durable[name][0] for name in done),
+                   default=time.monotonic())
+    elapsed = finished - started
+    latencies = [
+        (probe.durable[name][0]
+         - probe.detected.get(name, written[name])) * 1000
+        for name in done
+    ]
+    total_bytes = sum(size for _, size in files)
+    failures = sum(1 for name in done if probe.durable[name][1] != 'Success')
+    result = {
+        'files': len(files),
+        'bytes': total_bytes,
+        'recorded': len(done),
+        'failures': failures,
+        'timed_out': len(done) < len(names),
+        'write_seconds': round(write_seconds, 3),
+        'elapsed_seconds': round(elapsed, 3),
+        'files_per_second': round(len(done) / elapsed, 1)
+        if elapsed else None,
+        'mb_per_second': round(total_bytes / elapsed / 1e6, 2)
+        if elapsed else None,
+        'latency_ms': {
+            name: round(percentile(latencies, fraction), 1)
+            if latencies else None
+            for name, fraction in (('p50', 0.50), ('p95', 0.95),
+                                   ('p99', 0.99))
+        },
+    }
+    for directory in (watched, remote):
+        for entry in os.listdir(directory):
+            path = os.path.join(directory, entry)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+    return result
+
+
+def write_config(path, database, port, engine, overrides):
+    """
+    Écrit la configuration du banc : celle du dépôt, pointée sur le
+    serveur local et une base temporaire, puis modifiée par `overrides`.
+    """
+    import yaml
+
+    with open(os.path.join(ROOT, 'config.yaml'), encoding='utf-8') as file:
+        config = yaml.safe_load(file) or {}
+    settings = {
+        'paths.database': database,
+        'ftp.server': '127.0.0.1',
+        'ftp.port': port,
+        'ftp.user': 'bench',
+        'ftp.password': 'bench',
+        'logging.file': '',
+    }
+    if engine is not None:
+        settings['ftp.engine'] = engine
+    settings.update(overrides)
+    for key, value in settings.items():
+        section, _, name = key.partition('.')
+        config.setdefault(section, {})[name] = value
+    with open(path, 'w', encoding='utf-8') as file:
+        yaml.safe_dump(config, file)
+    return config
+
+
+def parse_overrides(items):
+    """
+    Convertit les options `--set section.cle=valeur` en dictionnaire.
+    """
+    import yaml
+
+    overrides = {}
+    for item in items:
+        key, sep, value = item.partition('=')
+        if not sep or '.' not in key:
+            raise SystemExit(f"invalid --set {item!r}, expected "
+                             "section.key=value")
+        overrides[key] = yaml.safe_load(value)
+    return overrides
+
+
+def git_commit():
+    """
+    Retourne le commit courant du dépôt, ou None.
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+            capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """
+    Affiche le rapport entre les résultats et ceux d'un fichier JSON.
+    """
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = json.load(file)
+    print(f"\nComparaison avec {baseline_path} "
+          f"(commit {baseline.get('commit')}) :")
+    print(f"{'charge':<8} {'fichiers/s':>12} {'Mo/s':>12} {'p95 ms':>12}")
+    for name, current in results['workloads'].items():
+        before = baseline.get('workloads', {}).get(name)
+        if before is None:
+            continue
+
+        def ratio(get):
+            old, new = get(before), get(current)
+            return f"{new / old:>11.2f}x" if old and new else f"{'-':>12}"
+
+        print(f"{name:<8} {ratio(lambda r: r['files_per_second'])} "
+              f"{ratio(lambda r: r['mb_per_second'])} "
+              f"{ratio(lambda r: r['latency_ms']['p95'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workloads', default=','.join(WORKLOADS),
+                        help="charges à exécuter, séparées par des "
+                             "virgules")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="facteur appliqué au nombre de fichiers")
+    parser.add_argument('--engine', choices=('threaded', 'async'),
+                        help="moteur FTP (par défaut, celui du config.yaml)")
+    parser.add_argument('--set', dest='overrides', action='append',
+                        default=[], metavar='SECTION.CLE=VALEUR',
+                        help="modifie un réglage de la configuration")
+    parser.add_argument('--gui', action='store_true',
+                        help="construit la chaîne par la fenêtre "
+                             "FileWatcher")
+    parser.add_argument('--timeout', type=float, default=600,
+                        help="attente maximale par charge, en secondes")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    parser.add_argument('--compare', metavar='JSON',
+                        help="résultats précédents à comparer")
+    args = parser.parse_args()
+    workloads = [name.strip() for name in args.workloads.split(',')]
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+    overrides = parse_overrides(args.overrides)
+
+    workdir = tempfile.mkdtemp(prefix='ftp-bench-')
+    remote = os.path.join(workdir, 'remote')
+    watched = os.path.join(workdir, 'watched')
+    os.makedirs(remote)
+    os.makedirs(watched)
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    server = context.Process(target=_serve, args=(remote, sender),
+                             daemon=True)
+    server.start()
+    try:
+        if not receiver.poll(30):
+            raise SystemExit("the local FTP server did not start")
+        port = receiver.recv()
+        config_path = os.path.join(workdir, 'config.yaml')
+        config = write_config(config_path,
+                              os.path.join(workdir, 'history.db'),
+                              port, args.engine, overrides)
+        # Lu par src.utils.config au premier accès à un réglage.
+        os.environ['FILE_WATCHER_CONFIG'] = config_path
+        logging.basicConfig(level=logging.WARNING)
+        sys.path.insert(0, ROOT)
+
+        from src.database.db_manager import db_manager
+
+        if args.gui:
+            os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+            from PyQt5.QtWidgets import QApplication
+
+            from src.core.file_watcher import FileWatcher
+
+            app = QApplication(sys.argv)
+            window = FileWatcher()
+            service = window.service
+            pump = app.processEvents
+        else:
+            from src.core.watch_service import WatchService
+
+            service = WatchService()
+            service.start()
+            pump = lambda: None  # noqa: E731
+
+        probe = Probe(service, db_manager.recorder)
+        if not service.connect('127.0.0.1', 'bench', 'bench'):
+            raise SystemExit("cannot connect to the local FTP server")
+        service.start_watching(watched)
+
+        results = {
+            'commit': git_commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'engine': config['ftp'].get('engine', 'threaded'),
+            'gui': args.gui,
+            'scale': args.scale,
+            'overrides': overrides,
+            'workloads': {},
+        }
+        print(f"{'charge':<8} {'fichiers':>8} {'fichiers/s':>11} "
+              f"{'Mo/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name in workloads:
+            result = run_workload(name, plan(name, args.scale), service,
+                                  probe, watched, remote, args.timeout,
+                                  pump)
+            results['workloads'][name] = result
+            latency = result['latency_ms']
+            print(f"{name:<8} {result['recorded']:>8} "
+                  f"{result['files_per_second'] or 0:>11.1f} "
+                  f"{result['mb_per_second'] or 0:>8.2f} "
+                  f"{latency['p50'] or 0:>8.1f} {latency['p95'] or 0:>8.1f} "
+                  f"{latency['p99'] or 0:>8.1f}"
+                  + ("  (délai dépassé)" if result['timed_out'] else ""))
+        service.stop()
+    finally:
+        server.terminate()
+        server.join()
+        receiver.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+            file.write('\n')
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
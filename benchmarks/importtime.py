@@ -0,0 +1,39 @@
+"""
+Rapport du temps d'importation des points d'entrée de l'application.
+
+Les budgets et les modules interdits sont ceux du test
+tests/test_import_budget.py, qui fait échouer la suite s'ils ne sont pas
+respectés. Ce script affiche les mesures de chaque module sous forme de
+tableau ; le code de sortie est 1 si un contrôle échoue. Sur une machine
+lente, `--scale` multiplie les budgets :
+
+    python -m benchmarks.importtime --repeat 5 --scale 2
+"""
+
+import argparse
+
+from tests.test_import_budget import BUDGETS, check
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="nombre de lancements par module (le meilleur "
+                             "compte)")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="facteur appliqué aux budgets")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<26} {'ms':>7} {'budget':>7}  résultat")
+    for module, (budget, forbidden) in BUDGETS.items():
+        budget *= args.scale
+        elapsed, problems = check(module, budget, forbidden, args.repeat)
+        failed = failed or bool(problems)
+        print(f"{module:<26} {elapsed:>7.1f} {budget:>7.0f}  "
+              f"{'; '.join(problems) or 'ok'}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
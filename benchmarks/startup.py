@@ -0,0 +1,95 @@
+"""
+Mesure du temps de démarrage et de la mémoire de l'interface et du démon.
+
+Chaque mode est lancé dans un nouveau processus Python, qui construit la
+chaîne de traitement puis l'arrête aussitôt :
+
+- gui : la fenêtre FileWatcher (plateforme Qt "offscreen", sans affichage) ;
+- headless : le WatchService utilisé par `python -m src.daemon`.
+
+Le temps mesuré va du lancement de l'interpréteur à la fin de la
+construction ; la mémoire est le maximum résident (RSS) du processus. À
+lancer depuis un répertoire contenant config.yaml, car la base de données
+configurée est ouverte :
+
+    python -m benchmarks.startup --repeat 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+_MEASURE = """
+import json, resource, sys
+{setup}
+usage = resource.getrusage(resource.RUSAGE_SELF)
+rss = usage.ru_maxrss / (1024 if sys.platform == 'darwin' else 1)
+print(json.dumps({{'rss_kb': rss,
+                   'qt': 'PyQt5.QtWidgets' in sys.modules,
+                   'tk': 'tkinter' in sys.modules}}))
+{teardown}
+"""
+
+MODES = {
+    'gui': (
+        "from PyQt5.QtWidgets import QApplication\n"
+        "from src.core.file_watcher import FileWatcher\n"
+        "app = QApplication(sys.argv)\n"
+        "window = FileWatcher()",
+        "window.stop_watching()",
+    ),
+    'headless': (
+        "from src.core.watch_service import WatchService\n"
+        "service = WatchService()\n"
+        "service.start()",
+        "service.stop()",
+    ),
+}
+
+
+def run(mode):
+    """
+    Lance un mode une fois et retourne `(durée, mesures)`.
+    """
+    setup, teardown = MODES[mode]
+    code = _MEASURE.format(setup=setup, teardown=teardown)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen',
+               PYTHONPATH=os.pathsep.join(
+                   filter(None, [root, os.environ.get('PYTHONPATH')])))
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', code], env=env,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True)
+    for line in process.stdout:
+        if line.startswith('{'):
+            break
+    elapsed = time.perf_counter() - started
+    process.communicate()
+    return elapsed, json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="nombre de lancements par mode (le meilleur "
+                             "compte)")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'démarrage ms':>13} {'RSS Mio':>8} "
+          f"{'PyQt5':>6} {'tkinter':>8}")
+    for mode in MODES:
+        runs = [run(mode) for _ in range(args.repeat)]
+        elapsed = min(elapsed for elapsed, _ in runs)
+        stats = min((stats for _, stats in runs),
+                    key=lambda item: item['rss_kb'])
+        print(f"{mode:<10} {elapsed * 1000:>13.0f} "
+              f"{stats['rss_kb'] / 1024:>8.1f} {str(stats['qt']):>6} "
+              f"{str(stats['tk']):>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Mesure du coût, pour l'interface, d'une rafale de résultats de transfert.
+
+Compare deux façons de refléter les résultats dans l'icône d'état :
+
+- direct : une icône dessinée avec PIL à chaque résultat, comme avant le
+  StatusBus ;
+- bus : les résultats sont postés depuis un thread de travail vers un
+  StatusBus, qui les regroupe ; l'icône vient du cache de `status_icon`.
+
+La plateforme Qt "offscreen" est utilisée, sans affichage. Exemple :
+
+    python -m benchmarks.ui_updates --files 10000 --rate 10
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication, QLabel  # noqa: E402
+
+from src.utils.notification_manager import (  # noqa: E402
+    create_icon_image, status_icon
+)
+from src.utils.status_bus import StatusBus  # noqa: E402
+
+
+def run_direct(files, label):
+    """
+    Dessine une icône par résultat. Retourne le nombre de rafraîchissements.
+    """
+    for index in range(files):
+        icon = create_icon_image('green' if index % 100 else 'red')
+        label.setPixmap(icon.pixmap(64, 64))
+    return files
+
+
+def run_bus(files, label, rate, app):
+    """
+    Poste les résultats depuis un thread de travail vers un StatusBus.
+    Retourne le nombre de rafraîchissements.
+    """
+    bus = StatusBus(max_rate=rate)
+    received = [0]
+    updates = [0]
+
+    def on_results(succeeded, failed, last_success):
+        received[0] += succeeded + failed
+        updates[0] += 1
+        icon = status_icon('green' if last_success else 'red')
+        label.setPixmap(icon.pixmap(64, 64))
+        if received[0] == files:
+            app.quit()
+
+    bus.results_ready.connect(on_results)
+
+    def worker():
+        for index in range(files):
+            bus.post_result(bool(index % 100))
+            if index % 500 == 0:
+                time.sleep(0.01)
+
+    threading.Thread(target=worker, daemon=True).start()
+    app.exec_()
+    return updates[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--files', type=int, default=10000,
+                        help="nombre de résultats de la rafale")
+    parser.add_argument('--rate', type=float, default=10,
+                        help="mises à jour par seconde du StatusBus")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    label = QLabel()
+    print(f"{'mode':<8} {'durée s':>8} {'rafraîchissements':>18} "
+          f"{'CPU s':>7}")
+    for mode in ('direct', 'bus'):
+        started = time.perf_counter()
+        cpu = time.process_time()
+        if mode == 'direct':
+            updates = run_direct(args.files, label)
+        else:
+            updates = run_bus(args.files, label, args.rate, app)
+        print(f"{mode:<8} {time.perf_counter() - started:>8.2f} "
+              f"{updates:>18} {time.process_time() - cpu:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,18 +8,23 @@ et affiche une icône de notification.
 import sys
 from PyQt5.QtWidgets import QApplication, QSystemTrayIcon
 from src.core.file_watcher import FileWatcher
-from src.utils.notification_manager import create_icon_image
+from src.utils.logging_setup import configure_logging
+from src.utils.notification_manager import status_icon
 
 if __name__ == '__main__':
+    configure_logging()
     app = QApplication(sys.argv)
 
     main_window = FileWatcher()
     main_window.show()
 
     # Initialize system tray icon
-    tray_icon = QSystemTrayIcon(create_icon_image('red'), app)
+    tray_icon = QSystemTrayIcon(status_icon('red'), app)
     tray_icon.show()
 
     main_window.tray_icon = tray_icon  # Link tray icon to main window
 
+    # Stop the workers and flush the transfer history before exiting
+    app.aboutToQuit.connect(main_window.stop_watching)
+
     sys.exit(app.exec_())
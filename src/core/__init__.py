@@ -1,9 +1,26 @@
 """
 Ce module initialise le package core et expose les classes principales
-de l'application File Watcher FTP : FileWatcher et FTPManager.
+de l'application File Watcher FTP : FileWatcher, WatchService et FTPManager.
+
+Les classes sont importées au premier accès : importer un module de
+src.core ne charge pas PyQt5, ce qui permet au démon sans interface (voir
+src.daemon) de fonctionner sans affichage.
 """
 
-from .file_watcher import FileWatcher
-from .ftp_manager import FTPManager
+import importlib
+
+_EXPORTS = {
+    'FileWatcher': '.file_watcher',
+    'WatchService': '.watch_service',
+    'FTPManager': '.ftp_manager',
+}
+
+__all__ = ['FileWatcher', 'WatchService', 'FTPManager']
+
 
-__all__ = ['FileWatcher', 'FTPManager']
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
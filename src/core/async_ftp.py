@@ -0,0 +1,653 @@
+"""
+Module du moteur de transfert FTP asynchrone.
+
+Ce module fournit la classe AsyncFTPManager, une variante de FTPManager
+pour les charges de nombreux petits fichiers. Les connexions de contrôle et
+les canaux de données passifs sont des sockets non bloquantes gérées par
+asyncio, et toutes les sessions sont multiplexées sur une seule boucle
+d'événements exécutée dans un thread dédié. Les threads de téléchargement
+ne tiennent aucune connexion : ils soumettent l'envoi à la boucle et
+attendent son résultat, ce qui permet des centaines de transferts
+simultanés.
+
+Les fichiers compressés, reprenables ou segmentés sont envoyés par le
+moteur à threads hérité de FTPManager, de même que les listes de
+répertoires distants. Le moteur est choisi par le réglage `ftp.engine`
+(voir create_ftp_manager).
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import re
+import threading
+import time
+from ftplib import all_errors, error_perm, error_proto, error_reply, error_temp
+
+from src.core.ftp_manager import FTPManager
+from src.utils.config import get_setting
+from src.utils.metrics import error_class, metrics, record_phase
+
+logger = logging.getLogger(__name__)
+
+# Réponse à EPSV (RFC 2428) : "229 ... (|||port|)".
+_EPSV_PORT = re.compile(r'\(([!-~])\1\1(\d+)\1\)')
+# Réponse à PASV : "227 ... (h1,h2,h3,h4,p1,p2)".
+_PASV_ADDRESS = re.compile(r'(\d+),(\d+),(\d+),(\d+),(\d+),(\d+)')
+
+
+class LocalReadError(Exception):
+    """
+    Erreur de lecture du fichier local pendant un envoi. Elle n'appartient
+    pas à `ftplib.all_errors`, pour ne pas être confondue avec une session
+    morte.
+
+    Attributs
+    ---------
+    error : OSError
+        L'erreur de lecture.
+    """
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+def _check_reply(code, text):
+    """
+    Lève l'exception de ftplib correspondant à une réponse d'erreur.
+
+    Paramètres
+    ----------
+    code : str
+        Le code à trois chiffres de la réponse.
+    text : str
+        Le texte complet de la réponse.
+
+    Lève
+    ----
+    ftplib.error_temp
+        Pour une réponse 4xx.
+    ftplib.error_perm
+        Pour une réponse 5xx.
+    ftplib.error_proto
+        Pour une réponse qui n'est pas un code FTP.
+    """
+    if code[:1] in ('1', '2', '3'):
+        return
+    if code[:1] == '4':
+        raise error_temp(text)
+    if code[:1] == '5':
+        raise error_perm(text)
+    raise error_proto(text)
+
+
+class AsyncFTPSession:
+    """
+    Session FTP authentifiée sur une connexion de contrôle asyncio.
+
+    Attributs
+    ---------
+    host : str
+        L'adresse du serveur, utilisée pour les canaux de données.
+    timeout : float
+        Délai d'attente réseau en secondes.
+    last_used : float
+        Instant (`time.monotonic`) de la dernière commande.
+    """
+
+    def __init__(self, reader, writer, timeout=30.0, encoding='utf-8'):
+        """
+        Initialise la session sur une connexion de contrôle ouverte.
+
+        Paramètres
+        ----------
+        reader : asyncio.StreamReader
+            Le flux de lecture de la connexion de contrôle.
+        writer : asyncio.StreamWriter
+            Le flux d'écriture de la connexion de contrôle.
+        timeout : float
+            Délai d'attente réseau en secondes.
+        encoding : str
+            L'encodage des commandes et des réponses.
+        """
+        self._reader = reader
+        self._writer = writer
+        self._encoding = encoding
+        self._epsv = True
+        self.host = writer.get_extra_info('peername')[0]
+        self.timeout = timeout
+        self.last_used = time.monotonic()
+
+    @classmethod
+    async def open(cls, host, port, user, password, timeout=30.0):
+        """
+        Ouvre et authentifie une session, en mode binaire.
+
+        Paramètres
+        ----------
+        host : str
+            L'adresse du serveur FTP.
+        port : int
+            Le port du serveur FTP.
+        user : str
+            Le nom d'utilisateur.
+        password : str
+            Le mot de passe.
+        timeout : float
+            Délai d'attente réseau en secondes.
+
+        Retourne
+        -------
+        AsyncFTPSession
+            La session authentifiée.
+
+        Lève
+        ----
+        ftplib.all_errors
+            Si la connexion ou l'authentification échoue.
+        """
+        reader, writer = await cls._wait(
+            asyncio.open_connection(host, port), timeout)
+        session = cls(reader, writer, timeout)
+        try:
+            await session.read_reply()
+            code, text = await session.command(f'USER {user}')
+            if code == '331':
+                code, text = await session.command(f'PASS {password}')
+            if code[:1] != '2':
+                raise error_reply(text)
+            await session.command('TYPE I')
+        except BaseException:
+            session.abort()
+            raise
+        return session
+
+    @staticmethod
+    async def _wait(awaitable, timeout):
+        """
+        Attend une opération réseau, en levant TimeoutError (une erreur de
+        `ftplib.all_errors`) si elle dépasse le délai.
+        """
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("FTP operation timed out") from None
+
+    async def read_reply(self):
+        """
+        Lit une réponse du serveur, éventuellement sur plusieurs lignes.
+
+        Retourne
+        -------
+        tuple
+            Le code à trois chiffres et le texte complet de la réponse.
+
+        Lève
+        ----
+        ftplib.all_errors
+            Si la réponse est une erreur ou si la connexion est perdue.
+        """
+        lines = []
+        while True:
+            raw = await self._wait(self._reader.readline(), self.timeout)
+            if not raw:
+                raise EOFError("FTP control connection closed")
+            line = raw.decode(self._encoding, 'replace').rstrip('\r\n')
+            lines.append(line)
+            code = lines[0][:3]
+            if len(lines) == 1 and line[3:4] != '-':
+                break
+            if len(lines) > 1 and line[:3] == code and line[3:4] == ' ':
+                break
+        text = '\n'.join(lines)
+        _check_reply(code, text)
+        self.last_used = time.monotonic()
+        return code, text
+
+    async def command(self, line):
+        """
+        Envoie une commande et lit sa réponse.
+
+        Paramètres
+        ----------
+        line : str
+            La commande, sans fin de ligne.
+
+        Retourne
+        -------
+        tuple
+            Le code et le texte de la réponse.
+        """
+        self._writer.write(f'{line}\r\n'.encode(self._encoding))
+        await self._wait(self._writer.drain(), self.timeout)
+        return await self.read_reply()
+
+    async def _passive_address(self):
+        """
+        Demande un canal de données passif, avec EPSV puis PASV si le
+        serveur ne connaît pas EPSV. Comme ftplib, l'adresse annoncée par
+        PASV est ignorée au profit de celle de la connexion de contrôle.
+
+        Retourne
+        -------
+        tuple
+            L'adresse et le port du canal de données.
+        """
+        if self._epsv:
+            try:
+                _, text = await self.command('EPSV')
+                match = _EPSV_PORT.search(text)
+                if match is not None:
+                    return self.host, int(match.group(2))
+            except error_perm:
+                pass
+            self._epsv = False
+        _, text = await self.command('PASV')
+        match = _PASV_ADDRESS.search(text)
+        if match is None:
+            raise error_proto(text)
+        return self.host, int(match.group(5)) * 256 + int(match.group(6))
+
+    async def store(self, remote_name, file, block_size, buckets=()):
+        """
+        Envoie un fichier avec STOR sur un canal de données passif.
+
+        Le fichier est lu dans le thread de la boucle : ce moteur est
+        destiné aux petits fichiers, dont la lecture ne bloque pas.
+
+        Paramètres
+        ----------
+        remote_name : str
+            Le nom du fichier sur le serveur.
+        file : file object
+            Le fichier ouvert en mode binaire.
+        block_size : int
+            La taille des blocs envoyés.
+        buckets : list of TokenBucket
+            Les seaux de débit à respecter.
+
+        Retourne
+        -------
+        int
+            Le nombre d'octets envoyés.
+
+        Lève
+        ----
+        LocalReadError
+            Si le fichier local ne peut pas être lu.
+        ftplib.all_errors
+            Si la session ou le canal de données échoue.
+        """
+        host, port = await self._passive_address()
+        _, data = await self._wait(asyncio.open_connection(host, port),
+                                   self.timeout)
+        sent = 0
+        try:
+            code, text = await self.command(f'STOR {remote_name}')
+            if code[:1] != '1':
+                raise error_reply(text)
+            while True:
+                try:
+                    block = file.read(block_size)
+                except OSError as e:
+                    raise LocalReadError(e) from e
+                if not block:
+                    break
+                data.write(block)
+                await self._wait(data.drain(), self.timeout)
+                sent += len(block)
+                delay = max((bucket.reserve(len(block))
+                             for bucket in buckets), default=0)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        finally:
+            data.close()
+            try:
+                await self._wait(data.wait_closed(), self.timeout)
+            except all_errors:
+                pass
+        await self.read_reply()
+        return sent
+
+    async def quit(self):
+        """
+        Termine la session avec QUIT et ferme la connexion.
+        """
+        try:
+            await self.command('QUIT')
+        except all_errors:
+            pass
+        self.abort()
+
+    def abort(self):
+        """
+        Ferme la connexion de contrôle sans attendre le serveur.
+        """
+        self._writer.close()
+
+
+class AsyncFTPManager(FTPManager):
+    """
+    Gestionnaire FTP dont les petits fichiers sont envoyés par des sessions
+    asyncio multiplexées sur une seule boucle d'événements.
+
+    Attributs
+    ---------
+    max_sessions : int
+        Nombre maximal de sessions asynchrones ouvertes simultanément.
+    """
+
+    def __init__(self, pool_size=1, offset_store=None, max_sessions=None):
+        """
+        Initialise le gestionnaire sans démarrer la boucle d'événements.
+
+        Paramètres
+        ----------
+        pool_size : int
+            Nombre maximal de connexions du moteur à threads, utilisé pour
+            les fichiers compressés, reprenables ou segmentés.
+        offset_store : DBManager, optional
+            Stockage des décalages de reprise.
+        max_sessions : int, optional
+            Nombre maximal de sessions asynchrones. Par défaut, le réglage
+            `ftp.async_sessions`.
+        """
+        super().__init__(pool_size, offset_store)
+        if max_sessions is None:
+            max_sessions = get_setting('ftp', 'async_sessions', 64)
+        self.max_sessions = max(1, int(max_sessions))
+        self.concurrency = max(self.pool_size, self.max_sessions)
+        self._timeout = float(get_setting('ftp', 'timeout', 30))
+        self._keepalive_interval = float(
+            get_setting('ftp', 'keepalive_interval', 30))
+        self._idle_timeout = float(get_setting('ftp', 'idle_timeout', 300))
+        self._loop = None
+        self._thread = None
+        self._slots = None
+        self._idle = []
+        self._futures = set()
+        self._futures_lock = threading.Lock()
+
+    def configure(self, ftp_server, ftp_user, ftp_password):
+        """
+        Enregistre les informations de connexion et démarre la boucle
+        d'événements, sans ouvrir de connexion.
+
+        Paramètres
+        ----------
+        ftp_server : str
+            L'adresse du serveur FTP.
+        ftp_user : str
+            Le nom d'utilisateur pour la connexion FTP.
+        ftp_password : str
+            Le mot de passe pour la connexion FTP.
+        """
+        super().configure(ftp_server, ftp_user, ftp_password)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="ftp-async-loop", daemon=True)
+        self._thread.start()
+
+    def connect(self):
+        """
+        Ouvre une session asynchrone avec les informations enregistrées et
+        la conserve pour les envois suivants.
+
+        Retourne
+        -------
+        bool
+            True si la connexion est établie avec succès, False sinon.
+        """
+        if self._loop is None:
+            logger.warning("FTP server is not configured.")
+            return False
+        try:
+            self._run(self._check_connection())
+            logger.info("Connection successful!")
+            return True
+        except all_errors as e:
+            logger.error("Connection error: %s", e)
+            return False
+
+    def close(self):
+        """
+        Annule les envois en cours, ferme les sessions asynchrones, arrête
+        la boucle d'événements et ferme les connexions du moteur à threads.
+        Les envois annulés échouent et seront réessayés.
+        """
+        super().close()
+        loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        self._thread = None
+        self._slots = None
+        with self._futures_lock:
+            loop.close()
+            # Soumis après l'annulation : la boucle ne les exécutera plus.
+            for future in self._futures:
+                future.cancel()
+
+    def upload_to_ftp(self, file_path, stats=None):
+        """
+        Télécharge un fichier local vers le serveur FTP.
+
+        Les petits fichiers envoyés tels quels passent par une session
+        asynchrone ; les autres sont confiés au moteur à threads.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin vers le fichier local à télécharger.
+        stats : dict, optional
+            Si fourni, reçoit `compressed_size` pour un fichier compressé
+            et, en cas d'échec, `error` et `error_class` (la cause et sa
+            classe).
+
+        Retourne
+        -------
+        bool
+            True si le fichier est téléchargé avec succès, False sinon.
+        """
+        if self._loop is None:
+            logger.warning("FTP server is not configured.")
+            return False
+        try:
+            size = os.stat(file_path).st_size
+        except FileNotFoundError as e:
+            logger.warning("File not found: %s", e)
+            return False
+        except OSError as e:
+            logger.error("Cannot read %s: %s", file_path, e)
+            return False
+        if (self.compression_for(file_path, size) is not None
+                or self._use_segments(size)
+                or (self.offset_store is not None
+                    and size >= self.resume_threshold)):
+            return super().upload_to_ftp(file_path, stats)
+        try:
+            sent = self._run(self.upload_async(file_path, stats))
+        except ConnectionAbortedError as e:
+            logger.error("Failed to upload %s: %s", file_path, e)
+            if stats is not None:
+                stats['error'] = str(e)
+                stats['error_class'] = error_class(e)
+            return False
+        except OSError as e:
+            if isinstance(e, FileNotFoundError):
+                logger.warning("File not found: %s", e)
+            else:
+                logger.error("Cannot read %s: %s", file_path, e)
+            if stats is not None:
+                stats['error'] = str(e)
+                stats['error_class'] = error_class(e)
+            return False
+        if sent is None:
+            return False
+        self.remote_cache.update_entry(self.remote_path(file_path, size),
+                                       sent)
+        return True
+
+    async def upload_async(self, file_path, stats=None):
+        """
+        Envoie un fichier sur une session asynchrone. Une session morte
+        est écartée et l'envoi est relancé une fois sur une nouvelle
+        session.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+        stats : dict, optional
+            Si fourni, reçoit `error` et `error_class` (la cause et sa
+            classe) en cas d'échec.
+
+        Retourne
+        -------
+        int or None
+            Le nombre d'octets envoyés, ou None en cas d'échec.
+
+        Lève
+        ----
+        OSError
+            Si le fichier local ne peut pas être lu.
+        """
+        remote_name = os.path.basename(file_path)
+        buckets = self.rate_limiter.buckets_for(file_path)
+        with open(file_path, 'rb') as file:
+            for attempt in range(2):
+                file.seek(0)
+                session = None
+                try:
+                    session = await self._acquire()
+                    sent = await session.store(remote_name, file,
+                                               self.block_size, buckets)
+                except LocalReadError as e:
+                    # L'envoi a été interrompu en cours de STOR.
+                    self._release(session, broken=True)
+                    raise e.error from None
+                except all_errors as e:
+                    if session is not None:
+                        self._release(session, broken=True)
+                    if attempt == 0:
+                        logger.warning("Upload of %s failed (%s), retrying on "
+                                       "a new connection.", file_path, e)
+                        continue
+                    logger.error("Failed to upload %s: %s", file_path, e)
+                    if stats is not None:
+                        stats['error'] = str(e)
+                        stats['error_class'] = error_class(e)
+                    return None
+                except asyncio.CancelledError:
+                    if session is not None:
+                        self._release(session, broken=True)
+                    raise
+                self._release(session)
+                logger.info("File %s uploaded successfully.", file_path)
+                return sent
+        return None
+
+    def _run(self, coroutine):
+        """
+        Exécute une coroutine sur la boucle d'événements et attend son
+        résultat depuis le thread appelant.
+
+        Lève
+        ----
+        ConnectionAbortedError
+            Si la boucle est arrêtée (voir `close`) avant la fin de la
+            coroutine.
+        """
+        with self._futures_lock:
+            loop = self._loop
+            if loop is None or loop.is_closed():
+                coroutine.close()
+                raise ConnectionAbortedError("FTP engine closed")
+            future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+            self._futures.add(future)
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            raise ConnectionAbortedError("FTP engine closed") from None
+        finally:
+            with self._futures_lock:
+                self._futures.discard(future)
+
+    async def _check_connection(self):
+        """
+        Emprunte puis rend une session, pour vérifier la connexion.
+        """
+        self._release(await self._acquire())
+
+    async def _acquire(self):
+        """
+        Emprunte une session, en l'ouvrant si nécessaire. Attend tant que
+        `max_sessions` sessions sont déjà empruntées.
+
+        Retourne
+        -------
+        AsyncFTPSession
+            Une session authentifiée.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_sessions)
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                session = self._idle.pop()
+                unused_for = time.monotonic() - session.last_used
+                if unused_for >= self._idle_timeout:
+                    await session.quit()
+                    continue
+                if unused_for < self._keepalive_interval:
+                    return session
+                # Une session inactive depuis longtemps est vérifiée avant
+                # d'être prêtée.
+                try:
+                    await session.command('NOOP')
+                    return session
+                except all_errors:
+                    session.abort()
+            started = time.monotonic()
+            session = await AsyncFTPSession.open(
+                self.ftp_server, int(get_setting('ftp', 'port', 21)),
+                self.ftp_user, self.ftp_password, self._timeout)
+            metrics.inc('file_watcher_ftp_connections_opened_total')
+            record_phase('connect', time.monotonic() - started)
+            return session
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, session, broken=False):
+        """
+        Rend une session empruntée.
+
+        Paramètres
+        ----------
+        session : AsyncFTPSession
+            La session empruntée.
+        broken : bool
+            Si True, la session est fermée au lieu d'être réutilisée.
+        """
+        if broken:
+            session.abort()
+        else:
+            self._idle.append(session)
+        self._slots.release()
+
+    async def _shutdown(self):
+        """
+        Annule les envois en cours, puis termine les sessions inactives.
+        """
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(session.quit() for session in idle))
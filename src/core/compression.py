@@ -0,0 +1,180 @@
+"""
+Module de compression des fichiers à la volée.
+
+Ce module fournit la classe CompressionPolicy qui décide, d'après
+l'extension et la taille d'un fichier, s'il doit être compressé avant
+l'envoi, et la fonction send_compressed qui compresse le fichier bloc par
+bloc directement dans la connexion de données. Aucun fichier temporaire
+n'est créé et la mémoire utilisée ne dépend pas de la taille du fichier.
+
+L'algorithme gzip utilise zlib ; zstd nécessite le paquet facultatif
+`zstandard`, sans lequel gzip est utilisé.
+"""
+
+import logging
+import zlib
+from collections import namedtuple
+
+from src.core.rate_limiter import throttle
+from src.utils.file_names import file_extension, normalize_extension
+
+logger = logging.getLogger(__name__)
+
+Codec = namedtuple('Codec', ['name', 'suffix', 'compressobj'])
+
+
+def gzip_codec(level=6):
+    """
+    Retourne le codec gzip.
+
+    Paramètres
+    ----------
+    level : int
+        Niveau de compression (1 à 9).
+
+    Retourne
+    -------
+    Codec
+        Le codec, dont `compressobj()` produit un flux au format gzip.
+    """
+    return Codec('gzip', '.gz',
+                 lambda: zlib.compressobj(level, zlib.DEFLATED, 31))
+
+
+def zstd_codec(level=3):
+    """
+    Retourne le codec zstd.
+
+    Paramètres
+    ----------
+    level : int
+        Niveau de compression (1 à 22).
+
+    Retourne
+    -------
+    Codec
+        Le codec.
+
+    Lève
+    ----
+    ImportError
+        Si le paquet `zstandard` n'est pas installé.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd compression requires the zstandard package") from None
+    compressor = zstandard.ZstdCompressor(level=level)
+    return Codec('zstd', '.zst', compressor.compressobj)
+
+
+class CompressionPolicy:
+    """
+    Règle de choix des fichiers compressés avant l'envoi.
+
+    Attributs
+    ---------
+    codec : Codec
+        Le codec utilisé, ou None si la compression est désactivée.
+    extensions : frozenset of str
+        Les extensions concernées ; vide pour toutes.
+    min_size : int
+        La taille minimale en octets d'un fichier compressé.
+    """
+
+    def __init__(self, algorithm=None, level=None, extensions=(),
+                 min_size=0):
+        """
+        Initialise la règle.
+
+        Paramètres
+        ----------
+        algorithm : str, optional
+            "gzip" ou "zstd". Si None, aucun fichier n'est compressé.
+        level : int, optional
+            Niveau de compression. Par défaut, celui de l'algorithme.
+        extensions : iterable of str
+            Les extensions concernées, avec ou sans point ; vide pour
+            toutes.
+        min_size : int
+            La taille minimale en octets d'un fichier compressé.
+        """
+        self.codec = None
+        if algorithm == 'zstd':
+            try:
+                self.codec = zstd_codec(*(() if level is None else (level,)))
+            except ImportError as e:
+                logger.warning("%s, falling back to gzip.", e)
+                algorithm = 'gzip'
+                level = None
+        if algorithm == 'gzip':
+            self.codec = gzip_codec(*(() if level is None else (level,)))
+        elif algorithm not in (None, 'zstd'):
+            logger.warning("Unknown compression algorithm %r, compression "
+                           "disabled.", algorithm)
+        self.extensions = frozenset(
+            normalize_extension(extension) for extension in extensions
+        )
+        self.min_size = int(min_size)
+
+    def codec_for(self, file_path, size):
+        """
+        Retourne le codec à utiliser pour un fichier.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier.
+        size : int
+            La taille du fichier en octets.
+
+        Retourne
+        -------
+        Codec or None
+            Le codec, ou None si le fichier est envoyé tel quel.
+        """
+        if self.codec is None or size < self.min_size:
+            return None
+        if self.extensions:
+            if file_extension(file_path) not in self.extensions:
+                return None
+        return self.codec
+
+
+def send_compressed(conn, file, codec, block_size, buckets=()):
+    """
+    Compresse un fichier bloc par bloc dans la connexion de données.
+
+    Paramètres
+    ----------
+    conn : socket.socket
+        La connexion de données ouverte par `transfercmd`.
+    file : file object
+        Le fichier ouvert en mode binaire.
+    codec : Codec
+        Le codec à utiliser.
+    block_size : int
+        La taille des blocs lus.
+    buckets : list of TokenBucket
+        Les seaux de débit à respecter, appliqués aux octets compressés.
+
+    Retourne
+    -------
+    int
+        Le nombre d'octets compressés envoyés.
+    """
+    compressor = codec.compressobj()
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    file.seek(0)
+    sent_total = 0
+    while True:
+        read = file.readinto(buffer)
+        data = compressor.compress(view[:read]) if read else compressor.flush()
+        if data:
+            conn.sendall(data)
+            sent_total += len(data)
+            throttle(buckets, len(data))
+        if not read:
+            return sent_total
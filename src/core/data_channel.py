@@ -0,0 +1,126 @@
+"""
+Module d'envoi des données sur le canal de données FTP.
+
+Ce module fournit la fonction send_file qui copie un fichier ouvert vers la
+connexion de données d'un transfert. Sur une connexion en clair, la copie
+est confiée au noyau avec `socket.sendfile` ; sur une connexion TLS, ou si
+le système ne fournit pas `os.sendfile`, le fichier est lu par grands blocs
+dans un tampon réutilisé et envoyé sans copie intermédiaire à travers un
+`memoryview`. Dans les deux cas, les plafonds de débit (voir RateLimiter)
+sont respectés.
+"""
+
+import os
+import ssl
+
+from src.core.rate_limiter import is_limited, throttle
+
+DEFAULT_BLOCK_SIZE = 256 * 1024
+
+# Taille des appels à sendfile lorsque le débit n'est pas plafonné.
+SENDFILE_CHUNK = 8 * 1024 * 1024
+
+
+def can_sendfile(conn, file):
+    """
+    Indique si `socket.sendfile` peut confier la copie au noyau.
+
+    Paramètres
+    ----------
+    conn : socket.socket
+        La connexion de données.
+    file : file object
+        Le fichier ouvert en mode binaire.
+
+    Retourne
+    -------
+    bool
+        True si le système fournit `os.sendfile`, que la connexion n'est
+        pas chiffrée et que le fichier a un descripteur.
+    """
+    if not hasattr(os, 'sendfile') or isinstance(conn, ssl.SSLSocket):
+        return False
+    try:
+        file.fileno()
+    except (AttributeError, OSError, ValueError):
+        return False
+    return True
+
+
+def send_file(conn, file, offset=0, block_size=DEFAULT_BLOCK_SIZE,
+              use_sendfile=True, buckets=(), count=None):
+    """
+    Envoie un fichier sur la connexion de données, à partir d'un décalage.
+
+    Paramètres
+    ----------
+    conn : socket.socket
+        La connexion de données ouverte par `transfercmd`.
+    file : file object
+        Le fichier ouvert en mode binaire.
+    offset : int
+        Le décalage à partir duquel envoyer le fichier.
+    block_size : int
+        La taille des blocs envoyés, et des appels à sendfile lorsque le
+        débit est plafonné.
+    use_sendfile : bool
+        Si False, le tampon est toujours utilisé.
+    buckets : list of TokenBucket
+        Les seaux de débit à respecter.
+    count : int, optional
+        Le nombre maximal d'octets à envoyer. Si None, le fichier est
+        envoyé jusqu'à la fin.
+
+    Retourne
+    -------
+    int
+        Le nombre d'octets envoyés.
+    """
+    remaining = float('inf') if count is None else count
+    if use_sendfile and can_sendfile(conn, file):
+        return _send_with_sendfile(conn, file, offset, block_size, buckets,
+                                   remaining)
+    return _send_with_buffer(conn, file, offset, block_size, buckets,
+                             remaining)
+
+
+def _send_with_sendfile(conn, file, offset, block_size, buckets, remaining):
+    """
+    Envoie le fichier par appels successifs à `socket.sendfile`. Les
+    appels sont limités à `block_size` octets tant qu'un plafond de débit
+    s'applique, pour répartir l'envoi régulièrement.
+    """
+    sent_total = 0
+    position = offset
+    while remaining > 0:
+        limited = is_limited(buckets)
+        chunk = int(min(block_size if limited else SENDFILE_CHUNK,
+                        remaining))
+        sent = conn.sendfile(file, position, chunk)
+        if not sent:
+            break
+        position += sent
+        sent_total += sent
+        remaining -= sent
+        if limited:
+            throttle(buckets, sent)
+    return sent_total
+
+
+def _send_with_buffer(conn, file, offset, block_size, buckets, remaining):
+    """
+    Envoie le fichier bloc par bloc à travers un tampon réutilisé.
+    """
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    file.seek(offset)
+    sent_total = 0
+    while remaining > 0:
+        read = file.readinto(view[:int(min(block_size, remaining))])
+        if not read:
+            break
+        conn.sendall(view[:read])
+        sent_total += read
+        remaining -= read
+        throttle(buckets, read)
+    return sent_total
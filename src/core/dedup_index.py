@@ -0,0 +1,144 @@
+"""
+Module de déduplication des téléchargements.
+
+Ce module fournit la classe DedupIndex qui évite de renvoyer un fichier
+inchangé. Chaque téléchargement réussi est enregistré avec la taille, la
+date de modification et l'empreinte du contenu du fichier. Un fichier est
+ignoré si le dernier téléchargement réussi vers son chemin distant est
+celui de ce fichier avec la même taille et la même date de modification,
+ou à défaut celui d'un contenu de même empreinte. Plusieurs fichiers locaux
+pouvant viser le même chemin distant, seul le dernier envoi compte : c'est
+lui qui est présent sur le serveur.
+"""
+
+import hashlib
+import os
+from collections import namedtuple
+
+Fingerprint = namedtuple('Fingerprint', ['size', 'mtime_ns', 'digest'])
+
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """
+    Calcule l'empreinte BLAKE2b du contenu d'un fichier, lu par blocs.
+
+    Paramètres
+    ----------
+    file_path : str
+        Le chemin du fichier.
+    chunk_size : int
+        La taille des blocs lus en octets.
+
+    Retourne
+    -------
+    str
+        L'empreinte hexadécimale du contenu.
+    """
+    digest = hashlib.blake2b()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(file_path, 'rb') as file:
+        while True:
+            read = file.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+class DedupIndex:
+    """
+    Index des fichiers déjà téléchargés, consulté avant chaque transfert.
+
+    Attributs
+    ---------
+    store : DBManager
+        Stockage de l'index.
+    chunk_size : int
+        La taille des blocs lus pour calculer les empreintes.
+    """
+
+    def __init__(self, store, chunk_size=1024 * 1024):
+        """
+        Initialise l'index.
+
+        Paramètres
+        ----------
+        store : DBManager
+            Stockage de l'index.
+        chunk_size : int
+            La taille des blocs lus pour calculer les empreintes.
+        """
+        self.store = store
+        self.chunk_size = chunk_size
+
+    def check(self, file_path, remote_path):
+        """
+        Indique si le fichier est identique au dernier téléchargement réussi
+        vers le même chemin distant.
+
+        L'empreinte du contenu n'est calculée que si la taille et la date de
+        modification ne suffisent pas à conclure.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+        remote_path : str
+            Le chemin du fichier sur le serveur.
+
+        Retourne
+        -------
+        tuple
+            `(unchanged, fingerprint)` où `unchanged` vaut True si le
+            téléchargement peut être ignoré, et `fingerprint` est
+            l'empreinte à enregistrer après le transfert (None si le fichier
+            ne peut pas être lu).
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False, None
+        latest = self.store.get_latest_upload(remote_path)
+        if latest is not None:
+            local_path, size, mtime_ns, digest = latest
+            if ((local_path, size, mtime_ns)
+                    == (file_path, stat.st_size, stat.st_mtime_ns)):
+                return True, Fingerprint(size, mtime_ns, digest)
+        try:
+            digest = file_digest(file_path, self.chunk_size)
+        except OSError:
+            return False, None
+        fingerprint = Fingerprint(stat.st_size, stat.st_mtime_ns, digest)
+        unchanged = latest is not None and latest[3] == digest
+        if unchanged:
+            # Mémorise la nouvelle date pour éviter un nouveau calcul.
+            self.record(file_path, remote_path, fingerprint)
+        return unchanged, fingerprint
+
+    def record(self, file_path, remote_path, fingerprint):
+        """
+        Enregistre un téléchargement réussi dans l'index.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+        remote_path : str
+            Le chemin du fichier sur le serveur.
+        fingerprint : Fingerprint
+            L'empreinte du fichier téléchargé.
+        """
+        self.store.save_upload_index(file_path, remote_path, *fingerprint)
+
+    def forget(self, remote_path):
+        """
+        Oublie les téléchargements vers un chemin distant, pour que le
+        prochain transfert de ce fichier ne soit pas ignoré.
+
+        Paramètres
+        ----------
+        remote_path : str
+            Le chemin du fichier sur le serveur.
+        """
+        self.store.delete_upload_index(remote_path)
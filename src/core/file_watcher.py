@@ -1,25 +1,30 @@
 """
 Module principal pour la surveillance de fichiers et le transfert FTP.
 
-Ce module contient la classe FileWatcher qui permet de surveiller un
-répertoire local pour les nouveaux fichiers et de les télécharger
-automatiquement vers un serveur FTP. Il gère également l'interface utilisateur
-avec PyQt5.
+Ce module contient la classe FileWatcher, la fenêtre PyQt5 de
+l'application. La surveillance du répertoire local et le téléchargement
+des nouveaux fichiers vers le serveur FTP sont confiés à un WatchService,
+également utilisé sans interface par le démon (voir src.daemon). Les
+résultats des transferts parviennent à la fenêtre par un StatusBus, qui
+les regroupe et les transmet au thread de l'interface ; les échecs
+définitifs sont résumés par un FailureDigest dans une notification non
+bloquante.
 """
 
-import os
-import sqlite3
-import threading
-from datetime import datetime
+import logging
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import (
-    QFileDialog, QMessageBox, QMainWindow,
+    QFileDialog, QLabel, QMessageBox, QMainWindow,
     QPushButton, QVBoxLayout, QWidget, QDialog, QSystemTrayIcon
 )
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 from dialog import FTPCredentialsDialog
-from src.core.ftp_manager import FTPManager
-from src.utils.notification_manager import create_icon_image
+from src.core.watch_service import WatchService
+from src.utils.config import get_setting
+from src.utils.failure_digest import FailureDigest
+from src.utils.notification_manager import status_icon
+from src.utils.status_bus import StatusBus
+
+logger = logging.getLogger(__name__)
 
 
 class FileWatcher(QMainWindow):
@@ -29,18 +34,20 @@ class FileWatcher(QMainWindow):
 
     Attributs
     ---------
-    ftp_manager : FTPManager
-        Instance de la classe FTPManager pour gérer les opérations FTP.
-    connection_string : str
-        Chaîne de connexion pour la base de données SQLite.
+    service : WatchService
+        La chaîne de surveillance et de téléchargement.
+    status_bus : StatusBus
+        Transmet les résultats des transferts au thread de l'interface.
+    failure_digest : FailureDigest
+        Regroupe les échecs définitifs en une notification par fenêtre.
     directory : str
         Chemin du répertoire local surveillé.
-    observer : Observer
-        Observateur pour surveiller les changements de fichiers.
-    timer : threading.Timer
-        Timer pour exécuter des vérifications périodiques.
     tray_icon : QSystemTrayIcon
         Icône de la barre des tâches pour afficher l'état de l'application.
+    succeeded : int
+        Nombre de transferts réussis depuis le lancement.
+    failed : int
+        Nombre de tentatives de transfert échouées depuis le lancement.
     """
 
     def __init__(self):
@@ -48,14 +55,29 @@ class FileWatcher(QMainWindow):
         Initialise l'application FileWatcher.
         """
         super().__init__()
-        self.ftp_manager = FTPManager()
-        self.connection_string = "TransferHistory.db"
+        self.status_bus = StatusBus(
+            max_rate=float(get_setting('ui', 'max_updates_per_second', 10)),
+            parent=self
+        )
+        self.failure_digest = FailureDigest(
+            window=float(get_setting('other', 'notification_window', 30)),
+            parent=self
+        )
+        self.status_bus.results_ready.connect(self.handle_transfer_results)
+        self.status_bus.failures_ready.connect(self.failure_digest.add)
+        self.failure_digest.digest_ready.connect(self.notify)
+        self.service = WatchService(
+            on_result=self.post_transfer_result,
+            on_dead_letter=self.status_bus.post_failure
+        )
         self.directory = None
-        self.observer = None
-        self.timer = None
-        self.tray_icon = None
+        self.succeeded = 0
+        self.failed = 0
+        self._tray_icon = None
+        self._failure_box = None
+        self._icon_success = None
         self.init_ui()
-        self.initialize_database()
+        self.service.start()
 
     def init_ui(self):
         """
@@ -82,55 +104,70 @@ class FileWatcher(QMainWindow):
         self.history_button.clicked.connect(self.show_history)
         layout.addWidget(self.history_button)
 
+        # Nombre de fichiers en attente par classe de priorité
+        self.queue_label = QLabel(self)
+        layout.addWidget(self.queue_label)
+        self.queue_timer = QTimer(self)
+        self.queue_timer.timeout.connect(self.update_queue_status)
+        self.queue_timer.start(1000)
+        self.update_queue_status()
+
         container = QWidget()
         container.setLayout(layout)
         self.setCentralWidget(container)
 
+    def update_queue_status(self):
+        """
+        Affiche le nombre de fichiers en attente de téléchargement par
+        classe de priorité.
+        """
+        depths = self.service.transfer_queue.depths()
+        if depths:
+            details = ', '.join(f"{name} : {count}"
+                                for name, count in sorted(depths.items()))
+            self.queue_label.setText(f"En attente — {details}")
+        else:
+            self.queue_label.setText("Aucun fichier en attente")
+
     def select_local_directory(self):
         """
         Ouvre une boîte de dialogue pour sélectionner
         le répertoire local à surveiller.
         """
-        self.directory = QFileDialog.getExistingDirectory(
+        directory = QFileDialog.getExistingDirectory(
             self, "Sélectionner le répertoire"
         )
-        if self.directory:
-            print(f"Répertoire local sélectionné : {self.directory}")
-            event_handler = MyHandler(self)
-            self.observer = Observer()
-            self.observer.schedule(
-                event_handler, self.directory, recursive=True
-            )
-            self.observer.start()
-            self.check_for_new_files()
-
-    def check_for_new_files(self):
+        if directory:
+            logger.info("Répertoire local sélectionné : %s", directory)
+            self.start_watching(directory)
+
+    def start_watching(self, directory):
         """
-        Vérifie périodiquement la présence de nouveaux fichiers.
+        Démarre la surveillance d'un répertoire.
+
+        Paramètres
+        ----------
+        directory : str
+            Chemin du répertoire local à surveiller.
         """
-        print("Vérification des nouveaux fichiers...")
-        self.timer = threading.Timer(10.0, self.check_for_new_files)
-        self.timer.start()
+        self.directory = directory
+        self.service.start_watching(directory)
 
     def stop_watching(self):
         """
-        Arrête la surveillance du répertoire et annule le timer.
+        Arrête la surveillance du répertoire et les threads de transfert.
         """
-        if self.observer:
-            self.observer.stop()
-            self.observer.join()
-        if self.timer:
-            self.timer.cancel()
+        self.service.stop()
 
     def show_history(self):
         """
         Affiche l'historique des transferts de fichiers.
         """
-        # Implémenter la logique pour afficher l'historique
-        # depuis la base de données
-        QMessageBox.information(
-            self, "Historique", "Voici l'historique des transferts."
-        )
+        # Import local : le package src.gui importe lui-même src.core.
+        from src.gui.history_dialog import HistoryDialog
+
+        dialog = HistoryDialog(self)
+        dialog.exec_()
 
     def open_ftp_credentials_dialog(self):
         """
@@ -140,75 +177,93 @@ class FileWatcher(QMainWindow):
         dialog = FTPCredentialsDialog(self)
         if dialog.exec_() == QDialog.Accepted:
             server, user, password = dialog.result
-            self.ftp_manager.setup_ftp(server, user, password)
+            if not self.service.connect(server, user, password):
+                QMessageBox.critical(self, "FTP Connection Error",
+                                     "Failed to connect to the FTP server.")
 
-    def initialize_database(self):
-        """
-        Initialise la base de données SQLite pour enregistrer
-        l'historique des transferts.
-        """
-        with sqlite3.connect(self.connection_string) as connection:
-            cursor = connection.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS FileTransfers (
-                    ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                    FileName TEXT NOT NULL,
-                    TransferDate TEXT NOT NULL,
-                    Status TEXT NOT NULL
-                )
-            """)
-            connection.commit()
-
-    def upload_to_ftp(self, file_path):
+    def post_transfer_result(self, file_path, success):
         """
-        Télécharge le fichier spécifié vers le serveur FTP et met à jour
-        l'icône de l'application.
+        Transmet le résultat d'un transfert au StatusBus. Appelée depuis
+        les threads de téléchargement.
 
         Paramètres
         ----------
         file_path : str
-            Chemin du fichier à télécharger.
+            Chemin du fichier transféré.
+        success : bool
+            Indique si le transfert a réussi.
         """
-        success = self.ftp_manager.upload_to_ftp(file_path)
-        self.update_icon_status(success)
-        self.record_transfer(file_path, success)
-        if not success:
-            self.notify_failure(file_path)
+        self.status_bus.post_result(success)
 
-    def record_transfer(self, file_path, success):
+    def handle_transfer_results(self, succeeded, failed, last_success):
         """
-        Enregistre le résultat du transfert dans la base de données.
+        Met à jour l'icône et son infobulle après un lot de transferts.
+        Chaque tentative échouée est comptée ; l'utilisateur n'est notifié
+        qu'une fois toutes les tentatives d'un fichier échouées, par le
+        FailureDigest, soit entre 1 min 45 et 3 min 30 après le premier
+        échec avec les réglages par défaut (`app.max_retries`,
+        `app.retry_base_delay`).
 
         Paramètres
         ----------
-        file_path : str
-            Chemin du fichier transféré.
-        success : bool
-            Indique si le transfert a réussi.
+        succeeded : int
+            Nombre de transferts réussis depuis la mise à jour précédente.
+        failed : int
+            Nombre de tentatives échouées depuis la mise à jour précédente.
+        last_success : bool
+            Indique si le dernier transfert a réussi.
+        """
+        self.succeeded += succeeded
+        self.failed += failed
+        self.update_icon_status(last_success)
+        self.tray_icon.setToolTip(
+            f"{self.succeeded} transferts réussis, "
+            f"{self.failed} tentatives échouées")
+
+    @property
+    def tray_icon(self):
         """
-        status = 'Success' if success else 'Failure'
-        transfer_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with sqlite3.connect(self.connection_string) as connection:
-            cursor = connection.cursor()
-            cursor.execute("""
-                INSERT INTO FileTransfers (FileName, TransferDate, Status)
-                VALUES (?, ?, ?)
-            """, (os.path.basename(file_path), transfer_date, status))
-            connection.commit()
-
-    def notify_failure(self, file_path):
+        QSystemTrayIcon: L'icône de la barre des tâches, ou None. Un clic
+        sur une de ses notifications ouvre l'historique.
         """
-        Affiche une notification en cas d'échec du transfert.
+        return self._tray_icon
+
+    @tray_icon.setter
+    def tray_icon(self, tray_icon):
+        self._tray_icon = tray_icon
+        if tray_icon is not None:
+            tray_icon.messageClicked.connect(self.show_history)
+
+    def notify(self, title, message):
+        """
+        Affiche une notification sans bloquer l'interface : une bulle de
+        l'icône de la barre des tâches ou, à défaut, une boîte de dialogue
+        non modale réutilisée. Le message est toujours journalisé ; rien
+        n'est affiché si `other.enable_notifications` est désactivé.
 
         Paramètres
         ----------
-        file_path : str
-            Chemin du fichier dont le transfert a échoué.
+        title : str
+            Le titre de la notification.
+        message : str
+            Le texte de la notification.
         """
-        QMessageBox.critical(
-            self, "Échec du téléchargement",
-            f"Échec du téléchargement du fichier : {file_path}"
-        )
+        logger.warning("%s : %s", title, message.replace('\n', ' '))
+        if not get_setting('other', 'enable_notifications', True):
+            return
+        if (self.tray_icon is not None and self.tray_icon.isVisible()
+                and QSystemTrayIcon.supportsMessages()):
+            self.tray_icon.showMessage(title, message,
+                                       QSystemTrayIcon.Warning)
+            return
+        if self._failure_box is None:
+            self._failure_box = QMessageBox(QMessageBox.Warning, title,
+                                            message, QMessageBox.Ok, self)
+            self._failure_box.setModal(False)
+        else:
+            self._failure_box.setWindowTitle(title)
+            self._failure_box.setText(message)
+        self._failure_box.show()
 
     def update_icon_status(self, success):
         """
@@ -220,8 +275,10 @@ class FileWatcher(QMainWindow):
         success : bool
             Indique si le dernier transfert a réussi.
         """
-        color = 'green' if success else 'red'
-        new_icon = create_icon_image(color=color)
+        if success == self._icon_success and self.tray_icon:
+            return
+        self._icon_success = success
+        new_icon = status_icon('green' if success else 'red')
         if self.tray_icon:
             self.tray_icon.setIcon(new_icon)
         else:
@@ -235,40 +292,3 @@ class FileWatcher(QMainWindow):
         """
         self.stop_watching()
         event.accept()
-
-
-class MyHandler(FileSystemEventHandler):
-    """
-    Gestionnaire d'événements pour surveiller les modifications du
-    système de fichiers.
-
-    Attributs
-    ---------
-    file_watcher : FileWatcher
-        Instance de la classe FileWatcher pour accéder aux
-        méthodes de téléchargement.
-    """
-
-    def __init__(self, file_watcher):
-        """
-        Initialise le gestionnaire d'événements.
-
-        Paramètres
-        ----------
-        file_watcher : FileWatcher
-            Instance de la classe FileWatcher.
-        """
-        self.file_watcher = file_watcher
-
-    def on_created(self, event):
-        """
-        Appelé lorsqu'un nouveau fichier est créé dans le répertoire surveillé.
-
-        Paramètres
-        ----------
-        event : FileSystemEvent
-            L'événement de création de fichier.
-        """
-        if not event.is_directory:
-            print(f"Nouveau fichier détecté : {event.src_path}")
-            self.file_watcher.upload_to_ftp(event.src_path)
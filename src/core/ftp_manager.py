@@ -2,11 +2,70 @@
 Module de gestion FTP.
 
 Ce module fournit la classe FTPManager pour gérer les connexions FTP et
-les transferts de fichiers.
+les transferts de fichiers. Les connexions sont empruntées à un pool de
+sessions authentifiées maintenues en vie, ce qui permet à plusieurs threads
+de télécharger en parallèle et de survivre à la perte d'une connexion.
+
+Les fichiers volumineux sont téléchargés en mode reprenable : le décalage
+confirmé par le serveur est enregistré, et un transfert interrompu reprend
+avec REST (ou APPE) au lieu de renvoyer le fichier depuis le début.
+
+Le contenu des répertoires distants est mis en cache (voir
+RemoteListingCache) pour comparer les fichiers locaux au serveur sans une
+commande par fichier.
+
+Le débit d'envoi est plafonné par un RateLimiter partagé par tous les
+threads de téléchargement. Les données sont envoyées par `send_file`, qui
+confie la copie au noyau avec sendfile lorsque c'est possible, ou
+compressées à la volée selon la CompressionPolicy configurée.
+
+Un fichier très volumineux peut être envoyé en plusieurs segments en
+parallèle, chacun sur sa propre connexion avec REST, lorsque le serveur
+annonce REST STREAM et accepte l'écriture à un décalage quelconque.
 """
+import logging
 import os
-from ftplib import FTP, all_errors
-from tkinter import messagebox
+import threading
+from ftplib import all_errors, error_perm
+from src.core.compression import CompressionPolicy, send_compressed
+from src.core.data_channel import DEFAULT_BLOCK_SIZE, send_file
+from src.core.ftp_pool import FTPConnectionPool
+from src.core.rate_limiter import RateLimiter
+from src.core.remote_listing import (
+    RemoteEntry, RemoteListingCache, parse_list_line
+)
+from src.utils.config import get_setting
+from src.utils.metrics import error_class
+
+logger = logging.getLogger(__name__)
+
+
+def create_ftp_manager(pool_size=1, offset_store=None):
+    """
+    Crée le gestionnaire FTP du moteur choisi par le réglage `ftp.engine` :
+    "threaded" (une connexion ftplib par thread) ou "async" (sessions
+    asyncio multiplexées, voir AsyncFTPManager).
+
+    Paramètres
+    ----------
+    pool_size : int
+        Nombre maximal de connexions FTP du moteur à threads.
+    offset_store : DBManager, optional
+        Stockage des décalages de reprise.
+
+    Retourne
+    -------
+    FTPManager
+        Le gestionnaire FTP.
+    """
+    engine = get_setting('ftp', 'engine', 'threaded')
+    if engine == 'async':
+        from src.core.async_ftp import AsyncFTPManager
+        return AsyncFTPManager(pool_size, offset_store)
+    if engine != 'threaded':
+        logger.warning("Unknown FTP engine %r, using the threaded engine.",
+                       engine)
+    return FTPManager(pool_size, offset_store)
 
 
 class FTPManager:
@@ -17,21 +76,61 @@ class FTPManager:
     télécharger des fichiers vers le serveur FTP.
     """
 
-    def __init__(self):
+    def __init__(self, pool_size=1, offset_store=None):
         """
         Initialise une nouvelle instance de FTPManager.
 
         Initialise les attributs du serveur FTP, de l'utilisateur,
-        du mot de passe et du client FTP.
+        du mot de passe et du pool de connexions.
+
+        Paramètres
+        ----------
+        pool_size : int
+            Nombre maximal de connexions FTP ouvertes simultanément.
+        offset_store : DBManager, optional
+            Stockage des décalages de reprise. Sans stockage, les
+            téléchargements ne sont pas reprenables.
         """
         self.ftp_server = None
         self.ftp_user = None
         self.ftp_password = None
-        self.client = None
+        self.pool_size = pool_size
+        # Nombre de téléchargements que le gestionnaire sert en parallèle.
+        self.concurrency = pool_size
+        self.pool = None
+        self.offset_store = offset_store
+        self.resume_threshold = int(
+            get_setting('ftp', 'resume_threshold', 64 * 1024 * 1024))
+        self.resume_attempts = int(get_setting('ftp', 'resume_attempts', 3))
+        self.remote_cache = RemoteListingCache(
+            self, ttl=float(get_setting('ftp', 'listing_ttl', 60)))
+        self.block_size = int(
+            get_setting('ftp', 'block_size', DEFAULT_BLOCK_SIZE))
+        self.use_sendfile = bool(get_setting('ftp', 'sendfile', True))
+        self.rate_limiter = RateLimiter(
+            float(get_setting('ftp', 'bandwidth_limit', 0)),
+            extension_limits=get_setting('ftp', 'extension_limits', {}),
+            root_limits=get_setting('ftp', 'root_limits', {})
+        )
+        self.compression = CompressionPolicy(
+            get_setting('compression', 'algorithm', 'gzip')
+            if get_setting('compression', 'enabled', False) else None,
+            level=get_setting('compression', 'level', None),
+            extensions=get_setting('compression', 'extensions', []) or [],
+            min_size=int(get_setting('compression', 'min_size', 0))
+        )
+        self.segment_threshold = int(
+            get_setting('ftp', 'segment_threshold', 0))
+        self.segments = max(1, int(get_setting('ftp', 'segments', 4)))
+        self._mlsd_supported = True
+        self._segments_supported = None
+        self._failures = threading.local()
 
     def setup_ftp(self, ftp_server, ftp_user, ftp_password):
         """
-        Configure la connexion FTP avec les informations fournies.
+        Configure la connexion FTP avec les informations fournies et
+        vérifie qu'elle peut être établie. L'erreur éventuelle est
+        journalisée ; l'interface se charge de l'afficher.
 
         Paramètres
         ----------
@@ -47,20 +146,118 @@ class FTPManager:
         bool
             True si la connexion est établie avec succès, False sinon.
         """
+        self.configure(ftp_server, ftp_user, ftp_password)
+        return self.connect()
+
+    def configure(self, ftp_server, ftp_user, ftp_password):
+        """
+        Enregistre les informations de connexion sans ouvrir de connexion.
+
+        Paramètres
+        ----------
+        ftp_server : str
+            L'adresse du serveur FTP.
+        ftp_user : str
+            Le nom d'utilisateur pour la connexion FTP.
+        ftp_password : str
+            Le mot de passe pour la connexion FTP.
+        """
+        self.close()
+        self.remote_cache.invalidate()
+        self._mlsd_supported = True
+        self._segments_supported = None
         self.ftp_server = ftp_server
         self.ftp_user = ftp_user
         self.ftp_password = ftp_password
+        self.pool = FTPConnectionPool(
+            ftp_server, ftp_user, ftp_password,
+            port=int(get_setting('ftp', 'port', 21)),
+            max_size=self.pool_size + (
+                self.segments - 1 if self.segment_threshold > 0 else 0),
+            keepalive_interval=float(
+                get_setting('ftp', 'keepalive_interval', 30)),
+            idle_timeout=float(get_setting('ftp', 'idle_timeout', 300)),
+            timeout=float(get_setting('ftp', 'timeout', 30))
+        )
+
+    def connect(self):
+        """
+        Ouvre une connexion FTP avec les informations enregistrées et la
+        conserve dans le pool.
+
+        Retourne
+        -------
+        bool
+            True si la connexion est établie avec succès, False sinon.
+        """
+        if self.pool is None:
+            logger.warning("FTP server is not configured.")
+            return False
         try:
-            self.client = FTP(ftp_server, ftp_user, ftp_password)
-            print("Connection successful!")
+            with self.pool.connection():
+                pass
+            logger.info("Connection successful!")
             return True
         except all_errors as e:
-            print(f"Connection error: {e}")
-            messagebox.showerror("FTP Connection Error",
-                                 "Failed to connect to the FTP server.")
+            logger.error("Connection error: %s", e)
             return False
 
-    def upload_to_ftp(self, file_path):
+    def close(self):
+        """
+        Ferme les connexions FTP ouvertes.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def compression_for(self, file_path, size=None):
+        """
+        Retourne le codec avec lequel un fichier est compressé à l'envoi.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+        size : int, optional
+            La taille du fichier. Si None, elle est lue sur le disque.
+
+        Retourne
+        -------
+        Codec or None
+            Le codec, ou None si le fichier est envoyé tel quel.
+        """
+        if self.compression.codec is None:
+            return None
+        if size is None:
+            try:
+                size = os.stat(file_path).st_size
+            except OSError:
+                return None
+        return self.compression.codec_for(file_path, size)
+
+    def remote_path(self, file_path, size=None):
+        """
+        Retourne le chemin sous lequel un fichier local est téléchargé.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+        size : int, optional
+            La taille du fichier. Si None, elle est lue sur le disque
+            lorsque la compression est active.
+
+        Retourne
+        -------
+        str
+            Le chemin du fichier sur le serveur, avec le suffixe du codec
+            si le fichier est compressé.
+        """
+        codec = self.compression_for(file_path, size)
+        name = os.path.basename(file_path)
+        return name + codec.suffix if codec is not None else name
+
+    def upload_to_ftp(self, file_path, stats=None):
         """
         Télécharge un fichier local vers le serveur FTP.
 
@@ -68,21 +265,510 @@ class FTPManager:
         ----------
         file_path : str
             Le chemin vers le fichier local à télécharger.
+        stats : dict, optional
+            Si fourni, reçoit `compressed_size` (la taille envoyée) pour un
+            fichier compressé et, en cas d'échec, `error` et `error_class`
+            (la cause et sa classe).
 
         Retourne
         -------
         bool
             True si le fichier est téléchargé avec succès, False sinon.
         """
+        if self.pool is None:
+            logger.warning("FTP server is not configured.")
+            return False
+        self._failures.error = None
         try:
             with open(file_path, 'rb') as file:
-                self.client.storbinary(f'STOR {os.path.basename(file_path)}',
-                                       file)
-            print(f"File {file_path} uploaded successfully.")
-            return True
+                stat = os.fstat(file.fileno())
+                buckets = self.rate_limiter.buckets_for(file_path)
+                codec = self.compression_for(file_path, stat.st_size)
+                remote_size = stat.st_size
+                if codec is not None:
+                    remote_size = self._store_compressed(
+                        file_path, file, stat, codec, buckets)
+                    success = remote_size is not None
+                    if success and stats is not None:
+                        stats['compressed_size'] = remote_size
+                else:
+                    success = None
+                    if self._use_segments(stat.st_size):
+                        success = self._store_segmented(file_path, stat,
+                                                        buckets)
+                    if success is None and (
+                            self.offset_store is not None
+                            and stat.st_size >= self.resume_threshold):
+                        success = self._store_resumable(file_path, file,
+                                                        stat, buckets)
+                    elif success is None:
+                        success = self._store(file_path, file, buckets)
         except FileNotFoundError as e:
-            print(f"File not found: {e}")
+            logger.warning("File not found: %s", e)
+            self._failures.error = e
+            success = False
+        except OSError as e:
+            logger.error("Cannot read %s: %s", file_path, e)
+            self._failures.error = e
+            success = False
+        if success:
+            self.remote_cache.update_entry(
+                self.remote_path(file_path, stat.st_size), remote_size)
+        elif stats is not None and self._failures.error is not None:
+            stats['error'] = str(self._failures.error)
+            stats['error_class'] = error_class(self._failures.error)
+        return success
+
+    def list_remote_directory(self, remote_dir=''):
+        """
+        Liste les fichiers d'un répertoire distant avec MLSD, ou avec LIST
+        si le serveur ne connaît pas MLSD.
+
+        Paramètres
+        ----------
+        remote_dir : str
+            Le répertoire distant ('' pour le répertoire courant).
+
+        Retourne
+        -------
+        dict
+            Les fichiers du répertoire, sous la forme
+            `{nom: RemoteEntry}`.
+
+        Lève
+        ----
+        ftplib.all_errors
+            Si le serveur n'est pas configuré ou si la liste échoue.
+        """
+        if self.pool is None:
+            raise ConnectionError("FTP server is not configured.")
+        with self.pool.connection() as client:
+            if self._mlsd_supported:
+                try:
+                    return {
+                        name: RemoteEntry(int(facts.get('size', 0)),
+                                          facts.get('modify'))
+                        for name, facts in client.mlsd(
+                            remote_dir, facts=['type', 'size', 'modify'])
+                        if facts.get('type') == 'file'
+                    }
+                except error_perm as e:
+                    if not str(e).startswith(('500', '502')):
+                        raise
+                    logger.warning("MLSD is not supported, falling back to "
+                                   "LIST.")
+                    self._mlsd_supported = False
+            lines = []
+            command = f'LIST {remote_dir}' if remote_dir else 'LIST'
+            client.retrlines(command, lines.append)
+        entries = (parse_list_line(line) for line in lines)
+        return dict(entry for entry in entries if entry is not None)
+
+    def _upload_failed(self, file_path, error):
+        """
+        Journalise l'échec d'un envoi et retient sa cause, que
+        `upload_to_ftp` transmet dans `stats['error']`.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+        error : Exception or str
+            La cause de l'échec.
+        """
+        logger.error("Failed to upload %s: %s", file_path, error)
+        self._failures.error = error
+
+    def _store(self, file_path, file, buckets):
+        """
+        Envoie le contenu d'un fichier ouvert sur une connexion du pool.
+
+        Si la connexion empruntée s'avère morte, elle est écartée et le
+        transfert est relancé une fois sur une nouvelle session.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+        file : file object
+            Le fichier ouvert en mode binaire.
+        buckets : list of TokenBucket
+            Les seaux de débit à respecter.
+
+        Retourne
+        -------
+        bool
+            True si le fichier est téléchargé avec succès, False sinon.
+        """
+        remote_name = self.remote_path(file_path)
+        for attempt in range(2):
+            try:
+                with self.pool.connection() as client:
+                    self._send_from(client, remote_name, file, 0, buckets)
+                logger.info("File %s uploaded successfully.", file_path)
+                return True
+            except all_errors as e:
+                if attempt == 0:
+                    logger.warning("Upload of %s failed (%s), retrying on a "
+                                   "new connection.", file_path, e)
+                    continue
+                self._upload_failed(file_path, e)
+        return False
+
+    def _store_compressed(self, file_path, file, stat, codec, buckets):
+        """
+        Compresse un fichier à la volée dans la connexion de données.
+
+        Un envoi compressé n'est pas reprenable : une connexion morte est
+        écartée et l'envoi est relancé une fois depuis le début.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+        file : file object
+            Le fichier ouvert en mode binaire.
+        stat : os.stat_result
+            Les informations du fichier ouvert.
+        codec : Codec
+            Le codec à utiliser.
+        buckets : list of TokenBucket
+            Les seaux de débit à respecter.
+
+        Retourne
+        -------
+        int or None
+            La taille compressée envoyée, ou None en cas d'échec.
+        """
+        remote_name = self.remote_path(file_path, stat.st_size)
+        for attempt in range(2):
+            try:
+                with self.pool.connection() as client:
+                    client.voidcmd('TYPE I')
+                    with client.transfercmd(f'STOR {remote_name}') as conn:
+                        sent = send_compressed(conn, file, codec,
+                                               self.block_size, buckets)
+                    client.voidresp()
+                ratio = stat.st_size / sent if sent else 0
+                logger.info("File %s uploaded successfully as %s (%s, %.1f:1).",
+                            file_path, remote_name, codec.name, ratio)
+                return sent
+            except all_errors as e:
+                if attempt == 0:
+                    logger.warning("Upload of %s failed (%s), retrying on a "
+                                   "new connection.", file_path, e)
+                    continue
+                self._upload_failed(file_path, e)
+        return None
+
+    def _use_segments(self, size):
+        """
+        Indique si un fichier doit être envoyé en plusieurs segments.
+
+        Paramètres
+        ----------
+        size : int
+            La taille du fichier en octets.
+
+        Retourne
+        -------
+        bool
+            True si l'envoi segmenté est activé, que le fichier atteint le
+            seuil et que le serveur n'a pas déjà refusé ce mode.
+        """
+        return (self.segment_threshold > 0 and self.segments > 1
+                and size >= self.segment_threshold
+                and self._segments_supported is not False)
+
+    def _store_segmented(self, file_path, stat, buckets):
+        """
+        Envoie un fichier en plusieurs segments en parallèle.
+
+        Le premier segment crée le fichier avec STOR ; chacun des suivants
+        est écrit à son décalage avec REST puis STOR, sur sa propre
+        connexion et depuis son propre thread. Seules les connexions libres
+        du pool sont utilisées en plus de la première, pour ne pas bloquer
+        les autres téléchargements.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+        stat : os.stat_result
+            Les informations du fichier ouvert.
+        buckets : list of TokenBucket
+            Les seaux de débit à respecter, partagés par les segments.
+
+        Retourne
+        -------
+        bool or None
+            True si le fichier est téléchargé avec succès, False en cas
+            d'échec, ou None si l'envoi segmenté n'est pas possible (serveur
+            incompatible ou aucune connexion libre) et que le fichier doit
+            être envoyé autrement.
+        """
+        remote_name = self.remote_path(file_path, stat.st_size)
+        try:
+            clients = [self.pool.acquire()]
+        except all_errors as e:
+            self._upload_failed(file_path, e)
             return False
+        try:
+            while len(clients) < self.segments:
+                client = self.pool.acquire(blocking=False)
+                if client is None:
+                    break
+                clients.append(client)
         except all_errors as e:
-            print(f"Failed to upload {file_path}: {e}")
+            logger.warning("Cannot open another connection for %s: %s",
+                           file_path, e)
+        if len(clients) < 2 or not self._check_segments(clients[0]):
+            for client in clients:
+                self.pool.release(client)
+            return None
+
+        length = -(-stat.st_size // len(clients))
+        ranges = [(start, min(length, stat.st_size - start))
+                  for start in range(0, stat.st_size, length)]
+        clients, spare = clients[:len(ranges)], clients[len(ranges):]
+        for client in spare:
+            self.pool.release(client)
+        broken = [False] * len(clients)
+        errors = []
+        conns = []
+        start = 0
+        try:
+            for client, (start, _) in zip(clients, ranges):
+                client.voidcmd('TYPE I')
+                conns.append(client.transfercmd(f'STOR {remote_name}',
+                                                start or None))
+        except all_errors as e:
+            for conn in conns:
+                conn.close()
+            for client in clients:
+                self.pool.release(client, broken=True)
+            if start and isinstance(e, error_perm):
+                # REST annoncé mais refusé au-delà de la fin du fichier.
+                # Un refus du premier segment (droits, chemin) est un échec
+                # ordinaire.
+                logger.warning("Server refused segmented upload of %s (%s), "
+                               "sending it on a single connection.",
+                               remote_name, e)
+                self._segments_supported = False
+                return None
+            self._upload_failed(file_path, e)
+            return False
+
+        def send_segment(index):
+            start, count = ranges[index]
+            try:
+                with open(file_path, 'rb') as file, conns[index]:
+                    send_file(conns[index], file, start, self.block_size,
+                              self.use_sendfile, buckets, count)
+                clients[index].voidresp()
+            except all_errors as e:
+                logger.warning("Segment %s of %s failed: %s",
+                               index + 1, file_path, e)
+                broken[index] = True
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=send_segment, args=(index,),
+                             name=f"segment-{index + 1}", daemon=True)
+            for index in range(len(clients))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for client, failed in zip(clients, broken):
+            self.pool.release(client, broken=failed)
+        if any(broken):
+            self._upload_failed(file_path, errors[0])
             return False
+        try:
+            with self.pool.connection() as client:
+                client.voidcmd('TYPE I')
+                remote_size = client.size(remote_name)
+        except all_errors as e:
+            logger.error("Cannot check the size of %s: %s", remote_name, e)
+            self._failures.error = e
+            return False
+        if remote_size != stat.st_size:
+            self._upload_failed(
+                file_path, f"{remote_size} bytes on the server instead of "
+                           f"{stat.st_size} after a segmented upload")
+            return False
+        self._segments_supported = True
+        logger.info("File %s uploaded successfully in %s segments.",
+                    file_path, len(clients))
+        return True
+
+    def _check_segments(self, client):
+        """
+        Vérifie une fois que le serveur annonce REST STREAM (RFC 3659),
+        nécessaire pour écrire un segment à son décalage.
+
+        Paramètres
+        ----------
+        client : ftplib.FTP
+            La connexion à utiliser.
+
+        Retourne
+        -------
+        bool
+            False si le serveur ne l'annonce pas.
+        """
+        if self._segments_supported is None:
+            try:
+                features = client.sendcmd('FEAT')
+            except all_errors:
+                features = ''
+            if 'REST STREAM' not in features.upper():
+                logger.warning("Server does not support REST STREAM, "
+                               "segmented uploads disabled.")
+                self._segments_supported = False
+        return self._segments_supported is not False
+
+    def _store_resumable(self, file_path, file, stat, buckets):
+        """
+        Envoie un fichier volumineux en reprenant les transferts
+        interrompus.
+
+        Le décalage confirmé par le serveur (commande SIZE) est enregistré
+        après chaque interruption, et la tentative suivante reprend à ce
+        décalage au lieu de renvoyer tout le fichier.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+        file : file object
+            Le fichier ouvert en mode binaire.
+        stat : os.stat_result
+            Les informations du fichier ouvert.
+        buckets : list of TokenBucket
+            Les seaux de débit à respecter.
+
+        Retourne
+        -------
+        bool
+            True si le fichier est téléchargé avec succès, False sinon.
+        """
+        remote_name = self.remote_path(file_path, stat.st_size)
+        version = (remote_name, file_path, stat.st_size, stat.st_mtime_ns)
+        partial = self.offset_store.get_resume_offset(*version) is not None
+        if not partial:
+            self.offset_store.save_resume_offset(*version, 0)
+        for _ in range(self.resume_attempts):
+            try:
+                with self.pool.connection() as client:
+                    offset = 0
+                    if partial:
+                        offset = self._remote_offset(client, remote_name,
+                                                     stat.st_size)
+                    self._send_from(client, remote_name, file, offset,
+                                    buckets)
+                self.offset_store.clear_resume_offset(remote_name)
+                logger.info("File %s uploaded successfully.", file_path)
+                return True
+            except all_errors as e:
+                logger.warning("Upload of %s interrupted: %s", file_path, e)
+                self._failures.error = e
+                partial = True
+                self._confirm_offset(version)
+        logger.error("Failed to upload %s after %s attempts.",
+                     file_path, self.resume_attempts)
+        return False
+
+    def _confirm_offset(self, version):
+        """
+        Interroge le serveur sur la taille du fichier partiel et enregistre
+        ce décalage pour la prochaine reprise.
+
+        Paramètres
+        ----------
+        version : tuple
+            Le tuple `(remote_name, file_path, size, mtime_ns)` identifiant
+            la version du fichier en cours d'envoi.
+        """
+        remote_name, _, size, _ = version
+        try:
+            with self.pool.connection() as client:
+                offset = self._remote_offset(client, remote_name, size)
+        except all_errors as e:
+            logger.error("Cannot confirm the offset of %s: %s", remote_name, e)
+            return
+        self.offset_store.save_resume_offset(*version, offset)
+
+    @staticmethod
+    def _remote_offset(client, remote_name, size):
+        """
+        Retourne le nombre d'octets du fichier déjà présents sur le serveur.
+
+        Paramètres
+        ----------
+        client : ftplib.FTP
+            La connexion à utiliser.
+        remote_name : str
+            Le nom du fichier sur le serveur.
+        size : int
+            La taille du fichier local.
+
+        Retourne
+        -------
+        int
+            Le décalage de reprise, ou 0 si le fichier distant est absent,
+            plus grand que le fichier local, ou si le serveur ne connaît pas
+            la commande SIZE.
+        """
+        client.voidcmd('TYPE I')
+        try:
+            remote_size = client.size(remote_name)
+        except error_perm:
+            return 0
+        if remote_size is None or remote_size > size:
+            return 0
+        return remote_size
+
+    def _send_from(self, client, remote_name, file, offset, buckets=()):
+        """
+        Envoie le fichier à partir d'un décalage donné.
+
+        La reprise utilise REST suivi de STOR, puis APPE si le serveur
+        refuse REST. Si aucune des deux n'est acceptée, le fichier est
+        renvoyé en entier.
+
+        Paramètres
+        ----------
+        client : ftplib.FTP
+            La connexion à utiliser.
+        remote_name : str
+            Le nom du fichier sur le serveur.
+        file : file object
+            Le fichier ouvert en mode binaire.
+        offset : int
+            Le nombre d'octets déjà présents sur le serveur.
+        buckets : list of TokenBucket
+            Les seaux de débit à respecter.
+        """
+        client.voidcmd('TYPE I')
+        conn = None
+        if offset:
+            try:
+                conn = client.transfercmd(f'STOR {remote_name}', offset)
+            except error_perm:
+                try:
+                    conn = client.transfercmd(f'APPE {remote_name}')
+                except error_perm:
+                    logger.warning("Server cannot resume %s, sending the "
+                                   "whole file.", remote_name)
+        if conn is None:
+            offset = 0
+            conn = client.transfercmd(f'STOR {remote_name}')
+        if offset:
+            logger.info("Resuming %s at byte %s.", remote_name, offset)
+        with conn:
+            send_file(conn, file, offset, self.block_size, self.use_sendfile,
+                      buckets)
+        client.voidresp()
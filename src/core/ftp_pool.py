@@ -0,0 +1,323 @@
+"""
+Module du pool de connexions FTP.
+
+Ce module fournit la classe FTPConnectionPool qui conserve des connexions
+FTP authentifiées prêtes à l'emploi. Un thread de maintien envoie des NOOP
+aux connexions inactives pour éviter leur fermeture par le serveur, ferme
+celles qui restent inutilisées trop longtemps et écarte les connexions
+mortes, qui sont rouvertes de manière transparente au prochain emprunt.
+
+Le temps d'obtention d'une connexion (attente d'une connexion libre,
+ouverture et authentification) est enregistré comme phase `connect` (voir
+src.utils.metrics).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from ftplib import FTP, all_errors, error_perm
+
+from src.utils.metrics import metrics, timed_phase
+
+
+class FTPConnectionPool:
+    """
+    Pool de connexions FTP authentifiées partagé entre plusieurs threads.
+
+    Attributs
+    ---------
+    server : str
+        L'adresse du serveur FTP.
+    port : int
+        Le port du serveur FTP.
+    max_size : int
+        Nombre maximal de connexions ouvertes simultanément.
+    keepalive_interval : float
+        Intervalle en secondes entre deux NOOP sur une connexion inactive.
+        Une valeur nulle ou négative désactive le thread de maintien : les
+        connexions inactives sont alors vérifiées à chaque emprunt.
+    idle_timeout : float
+        Durée d'inactivité en secondes après laquelle une connexion est
+        fermée.
+    """
+
+    def __init__(self, server, user, password, port=21, max_size=1,
+                 keepalive_interval=30.0, idle_timeout=300.0, timeout=30.0):
+        """
+        Initialise le pool sans ouvrir de connexion.
+
+        Paramètres
+        ----------
+        server : str
+            L'adresse du serveur FTP.
+        user : str
+            Le nom d'utilisateur pour la connexion FTP.
+        password : str
+            Le mot de passe pour la connexion FTP.
+        port : int
+            Le port du serveur FTP.
+        max_size : int
+            Nombre maximal de connexions ouvertes simultanément.
+        keepalive_interval : float
+            Intervalle en secondes entre deux NOOP sur une connexion
+            inactive, ou une valeur nulle ou négative pour désactiver le
+            thread de maintien.
+        idle_timeout : float
+            Durée d'inactivité en secondes après laquelle une connexion
+            est fermée.
+        timeout : float
+            Délai d'attente réseau en secondes pour chaque connexion.
+        """
+        self.server = server
+        self.port = port
+        self.max_size = max(1, int(max_size))
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout
+        self._user = user
+        self._password = password
+        self._timeout = timeout
+        # Connexions inactives : (client, dernière utilisation,
+        # dernière vérification)
+        self._idle = []
+        self._open_count = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._stop_event = threading.Event()
+        self._keepalive_thread = None
+
+    def _open_connection(self):
+        """
+        Ouvre et authentifie une nouvelle connexion FTP.
+
+        Retourne
+        -------
+        ftplib.FTP
+            La connexion authentifiée.
+        """
+        client = FTP(timeout=self._timeout)
+        try:
+            client.connect(self.server, self.port)
+            client.login(self._user, self._password)
+        except all_errors:
+            client.close()
+            raise
+        metrics.inc('file_watcher_ftp_connections_opened_total')
+        return client
+
+    @staticmethod
+    def _discard(client):
+        """
+        Ferme une connexion sans propager d'erreur.
+        """
+        try:
+            client.close()
+        except all_errors:
+            pass
+
+    @staticmethod
+    def _is_healthy(client):
+        """
+        Vérifie qu'une connexion répond encore au serveur.
+
+        Retourne
+        -------
+        bool
+            True si le serveur a répondu au NOOP, False sinon.
+        """
+        try:
+            client.voidcmd('NOOP')
+            return True
+        except all_errors:
+            return False
+
+    def acquire(self, blocking=True):
+        """
+        Emprunte une connexion au pool, en l'ouvrant si nécessaire. Bloque
+        tant que `max_size` connexions sont déjà empruntées.
+
+        Paramètres
+        ----------
+        blocking : bool
+            Si False, retourne None au lieu d'attendre une connexion.
+
+        Retourne
+        -------
+        ftplib.FTP or None
+            Une connexion authentifiée, ou None si aucune n'est disponible
+            sans attendre.
+
+        Lève
+        ----
+        ftplib.all_errors
+            Si la connexion au serveur échoue.
+        """
+        with timed_phase('connect'):
+            return self._acquire(blocking)
+
+    def _acquire(self, blocking):
+        """
+        Emprunte une connexion au pool (voir `acquire`).
+        """
+        while True:
+            with self._condition:
+                while (not self._idle and not self._closed
+                       and self._open_count >= self.max_size):
+                    if not blocking:
+                        return None
+                    self._condition.wait()
+                if self._closed:
+                    raise ConnectionError("FTP connection pool is closed.")
+                if self._idle:
+                    client, _, last_checked = self._idle.pop()
+                else:
+                    client, last_checked = None, None
+                    self._open_count += 1
+            if client is None:
+                break
+            # Une connexion qui n'a pas reçu de NOOP récent est vérifiée
+            # avant d'être prêtée.
+            unchecked_for = time.monotonic() - last_checked
+            if (unchecked_for < self.keepalive_interval
+                    or self._is_healthy(client)):
+                return client
+            self._discard(client)
+            self._forget()
+        try:
+            client = self._open_connection()
+        except all_errors:
+            self._forget()
+            raise
+        self._start_keepalive()
+        return client
+
+    def release(self, client, broken=False):
+        """
+        Rend une connexion au pool.
+
+        Paramètres
+        ----------
+        client : ftplib.FTP
+            La connexion empruntée.
+        broken : bool
+            Si True, la connexion est fermée au lieu d'être réutilisée.
+        """
+        if broken or self._closed:
+            self._discard(client)
+            self._forget()
+            return
+        with self._condition:
+            now = time.monotonic()
+            self._idle.append((client, now, now))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Emprunte une connexion pour la durée d'un bloc `with`. La
+        connexion n'est rendue au pool qu'à la sortie normale du bloc ou
+        après une réponse 5xx (`error_perm`), qui laisse la session
+        utilisable. Toute autre exception l'écarte, un transfert
+        interrompu pouvant laisser la session dans un état inconnu : le
+        prochain emprunt ouvre une nouvelle session.
+
+        Retourne
+        -------
+        ftplib.FTP
+            Une connexion authentifiée.
+        """
+        client = self.acquire()
+        try:
+            yield client
+        except error_perm:
+            self.release(client)
+            raise
+        except BaseException:
+            self.release(client, broken=True)
+            raise
+        self.release(client)
+
+    def _forget(self):
+        """
+        Décompte une connexion fermée et réveille un thread en attente.
+        """
+        with self._condition:
+            self._open_count -= 1
+            self._condition.notify()
+
+    def _start_keepalive(self):
+        """
+        Démarre le thread de maintien des connexions s'il ne tourne pas et
+        n'est pas désactivé.
+        """
+        if self.keepalive_interval <= 0:
+            return
+        with self._condition:
+            if self._keepalive_thread is not None or self._closed:
+                return
+            self._keepalive_thread = threading.Thread(
+                target=self._keepalive_loop, name="ftp-keepalive",
+                daemon=True
+            )
+            self._keepalive_thread.start()
+
+    def _keepalive_loop(self):
+        """
+        Envoie périodiquement un NOOP aux connexions inactives et ferme
+        celles qui sont mortes ou inutilisées depuis trop longtemps.
+        """
+        while not self._stop_event.wait(self.keepalive_interval):
+            self._check_idle()
+
+    def _check_idle(self):
+        """
+        Vérifie une à une les connexions inactives qui n'ont pas été
+        vérifiées depuis le début du passage. Seule la connexion en cours
+        de vérification est retirée du pool : les autres restent
+        disponibles pour `acquire`.
+        """
+        started = time.monotonic()
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                due = [index for index, (_, _, last_checked)
+                       in enumerate(self._idle) if last_checked < started]
+                if not due:
+                    return
+                client, last_used, _ = self._idle.pop(due[0])
+            if time.monotonic() - last_used >= self.idle_timeout:
+                try:
+                    client.quit()
+                except all_errors:
+                    self._discard(client)
+                self._forget()
+                continue
+            if self._is_healthy(client):
+                with self._condition:
+                    if not self._closed:
+                        self._idle.append(
+                            (client, last_used, time.monotonic()))
+                        self._condition.notify()
+                        continue
+            self._discard(client)
+            self._forget()
+
+    def close(self):
+        """
+        Ferme toutes les connexions inactives et arrête le thread de
+        maintien. Les connexions empruntées sont fermées à leur retour.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            thread, self._keepalive_thread = self._keepalive_thread, None
+            self._condition.notify_all()
+        self._stop_event.set()
+        if thread is not None:
+            thread.join()
+        for client, _, _ in idle:
+            try:
+                client.quit()
+            except all_errors:
+                self._discard(client)
+            self._forget()
@@ -0,0 +1,372 @@
+"""
+Module de la file durable des téléchargements.
+
+Ce module fournit la classe TransferOutbox qui enregistre dans la base de
+données chaque fichier à télécharger, avec son état : en attente
+("pending"), en cours ("in_flight"), mis de côté faute de connexion
+("held"), à réessayer ("retry") ou abandonné ("dead"). Un échec programme
+une nouvelle tentative après un délai exponentiel avec gigue, jusqu'à
+`max_retries` nouvelles tentatives. Après un arrêt ou un plantage, les
+fichiers en attente ou en cours sont repris au démarrage suivant sans
+parcourir le répertoire surveillé ; les fichiers mis de côté le sont à la
+connexion suivante.
+
+Un fichier signalé à nouveau garde son nombre d'échecs, pour qu'un fichier
+modifié sans cesse finisse tout de même par être abandonné. S'il est en
+cours de téléchargement, il reste dans cet état et n'est soumis à nouveau
+qu'à la fin de la tentative en cours.
+"""
+
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+HELD = 'held'
+RETRY = 'retry'
+DEAD = 'dead'
+
+
+class TransferOutbox:
+    """
+    File durable des téléchargements, avec reprise des échecs.
+
+    Attributs
+    ---------
+    store : DBManager
+        Stockage de la file.
+    max_retries : int
+        Nombre de nouvelles tentatives après un premier échec.
+    base_delay : float
+        Délai en secondes avant la première nouvelle tentative.
+    max_delay : float
+        Délai maximal en secondes entre deux tentatives.
+    on_dead_letter : callable
+        Fonction appelée avec le chemin d'un fichier abandonné et sa
+        dernière erreur.
+    """
+
+    def __init__(self, store, max_retries=3, base_delay=30.0,
+                 max_delay=3600.0, on_dead_letter=None):
+        """
+        Initialise la file.
+
+        Paramètres
+        ----------
+        store : DBManager
+            Stockage de la file.
+        max_retries : int
+            Nombre de nouvelles tentatives après un premier échec.
+        base_delay : float
+            Délai en secondes avant la première nouvelle tentative ; il
+            double à chaque échec.
+        max_delay : float
+            Délai maximal en secondes entre deux tentatives.
+        on_dead_letter : callable, optional
+            Fonction appelée avec le chemin d'un fichier abandonné et sa
+            dernière erreur, depuis le thread de travail.
+        """
+        self.store = store
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_dead_letter = on_dead_letter
+        self._submit = None
+        self._lock = threading.Lock()
+        # Fichiers signalés à nouveau pendant leur téléchargement.
+        self._modified = set()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def start(self, submit):
+        """
+        Démarre le thread qui soumet les nouvelles tentatives échues.
+
+        Paramètres
+        ----------
+        submit : callable
+            Fonction appelée avec le chemin d'un fichier à télécharger.
+        """
+        self._submit = submit
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._wakeup.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name="transfer-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Arrête le thread des nouvelles tentatives. Les états enregistrés
+        sont conservés pour le prochain démarrage.
+        """
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        thread.join()
+
+    def add(self, file_path):
+        """
+        Enregistre un fichier à télécharger. Un fichier déjà présent garde
+        son nombre d'échecs ; un fichier en cours de téléchargement reste
+        dans cet état et sera soumis à nouveau à la fin de la tentative.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier.
+
+        Retourne
+        -------
+        bool
+            True si le fichier doit être soumis, False s'il est déjà en
+            attente ou en cours.
+        """
+        with self._lock:
+            entry = self.store.get_outbox_entry(file_path)
+            if entry is None:
+                self.store.save_outbox_entry(file_path, PENDING)
+                return True
+            state, attempts = entry
+            if state == PENDING:
+                return False
+            if state == IN_FLIGHT:
+                self._modified.add(file_path)
+                return False
+            self.store.save_outbox_entry(file_path, PENDING, attempts)
+            return True
+
+    def begin(self, file_path):
+        """
+        Marque un fichier comme en cours de téléchargement.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier.
+        """
+        with self._lock:
+            entry = self.store.get_outbox_entry(file_path)
+            attempts = entry[1] if entry is not None else 0
+            self.store.save_outbox_entry(file_path, IN_FLIGHT, attempts)
+
+    def release(self, file_path):
+        """
+        Met de côté un fichier qui n'a pas pu être tenté faute de
+        connexion, sans compter d'échec. Il sera soumis à nouveau par
+        `resume_held`.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier.
+        """
+        with self._lock:
+            entry = self.store.get_outbox_entry(file_path)
+            attempts = entry[1] if entry is not None else 0
+            self.store.save_outbox_entry(file_path, HELD, attempts)
+
+    def complete(self, file_path):
+        """
+        Retire de la file un fichier téléchargé ou ignoré. Un fichier
+        signalé à nouveau pendant le transfert est soumis à nouveau.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier.
+        """
+        with self._lock:
+            entry = self.store.get_outbox_entry(file_path)
+            modified = self._take_modified(file_path, entry)
+            if not modified and (entry is None or entry[0] == IN_FLIGHT):
+                self.store.delete_outbox_entry(file_path)
+        if modified:
+            self._submit(file_path)
+
+    def discard(self, file_path):
+        """
+        Retire un fichier de la file, quel que soit son état.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier.
+        """
+        with self._lock:
+            self._modified.discard(file_path)
+            self.store.delete_outbox_entry(file_path)
+
+    def fail(self, file_path, error=None):
+        """
+        Enregistre l'échec d'un téléchargement et programme une nouvelle
+        tentative, ou abandonne le fichier après `max_retries` nouvelles
+        tentatives. Un fichier signalé à nouveau pendant le transfert est
+        soumis à nouveau sans compter l'échec.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier.
+        error : str, optional
+            La description de l'erreur.
+
+        Retourne
+        -------
+        bool
+            True si une nouvelle tentative est programmée.
+        """
+        with self._lock:
+            entry = self.store.get_outbox_entry(file_path)
+            modified = self._take_modified(file_path, entry)
+            if modified or entry is None or entry[0] != IN_FLIGHT:
+                dead = None
+            else:
+                attempts = entry[1] + 1
+                if attempts > self.max_retries:
+                    self.store.save_outbox_entry(file_path, DEAD, attempts,
+                                                 last_error=error)
+                    dead = True
+                else:
+                    delay = self.backoff(attempts)
+                    self.store.save_outbox_entry(file_path, RETRY, attempts,
+                                                 time.time() + delay, error)
+                    dead = False
+        if dead is None:
+            # Retiré pendant le transfert, ou modifié : soumis à nouveau.
+            if modified:
+                self._submit(file_path)
+            return modified
+        if dead:
+            logger.error("Giving up on %s after %s attempts: %s",
+                         file_path, attempts, error)
+            if self.on_dead_letter is not None:
+                self.on_dead_letter(file_path, error)
+            return False
+        logger.warning("Upload of %s will be retried in %.1fs "
+                       "(attempt %s of %s).", file_path, delay,
+                       attempts + 1, self.max_retries + 1)
+        self._wakeup.set()
+        return True
+
+    def backoff(self, attempts):
+        """
+        Calcule le délai avant une nouvelle tentative.
+
+        Le délai double à chaque échec, dans la limite de `max_delay`, et
+        est tiré au hasard dans sa seconde moitié pour que des échecs
+        simultanés ne soient pas réessayés ensemble.
+
+        Paramètres
+        ----------
+        attempts : int
+            Le nombre d'échecs du fichier.
+
+        Retourne
+        -------
+        float
+            Le délai en secondes.
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def resume(self):
+        """
+        Soumet à nouveau les fichiers en attente, en cours ou mis de côté
+        lors du dernier arrêt. À appeler une seule fois au démarrage, avant
+        les threads de travail : les fichiers en attente seraient sinon
+        soumis deux fois, et ceux en cours téléchargés deux fois en
+        parallèle. Les nouvelles tentatives programmées sont soumises à
+        leur échéance.
+
+        Retourne
+        -------
+        int
+            Le nombre de fichiers soumis.
+        """
+        with self._lock:
+            entries = self.store.get_outbox_entries(
+                (PENDING, IN_FLIGHT, HELD))
+            for file_path, _, attempts, _ in entries:
+                self.store.save_outbox_entry(file_path, PENDING, attempts)
+        for file_path, _, _, _ in entries:
+            self._submit(file_path)
+        if entries:
+            logger.info("Resumed %s pending uploads.", len(entries))
+        self._wakeup.set()
+        return len(entries)
+
+    def resume_held(self):
+        """
+        Soumet à nouveau les fichiers mis de côté faute de connexion (voir
+        `release`). Peut être appelée à chaque connexion : les fichiers en
+        attente ou en cours ne sont pas concernés.
+
+        Retourne
+        -------
+        int
+            Le nombre de fichiers soumis.
+        """
+        with self._lock:
+            entries = self.store.get_outbox_entries((HELD,))
+            for file_path, _, attempts, _ in entries:
+                self.store.save_outbox_entry(file_path, PENDING, attempts)
+        for file_path, _, _, _ in entries:
+            self._submit(file_path)
+        if entries:
+            logger.info("Resumed %s uploads held while disconnected.",
+                        len(entries))
+        return len(entries)
+
+    def _take_modified(self, file_path, entry):
+        """
+        Remet en attente un fichier signalé à nouveau pendant son
+        téléchargement, en gardant son nombre d'échecs. Doit être appelée
+        avec le verrou.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier.
+        entry : tuple or None
+            Son état enregistré, `(State, Attempts)`.
+
+        Retourne
+        -------
+        bool
+            True si le fichier doit être soumis à nouveau.
+        """
+        if file_path not in self._modified:
+            return False
+        self._modified.discard(file_path)
+        if entry is None:
+            return False
+        self.store.save_outbox_entry(file_path, PENDING, entry[1])
+        return True
+
+    def _run(self):
+        """
+        Boucle du thread des nouvelles tentatives : attend la prochaine
+        échéance et soumet les fichiers dont la tentative est échue.
+        """
+        while not self._stopping:
+            self._wakeup.clear()
+            with self._lock:
+                due = self.store.get_due_retries(time.time())
+                for file_path, attempts in due:
+                    self.store.save_outbox_entry(file_path, PENDING,
+                                                 attempts)
+            for file_path, _ in due:
+                self._submit(file_path)
+            next_time = self.store.get_next_retry_time()
+            timeout = None if next_time is None else max(
+                0.0, next_time - time.time())
+            self._wakeup.wait(timeout)
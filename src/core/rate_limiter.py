@@ -0,0 +1,193 @@
+"""
+Module de limitation du débit des téléchargements.
+
+Ce module fournit la classe RateLimiter qui plafonne le débit d'envoi de
+tous les threads de téléchargement avec des seaux à jetons (TokenBucket).
+Un seau global est partagé par tous les transferts, et des plafonds
+supplémentaires peuvent s'appliquer aux fichiers d'un répertoire surveillé
+ou d'une extension donnée. Les plafonds sont lus dans la configuration au
+démarrage.
+
+Chaque lecture réserve ses octets dans les seaux concernés et attend le
+temps nécessaire au remboursement de la dette éventuelle : l'envoi est
+réparti régulièrement au lieu d'alterner rafales et pauses.
+"""
+
+import os
+import threading
+import time
+
+from src.utils.file_names import file_extension, normalize_extension
+
+
+class TokenBucket:
+    """
+    Seau à jetons partagé entre threads.
+
+    Attributs
+    ---------
+    rate : float
+        Débit autorisé en octets par seconde (0 pour aucune limite).
+    burst : float
+        Nombre maximal d'octets accumulés pendant l'inactivité.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Initialise le seau, plein.
+
+        Paramètres
+        ----------
+        rate : float
+            Débit autorisé en octets par seconde (0 pour aucune limite).
+        burst : float, optional
+            Capacité du seau en octets. Par défaut, un dixième de seconde
+            de débit.
+        """
+        self._lock = threading.Lock()
+        self.rate = max(0.0, float(rate or 0))
+        self.burst = float(burst) if burst else self.rate / 10
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+
+    def reserve(self, amount):
+        """
+        Prélève des octets dans le seau, quitte à s'endetter.
+
+        Paramètres
+        ----------
+        amount : int
+            Le nombre d'octets envoyés.
+
+        Retourne
+        -------
+        float
+            Le délai en secondes à attendre avant l'envoi suivant.
+        """
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def _refill(self, now):
+        """
+        Ajoute les jetons accumulés depuis le dernier prélèvement. Doit
+        être appelée avec le verrou.
+        """
+        if self.rate > 0:
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+
+def throttle(buckets, amount):
+    """
+    Prélève des octets envoyés dans plusieurs seaux et attend le délai le
+    plus long.
+
+    Paramètres
+    ----------
+    buckets : list of TokenBucket
+        Les seaux à respecter.
+    amount : int
+        Le nombre d'octets envoyés.
+    """
+    delay = max((bucket.reserve(amount) for bucket in buckets), default=0)
+    if delay > 0:
+        time.sleep(delay)
+
+
+def is_limited(buckets):
+    """
+    Indique si l'un des seaux plafonne actuellement le débit.
+
+    Paramètres
+    ----------
+    buckets : list of TokenBucket
+        Les seaux à examiner.
+
+    Retourne
+    -------
+    bool
+        True si au moins un seau a un débit non nul.
+    """
+    return any(bucket.rate > 0 for bucket in buckets)
+
+
+class RateLimiter:
+    """
+    Ensemble des plafonds de débit appliqués aux téléchargements.
+
+    Attributs
+    ---------
+    global_bucket : TokenBucket
+        Seau partagé par tous les transferts.
+    """
+
+    def __init__(self, global_limit=0, extension_limits=None,
+                 root_limits=None):
+        """
+        Initialise les plafonds.
+
+        Paramètres
+        ----------
+        global_limit : float
+            Débit total autorisé en octets par seconde (0 pour aucune
+            limite).
+        extension_limits : dict, optional
+            Débits par extension, avec ou sans point et sans tenir compte
+            de la casse, sous la forme `{'.iso': octets/s}`.
+        root_limits : dict, optional
+            Débits par répertoire surveillé, sous la forme
+            `{chemin: octets/s}`.
+        """
+        self.global_bucket = TokenBucket(global_limit)
+        self._extensions = {}
+        for extension, rate in (extension_limits or {}).items():
+            if rate:
+                self._extensions[normalize_extension(extension)] = (
+                    TokenBucket(rate))
+        self._roots = {}
+        for root, rate in (root_limits or {}).items():
+            if rate:
+                root = os.path.expanduser(root)
+                self._roots[os.path.normcase(os.path.abspath(root))] = (
+                    TokenBucket(rate))
+
+    def buckets_for(self, file_path):
+        """
+        Retourne les seaux qui s'appliquent à un fichier.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier local.
+
+        Retourne
+        -------
+        list of TokenBucket
+            Le seau global, puis ceux de l'extension et du répertoire le
+            plus proche s'ils sont plafonnés.
+        """
+        buckets = [self.global_bucket]
+        if self._extensions:
+            bucket = self._extensions.get(file_extension(file_path))
+            if bucket is not None:
+                buckets.append(bucket)
+        if self._roots:
+            directory = os.path.normcase(
+                os.path.dirname(os.path.abspath(file_path)))
+            while True:
+                bucket = self._roots.get(directory)
+                if bucket is not None:
+                    buckets.append(bucket)
+                    break
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+        return buckets
@@ -0,0 +1,235 @@
+"""
+Module de rapprochement du répertoire surveillé.
+
+Ce module fournit la classe DirectoryReconciler qui parcourt le répertoire
+surveillé avec `os.scandir` et le compare à un instantané enregistré dans
+SQLite. Seuls les fichiers nouveaux ou modifiés depuis le passage précédent
+sont signalés, ce qui permet de rattraper les fichiers arrivés pendant que
+l'application était arrêtée ou que des événements ont été perdus. Les
+fichiers téléchargés après un événement de watchdog sont ajoutés à
+l'instantané par le WatchService et ne sont pas signalés à nouveau.
+
+Le premier passage sur un répertoire sans instantané l'enregistre sans
+signaler de fichier : les fichiers absents du serveur sont rattrapés par la
+comparaison aux listes distantes (voir WatchService.verify_remote_mirror).
+
+Le parcours est inséré par lots dans une table temporaire et la
+comparaison est faite en SQL : la mémoire utilisée ne dépend pas du nombre
+de fichiers du répertoire.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+
+class DirectoryReconciler:
+    """
+    Compare l'arborescence surveillée à son dernier instantané.
+
+    Attributs
+    ---------
+    db_path : str
+        Chemin de la base SQLite contenant l'instantané.
+    on_changed : callable
+        Fonction appelée avec le chemin de chaque fichier nouveau ou
+        modifié.
+    settle_seconds : float
+        Les fichiers modifiés plus récemment que ce délai sont laissés au
+        passage suivant, leur écriture pouvant être en cours.
+    """
+
+    def __init__(self, db_path, on_changed, settle_seconds=0.0):
+        """
+        Initialise le rapprochement.
+
+        Paramètres
+        ----------
+        db_path : str
+            Chemin de la base SQLite contenant l'instantané.
+        on_changed : callable
+            Fonction appelée avec le chemin de chaque fichier nouveau ou
+            modifié.
+        settle_seconds : float
+            Âge minimal en secondes d'un fichier pour être pris en compte.
+        """
+        self.db_path = db_path
+        self.on_changed = on_changed
+        self.settle_seconds = settle_seconds
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def stop(self):
+        """
+        Interrompt le passage en cours. L'instantané n'est pas modifié.
+        """
+        self._stop_event.set()
+
+    def scan(self, root):
+        """
+        Parcourt `root`, signale les fichiers nouveaux ou modifiés et met à
+        jour l'instantané. Sans instantané de `root`, le parcours est
+        enregistré sans signaler de fichier.
+
+        Paramètres
+        ----------
+        root : str
+            Le répertoire surveillé.
+
+        Retourne
+        -------
+        int
+            Le nombre de fichiers signalés, ou -1 si le passage a été
+            interrompu ou a échoué.
+        """
+        self._stop_event.clear()
+        with self._lock:
+            started = time.monotonic()
+            try:
+                changed = self._scan(root)
+            except sqlite3.Error as e:
+                logger.error("Error reconciling %s: %s", root, e)
+                return -1
+            if changed >= 0:
+                logger.info("Reconciliation of %s: %s new or modified files "
+                            "in %.1fs", root, changed,
+                            time.monotonic() - started)
+            return changed
+
+    def _scan(self, root):
+        """
+        Effectue un passage de rapprochement dans une transaction.
+        """
+        cutoff = time.time_ns() - int(self.settle_seconds * 1e9)
+        with closing(sqlite3.connect(self.db_path)) as connection:
+            connection.execute("PRAGMA cache_size = -65536")
+            connection.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS ScanEntries (
+                    Path TEXT PRIMARY KEY,
+                    FileSize INTEGER NOT NULL,
+                    MtimeNs INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            seeding = connection.execute(
+                "SELECT 1 FROM DirectorySnapshot WHERE Root = ? LIMIT 1",
+                (root,)
+            ).fetchone() is None
+            connection.execute("DELETE FROM temp.ScanEntries")
+            connection.executemany(
+                "INSERT OR IGNORE INTO temp.ScanEntries VALUES (?, ?, ?)",
+                self._walk(root, cutoff)
+            )
+            if self._stop_event.is_set():
+                connection.rollback()
+                return -1
+
+            changed_query = """
+                SELECT s.Path, s.FileSize, s.MtimeNs
+                FROM temp.ScanEntries s
+                LEFT JOIN DirectorySnapshot d ON d.Path = s.Path
+                WHERE d.Path IS NULL
+                   OR d.FileSize != s.FileSize
+                   OR d.MtimeNs != s.MtimeNs
+            """
+            changed = 0
+            if seeding:
+                logger.info("No snapshot of %s yet, recording it without "
+                            "reporting changes.", root)
+            else:
+                for (path, _, _) in connection.execute(changed_query):
+                    self.on_changed(path)
+                    changed += 1
+            # `on_changed` écrit dans la file durable par une autre
+            # connexion : la lecture est terminée pour que l'écriture de
+            # l'instantané ne parte pas d'une version périmée de la base.
+            connection.commit()
+
+            connection.execute(f"""
+                INSERT OR REPLACE INTO DirectorySnapshot
+                (Path, Root, FileSize, MtimeNs)
+                SELECT Path, ?, FileSize, MtimeNs FROM ({changed_query})
+            """, (root,))
+            connection.execute("""
+                DELETE FROM DirectorySnapshot
+                WHERE Root = ?
+                  AND Path NOT IN (SELECT Path FROM temp.ScanEntries)
+            """, (root,))
+            connection.execute("DELETE FROM temp.ScanEntries")
+            connection.commit()
+            return changed
+
+    def snapshot_entries(self, root, batch_size=10000):
+        """
+        Parcourt l'instantané enregistré de `root` par lots, sans garder de
+        transaction ouverte entre deux lots.
+
+        Paramètres
+        ----------
+        root : str
+            Le répertoire surveillé.
+        batch_size : int
+            Nombre d'entrées lues par requête.
+
+        Retourne
+        -------
+        generator of tuple
+            Des tuples `(path, size)`.
+        """
+        last_path = ''
+        while True:
+            with closing(sqlite3.connect(self.db_path)) as connection:
+                rows = connection.execute("""
+                    SELECT Path, FileSize FROM DirectorySnapshot
+                    WHERE Root = ? AND Path > ?
+                    ORDER BY Path LIMIT ?
+                """, (root, last_path, batch_size)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_path = rows[-1][0]
+
+    def _walk(self, root, cutoff):
+        """
+        Parcourt l'arborescence sans récursion et produit les fichiers
+        réguliers un par un.
+
+        Paramètres
+        ----------
+        root : str
+            Le répertoire à parcourir.
+        cutoff : int
+            Date de modification maximale (en nanosecondes) des fichiers
+            produits.
+
+        Retourne
+        -------
+        generator of tuple
+            Des tuples `(path, size, mtime_ns)`.
+        """
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if self._stop_event.is_set():
+                            return
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if stat.st_mtime_ns <= cutoff:
+                            yield (entry.path, stat.st_size,
+                                   stat.st_mtime_ns)
+            except OSError as e:
+                logger.error("Cannot scan %s: %s", directory, e)
@@ -0,0 +1,173 @@
+"""
+Module du cache des listes de fichiers distants.
+
+Ce module fournit la classe RemoteListingCache qui conserve, pour une durée
+limitée, le contenu des répertoires du serveur FTP obtenu avec MLSD (ou
+LIST lorsque le serveur ne connaît pas MLSD). Comparer des milliers de
+fichiers locaux au serveur ne coûte ainsi qu'une liste par répertoire
+distant au lieu d'une commande SIZE par fichier.
+"""
+
+import posixpath
+import threading
+import time
+from collections import namedtuple
+
+RemoteEntry = namedtuple('RemoteEntry', ['size', 'modify'])
+
+
+def parse_list_line(line):
+    """
+    Analyse une ligne de réponse LIST au format Unix ou DOS.
+
+    Paramètres
+    ----------
+    line : str
+        La ligne renvoyée par le serveur.
+
+    Retourne
+    -------
+    tuple or None
+        `(name, RemoteEntry)` pour un fichier, ou None pour un répertoire
+        ou une ligne non reconnue.
+    """
+    parts = line.split(None, 8)
+    if len(parts) == 9 and parts[0][:1] in '-dlbcps':
+        if parts[0][0] != '-':
+            return None
+        name, size = parts[8], parts[4]
+        modify = ' '.join(parts[5:8])
+    else:
+        parts = line.split(None, 3)
+        if len(parts) != 4 or parts[2].upper() == '<DIR>':
+            return None
+        name, size = parts[3], parts[2]
+        modify = ' '.join(parts[:2])
+    if not size.isdigit():
+        return None
+    return name, RemoteEntry(int(size), modify)
+
+
+class RemoteListingCache:
+    """
+    Cache des répertoires distants avec durée de validité.
+
+    Attributs
+    ---------
+    ftp_manager : FTPManager
+        Gestionnaire FTP utilisé pour lister les répertoires.
+    ttl : float
+        Durée de validité en secondes d'une liste en cache.
+    """
+
+    def __init__(self, ftp_manager, ttl=60.0):
+        """
+        Initialise le cache.
+
+        Paramètres
+        ----------
+        ftp_manager : FTPManager
+            Gestionnaire FTP utilisé pour lister les répertoires.
+        ttl : float
+            Durée de validité en secondes d'une liste en cache.
+        """
+        self.ftp_manager = ftp_manager
+        self.ttl = ttl
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def listing(self, remote_dir=''):
+        """
+        Retourne le contenu d'un répertoire distant, depuis le cache s'il
+        est encore valide.
+
+        Paramètres
+        ----------
+        remote_dir : str
+            Le répertoire distant ('' pour le répertoire courant).
+
+        Retourne
+        -------
+        dict
+            Les fichiers du répertoire, sous la forme
+            `{nom: RemoteEntry}`.
+
+        Lève
+        ----
+        ftplib.all_errors
+            Si le répertoire ne peut pas être listé.
+        """
+        with self._lock:
+            cached = self._listings.get(remote_dir)
+            if cached is not None and time.monotonic() < cached[0]:
+                return cached[1]
+        entries = self.ftp_manager.list_remote_directory(remote_dir)
+        with self._lock:
+            self._listings[remote_dir] = (time.monotonic() + self.ttl,
+                                          entries)
+        return entries
+
+    def invalidate(self, remote_dir=None):
+        """
+        Oublie la liste d'un répertoire, ou de tous les répertoires.
+
+        Paramètres
+        ----------
+        remote_dir : str, optional
+            Le répertoire à oublier. Si None, tout le cache est vidé.
+        """
+        with self._lock:
+            if remote_dir is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(remote_dir, None)
+
+    def update_entry(self, remote_path, size):
+        """
+        Met à jour l'entrée d'un fichier qui vient d'être téléchargé, si son
+        répertoire est en cache.
+
+        Paramètres
+        ----------
+        remote_path : str
+            Le chemin du fichier sur le serveur.
+        size : int
+            La taille du fichier téléchargé.
+        """
+        remote_dir, name = posixpath.split(remote_path)
+        with self._lock:
+            cached = self._listings.get(remote_dir)
+            if cached is not None:
+                cached[1][name] = RemoteEntry(size, None)
+
+    def diff(self, local_entries):
+        """
+        Compare des fichiers locaux au serveur et produit ceux qui y sont
+        absents ou dont la taille diffère. La taille d'un fichier envoyé
+        compressé n'est pas comparée.
+
+        Paramètres
+        ----------
+        local_entries : iterable of tuple
+            Des tuples `(local_path, size)`, par exemple l'instantané du
+            répertoire surveillé.
+
+        Retourne
+        -------
+        generator of str
+            Les chemins locaux à télécharger.
+
+        Lève
+        ----
+        ftplib.all_errors
+            Si un répertoire distant ne peut pas être listé.
+        """
+        for local_path, size in local_entries:
+            remote_path = self.ftp_manager.remote_path(local_path, size)
+            remote_dir, name = posixpath.split(remote_path)
+            entry = self.listing(remote_dir).get(name)
+            if entry is None:
+                yield local_path
+            elif (entry.size != size and self.ftp_manager.compression_for(
+                    local_path, size) is None):
+                yield local_path
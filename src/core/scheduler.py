@@ -0,0 +1,233 @@
+"""
+Module d'ordonnancement des téléchargements.
+
+Ce module fournit la classe UploadScheduler, la file de priorité des
+fichiers en attente de téléchargement. Chaque fichier reçoit un retard
+estimé à partir de sa classe (règles par chemin ou par extension) et de sa
+taille : un petit fichier passe devant les gros fichiers arrivés peu avant
+lui, mais aucun fichier ne peut être dépassé par un fichier arrivé plus de
+`max_wait` secondes après lui. Le vieillissement est ainsi garanti sans
+recalculer les priorités des fichiers en attente.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import Counter, namedtuple
+
+from src.utils.file_names import file_extension, normalize_extension
+from src.utils.metrics import record_phase
+
+SchedulingClass = namedtuple('SchedulingClass',
+                             ['name', 'priority', 'extensions', 'paths'])
+
+DEFAULT_CLASS = 'default'
+
+
+def build_classes(rules):
+    """
+    Construit les classes de priorité à partir de la configuration.
+
+    Paramètres
+    ----------
+    rules : list of dict
+        Des règles `{name, priority, extensions, paths}` ; `extensions` et
+        `paths` sont des listes facultatives.
+
+    Retourne
+    -------
+    list of SchedulingClass
+        Les classes, dans l'ordre des règles.
+    """
+    classes = []
+    for rule in rules or []:
+        extensions = frozenset(
+            normalize_extension(extension)
+            for extension in rule.get('extensions') or []
+        )
+        paths = tuple(
+            os.path.normcase(os.path.abspath(os.path.expanduser(path)))
+            for path in rule.get('paths') or []
+        )
+        classes.append(SchedulingClass(rule['name'],
+                                       int(rule.get('priority', 0)),
+                                       extensions, paths))
+    return classes
+
+
+class UploadScheduler:
+    """
+    File de priorité des fichiers à télécharger, partagée entre threads.
+
+    Attributs
+    ---------
+    classes : list of SchedulingClass
+        Les classes de priorité ; la première règle qui correspond à un
+        fichier détermine sa classe.
+    default_priority : int
+        Priorité des fichiers qui ne correspondent à aucune règle.
+    class_delay : float
+        Retard en secondes par niveau de priorité (0 est le plus urgent).
+    size_rate : float
+        Débit de référence en octets par seconde, qui convertit la taille
+        d'un fichier en retard.
+    max_wait : float
+        Retard maximal en secondes attribué à un fichier.
+    """
+
+    def __init__(self, classes=None, default_priority=1, class_delay=60.0,
+                 size_rate=10 * 1024 * 1024, max_wait=600.0):
+        """
+        Initialise une file vide.
+
+        Paramètres
+        ----------
+        classes : list of SchedulingClass, optional
+            Les classes de priorité.
+        default_priority : int
+            Priorité des fichiers qui ne correspondent à aucune règle.
+        class_delay : float
+            Retard en secondes par niveau de priorité.
+        size_rate : float
+            Débit de référence en octets par seconde.
+        max_wait : float
+            Retard maximal en secondes attribué à un fichier.
+        """
+        self.classes = classes or []
+        self.default_priority = default_priority
+        self.class_delay = class_delay
+        self.size_rate = size_rate
+        self.max_wait = max_wait
+        self._heap = []
+        self._sequence = itertools.count()
+        self._depths = Counter()
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def classify(self, file_path):
+        """
+        Retourne la classe et la priorité d'un fichier.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier.
+
+        Retourne
+        -------
+        tuple
+            `(name, priority)`.
+        """
+        extension = file_extension(file_path)
+        path = os.path.normcase(os.path.abspath(file_path))
+        for scheduling_class in self.classes:
+            if extension in scheduling_class.extensions:
+                return scheduling_class.name, scheduling_class.priority
+            for root in scheduling_class.paths:
+                if path.startswith(root.rstrip(os.sep) + os.sep):
+                    return scheduling_class.name, scheduling_class.priority
+        return DEFAULT_CLASS, self.default_priority
+
+    def put(self, file_path):
+        """
+        Ajoute un fichier à la file.
+
+        Paramètres
+        ----------
+        file_path : str
+            Le chemin du fichier.
+        """
+        name, priority = self.classify(file_path)
+        try:
+            size = os.stat(file_path).st_size
+        except OSError:
+            size = 0
+        delay = priority * self.class_delay + size / self.size_rate
+        now = time.monotonic()
+        deadline = now + min(delay, self.max_wait)
+        with self._condition:
+            heapq.heappush(self._heap, (deadline, next(self._sequence),
+                                        name, file_path, now))
+            self._depths[name] += 1
+            self._condition.notify()
+
+    def get(self):
+        """
+        Retire le fichier le plus prioritaire, en attendant qu'il y en ait
+        un. Le temps passé par le fichier dans la file est enregistré comme
+        phase `queue_wait` (voir src.utils.metrics).
+
+        Retourne
+        -------
+        str or None
+            Le chemin du fichier, ou None si la file est fermée et vide.
+        """
+        with self._condition:
+            while not self._heap:
+                if self._closed:
+                    return None
+                self._condition.wait()
+            _, _, name, file_path, queued_at = heapq.heappop(self._heap)
+            self._depths[name] -= 1
+            if not self._depths[name]:
+                del self._depths[name]
+        record_phase('queue_wait', time.monotonic() - queued_at)
+        return file_path
+
+    def close(self, discard=False):
+        """
+        Ferme la file : `get` retourne None une fois les fichiers restants
+        servis.
+
+        Paramètres
+        ----------
+        discard : bool
+            Si True, les fichiers restants sont retirés de la file au lieu
+            d'être servis.
+
+        Retourne
+        -------
+        int
+            Le nombre de fichiers retirés.
+        """
+        with self._condition:
+            discarded = len(self._heap) if discard else 0
+            if discard:
+                self._heap.clear()
+                self._depths.clear()
+            self._closed = True
+            self._condition.notify_all()
+        return discarded
+
+    def reopen(self):
+        """
+        Rouvre une file fermée.
+        """
+        with self._condition:
+            self._closed = False
+
+    def qsize(self):
+        """
+        Retourne le nombre de fichiers en attente.
+
+        Retourne
+        -------
+        int
+            Nombre de fichiers dans la file.
+        """
+        with self._condition:
+            return len(self._heap)
+
+    def depths(self):
+        """
+        Retourne le nombre de fichiers en attente par classe.
+
+        Retourne
+        -------
+        dict
+            `{classe: nombre de fichiers}`.
+        """
+        with self._condition:
+            return dict(self._depths)
@@ -0,0 +1,351 @@
+"""
+Module de la file de transfert FTP.
+
+Ce module fournit la classe TransferQueue qui découple la détection des
+fichiers de leur téléchargement : le gestionnaire d'événements se contente
+d'ajouter les chemins à une file, et un nombre borné de threads de travail
+effectue les transferts. Chaque thread emprunte sa propre connexion au pool
+du gestionnaire FTP partagé.
+
+Les fichiers en attente sont servis dans l'ordre fixé par un
+UploadScheduler, et non dans leur ordre d'arrivée. Si une TransferOutbox
+est fournie, chaque fichier y est enregistré jusqu'à la fin de son
+téléchargement, et les échecs y sont réessayés.
+
+Chaque téléchargement met à jour les métriques du processus (voir
+src.utils.metrics) : durée de ses phases, octets envoyés, classe d'erreur
+et nombre de téléchargements en cours.
+"""
+
+import logging
+import os
+import threading
+import time
+from src.core.scheduler import UploadScheduler
+from src.utils.metrics import (
+    begin_transfer, end_transfer, metrics, record_phase, transfer_phases
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TransferQueue:
+    """
+    File de transferts servie par un groupe borné de threads de travail.
+
+    Attributs
+    ---------
+    worker_count : int
+        Nombre de threads de travail.
+    ftp_manager : FTPManager
+        Gestionnaire FTP partagé, dont le pool fournit une connexion à
+        chaque thread.
+    on_result : callable
+        Fonction appelée avec `(file_path, success, file_size, duration_ms,
+        compressed_size)` après chaque transfert.
+    on_uploaded : callable
+        Fonction appelée avec le chemin et le `os.stat_result` (pris avant
+        l'envoi) d'un fichier présent sur le serveur, téléchargé ou ignoré
+        car inchangé, ou None.
+    dedup_index : DedupIndex
+        Index des fichiers déjà téléchargés, ou None pour tout télécharger.
+    outbox : TransferOutbox
+        File durable des téléchargements, ou None.
+    pending : UploadScheduler
+        File de priorité des chemins en attente de téléchargement.
+    workers : list of threading.Thread
+        Threads de travail démarrés.
+    """
+
+    def __init__(self, worker_count, ftp_manager, on_result,
+                 dedup_index=None, scheduler=None, outbox=None,
+                 on_uploaded=None):
+        """
+        Initialise la file de transfert.
+
+        Paramètres
+        ----------
+        worker_count : int
+            Nombre de threads de travail (au moins 1).
+        ftp_manager : FTPManager
+            Gestionnaire FTP partagé par les threads de travail. Son pool
+            doit pouvoir ouvrir `worker_count` connexions.
+        on_result : callable
+            Fonction appelée avec `(file_path, success, file_size,
+            duration_ms, compressed_size)` après chaque transfert, depuis le
+            thread de travail. La taille vaut None si le fichier n'a pas pu
+            être lu, et la taille compressée si le fichier a été envoyé tel
+            quel.
+        dedup_index : DedupIndex, optional
+            Index consulté pour ignorer les fichiers inchangés depuis leur
+            dernier téléchargement.
+        scheduler : UploadScheduler, optional
+            File de priorité des fichiers en attente. Par défaut, une file
+            sans classes de priorité.
+        outbox : TransferOutbox, optional
+            File durable des téléchargements et des nouvelles tentatives.
+        on_uploaded : callable, optional
+            Fonction appelée avec `(file_path, stat)` pour chaque fichier
+            téléchargé ou ignoré car inchangé, depuis le thread de travail.
+        """
+        self.worker_count = max(1, int(worker_count))
+        self.ftp_manager = ftp_manager
+        self.on_result = on_result
+        self.dedup_index = dedup_index
+        self.outbox = outbox
+        self.on_uploaded = on_uploaded
+        if scheduler is None:
+            scheduler = UploadScheduler()
+        self.pending = scheduler
+        self.workers = []
+
+    def start(self):
+        """
+        Démarre les threads de travail s'ils ne sont pas déjà démarrés,
+        après avoir soumis à nouveau les fichiers de la file durable qui
+        n'étaient pas téléchargés lors du dernier arrêt.
+        """
+        if self.workers:
+            return
+        self.pending.reopen()
+        if self.outbox is not None:
+            self.outbox.start(self.pending.put)
+            self.outbox.resume()
+        for index in range(self.worker_count):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"ftp-upload-{index}",
+                daemon=True
+            )
+            worker.start()
+            self.workers.append(worker)
+
+    def enqueue(self, file_path):
+        """
+        Ajoute un fichier à la file de téléchargement.
+
+        Paramètres
+        ----------
+        file_path : str
+            Chemin du fichier à télécharger.
+        """
+        if self.outbox is None or self.outbox.add(file_path):
+            self.pending.put(file_path)
+
+    def resume_held(self):
+        """
+        Soumet à nouveau les fichiers mis de côté faute de connexion au
+        serveur FTP.
+
+        Retourne
+        -------
+        int
+            Le nombre de fichiers soumis.
+        """
+        if self.outbox is None:
+            return 0
+        return self.outbox.resume_held()
+
+    def qsize(self):
+        """
+        Retourne le nombre approximatif de fichiers en attente.
+
+        Retourne
+        -------
+        int
+            Nombre de fichiers dans la file.
+        """
+        return self.pending.qsize()
+
+    def depths(self):
+        """
+        Retourne le nombre de fichiers en attente par classe de priorité.
+
+        Retourne
+        -------
+        dict
+            `{classe: nombre de fichiers}`.
+        """
+        return self.pending.depths()
+
+    def stop(self, wait=True):
+        """
+        Arrête les threads de travail. Avec une file durable, les fichiers
+        en attente y restent enregistrés et sont retirés de la file : seuls
+        les téléchargements en cours sont attendus. Sans file durable, la
+        file est d'abord vidée.
+
+        Paramètres
+        ----------
+        wait : bool
+            Si True, attend la fin des threads de travail.
+        """
+        if self.outbox is not None:
+            self.outbox.stop()
+        discarded = self.pending.close(discard=self.outbox is not None)
+        if discarded:
+            logger.info("%s pending uploads left in the outbox for the next "
+                        "start.", discarded)
+        if wait:
+            for worker in self.workers:
+                worker.join()
+        self.workers = []
+
+    def _worker_loop(self):
+        """
+        Boucle d'un thread de travail : dépile les fichiers et les
+        télécharge avec une connexion empruntée au pool.
+        """
+        while True:
+            # Les phases mesurées à partir d'ici, dont l'attente dans la
+            # file, sont attribuées au prochain fichier.
+            begin_transfer()
+            file_path = self.pending.get()
+            if file_path is None:
+                break
+            metrics.inc('file_watcher_uploads_in_flight')
+            try:
+                self._process(file_path)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # Une erreur imprévue ne doit pas arrêter le thread : le
+                # fichier est compté comme échoué et la boucle continue.
+                logger.exception("Unexpected error while uploading %s.",
+                                 file_path)
+                self._fail_unexpected(file_path, e)
+            finally:
+                metrics.inc('file_watcher_uploads_in_flight', -1)
+                end_transfer()
+
+    def _fail_unexpected(self, file_path, error):
+        """
+        Enregistre dans la file durable l'échec d'un fichier dont le
+        traitement a levé une exception imprévue.
+
+        Paramètres
+        ----------
+        file_path : str
+            Chemin du fichier.
+        error : Exception
+            L'exception levée.
+        """
+        if self.outbox is None:
+            return
+        try:
+            self.outbox.fail(file_path, str(error) or type(error).__name__)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Cannot record the failure of %s.", file_path)
+
+    def _process(self, file_path):
+        """
+        Télécharge un fichier, sauf s'il a disparu ou s'il est identique à
+        un téléchargement réussi vers le même chemin distant, et met à jour
+        son état dans la file durable.
+
+        Paramètres
+        ----------
+        file_path : str
+            Chemin du fichier à télécharger.
+        """
+        outbox = self.outbox
+        if outbox is not None:
+            if self.ftp_manager.pool is None:
+                # Sans serveur configuré, la tentative ne compte pas : le
+                # fichier sera soumis à nouveau à la connexion.
+                logger.warning("FTP server is not configured, %s kept "
+                               "pending.", file_path)
+                outbox.release(file_path)
+                if self.ftp_manager.pool is not None:
+                    # Connecté entre-temps : `resume_held` a pu passer
+                    # avant la mise de côté.
+                    outbox.resume_held()
+                return
+            outbox.begin(file_path)
+        if not os.path.exists(file_path):
+            logger.info("File %s no longer exists, upload dropped.", file_path)
+            if outbox is not None:
+                outbox.discard(file_path)
+            return
+        try:
+            stat = os.stat(file_path)
+            file_size = stat.st_size
+        except OSError:
+            stat = file_size = None
+        fingerprint = None
+        remote_path = self.ftp_manager.remote_path(file_path)
+        if self.dedup_index is not None:
+            unchanged, fingerprint = self.dedup_index.check(file_path,
+                                                            remote_path)
+            if unchanged:
+                logger.info("File %s unchanged, upload skipped.", file_path)
+                if outbox is not None:
+                    outbox.complete(file_path)
+                self._uploaded(file_path, stat)
+                return
+        stats = {}
+        started = time.monotonic()
+        success = self.ftp_manager.upload_to_ftp(file_path, stats)
+        elapsed = time.monotonic() - started
+        duration_ms = int(elapsed * 1000)
+        self._record_metrics(file_path, success, elapsed, file_size, stats)
+        if success and fingerprint is not None:
+            self.dedup_index.record(file_path, remote_path, fingerprint)
+        if success:
+            self._uploaded(file_path, stat)
+        if outbox is not None:
+            if success:
+                outbox.complete(file_path)
+            else:
+                outbox.fail(file_path, stats.get('error', "Upload failed"))
+        self.on_result(file_path, success, file_size, duration_ms,
+                       stats.get('compressed_size'))
+
+    def _uploaded(self, file_path, stat):
+        """
+        Signale à `on_uploaded` un fichier présent sur le serveur.
+
+        Paramètres
+        ----------
+        file_path : str
+            Chemin du fichier.
+        stat : os.stat_result or None
+            Les informations du fichier prises avant l'envoi, ou None si
+            elles n'ont pas pu être lues.
+        """
+        if self.on_uploaded is not None and stat is not None:
+            self.on_uploaded(file_path, stat)
+
+    @staticmethod
+    def _record_metrics(file_path, success, elapsed, file_size, stats):
+        """
+        Met à jour les métriques après un téléchargement et journalise la
+        durée de ses phases.
+
+        Paramètres
+        ----------
+        file_path : str
+            Chemin du fichier.
+        success : bool
+            Indique si le téléchargement a réussi.
+        elapsed : float
+            Durée de l'appel à `upload_to_ftp`, en secondes.
+        file_size : int or None
+            Taille du fichier en octets.
+        stats : dict
+            Les informations retournées par `upload_to_ftp`.
+        """
+        phases = transfer_phases()
+        # La phase d'envoi est le reste de l'appel, une fois la connexion
+        # obtenue.
+        record_phase('transfer', max(0.0, elapsed - phases.get('connect', 0)))
+        if success:
+            metrics.inc('file_watcher_uploads_total', result='success')
+            metrics.inc('file_watcher_upload_bytes_total',
+                        stats.get('compressed_size') or file_size or 0)
+        else:
+            metrics.inc('file_watcher_uploads_total', result='failure')
+            metrics.inc('file_watcher_upload_errors_total',
+                        error_class=stats.get('error_class', 'UploadError'))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Upload of %s (%s bytes): %s", file_path, file_size,
+                         ', '.join(f"{phase} {seconds * 1000:.1f} ms"
+                                   for phase, seconds in phases.items()))
@@ -0,0 +1,474 @@
+"""
+Module du service de surveillance et de téléchargement.
+
+Ce module contient la classe WatchService qui assemble la chaîne de
+traitement sans interface graphique : l'observateur watchdog, le
+stabilisateur d'écriture, le rapprochement périodique du répertoire, la
+file de transfert et ses threads de téléchargement, et l'enregistrement de
+l'historique. Il n'importe ni PyQt5 ni tkinter ; la fenêtre FileWatcher et
+le démon sans interface (voir src.daemon) l'utilisent tous deux. Si la
+section `metrics` de config.yaml l'active, le service expose aussi les
+métriques du processus sur un point d'accès HTTP local.
+"""
+
+import logging
+import os
+import threading
+from ftplib import all_errors
+
+from watchdog.events import FileSystemEventHandler
+
+from src.core.dedup_index import DedupIndex
+from src.core.ftp_manager import create_ftp_manager
+from src.core.outbox import TransferOutbox
+from src.core.reconciler import DirectoryReconciler
+from src.core.scheduler import DEFAULT_CLASS, UploadScheduler, build_classes
+from src.core.transfer_queue import TransferQueue
+from src.core.write_stabilizer import WriteStabilizer
+from src.database.db_manager import db_manager
+from src.utils.config import get_setting
+from src.utils.metrics import MetricsServer, metrics
+
+logger = logging.getLogger(__name__)
+
+
+class WatchService:
+    """
+    Surveille un répertoire et télécharge ses nouveaux fichiers vers le
+    serveur FTP.
+
+    Attributs
+    ---------
+    ftp_manager : FTPManager
+        Gestionnaire des connexions et des transferts FTP.
+    transfer_queue : TransferQueue
+        File des fichiers à télécharger, servie par des threads de travail.
+    write_stabilizer : WriteStabilizer
+        Étape qui attend la fin de l'écriture d'un fichier avant de
+        l'ajouter à `transfer_queue`.
+    reconciler : DirectoryReconciler
+        Compare périodiquement le répertoire surveillé à son dernier
+        instantané pour rattraper les fichiers manqués.
+    directory : str
+        Chemin du répertoire local surveillé.
+    observer : Observer
+        Observateur pour surveiller les changements de fichiers.
+    timer : threading.Timer
+        Timer du prochain rapprochement du répertoire surveillé.
+    on_result : callable
+        Fonction appelée avec `(file_path, success)` après chaque
+        transfert, depuis un thread de travail.
+    metrics_server : MetricsServer
+        Le point d'accès des métriques, ou None s'il n'est pas activé.
+    """
+
+    def __init__(self, on_result=None, on_dead_letter=None):
+        """
+        Construit la chaîne de traitement sans démarrer ses threads.
+
+        Paramètres
+        ----------
+        on_result : callable, optional
+            Fonction appelée avec `(file_path, success)` après chaque
+            transfert, depuis un thread de travail.
+        on_dead_letter : callable, optional
+            Fonction appelée avec le chemin d'un fichier abandonné après
+            toutes ses tentatives et sa dernière erreur.
+        """
+        upload_workers = int(get_setting('app', 'upload_workers', 4))
+        self.ftp_manager = create_ftp_manager(pool_size=upload_workers,
+                                              offset_store=db_manager)
+        dedup_index = None
+        if get_setting('app', 'deduplicate', True):
+            dedup_index = DedupIndex(db_manager)
+        scheduler = UploadScheduler(
+            build_classes(get_setting('scheduler', 'classes', [])),
+            default_priority=int(
+                get_setting('scheduler', 'default_priority', 1)),
+            class_delay=float(get_setting('scheduler', 'class_delay', 60)),
+            size_rate=float(
+                get_setting('scheduler', 'size_rate', 10 * 1024 * 1024)),
+            max_wait=float(get_setting('scheduler', 'max_wait', 600))
+        )
+        outbox = TransferOutbox(
+            db_manager,
+            max_retries=int(get_setting('app', 'max_retries', 3)),
+            base_delay=float(get_setting('app', 'retry_base_delay', 30)),
+            max_delay=float(get_setting('app', 'retry_max_delay', 3600)),
+            on_dead_letter=on_dead_letter
+        )
+        self.transfer_queue = TransferQueue(
+            self.ftp_manager.concurrency, self.ftp_manager,
+            self.handle_transfer_result,
+            dedup_index=dedup_index, scheduler=scheduler, outbox=outbox,
+            on_uploaded=self.snapshot_uploaded
+        )
+        self.write_stabilizer = WriteStabilizer(
+            self.enqueue_upload,
+            quiet_period=float(get_setting('app', 'stabilize_seconds', 2)),
+            poll_interval=float(get_setting('app', 'stabilize_poll', 0.5))
+        )
+        self.reconciler = DirectoryReconciler(
+            db_manager.db_path, self.enqueue_upload,
+            settle_seconds=float(get_setting('app', 'stabilize_seconds', 2))
+        )
+        self.check_interval = float(get_setting('app', 'check_interval', 10))
+        self.on_result = on_result
+        self.mirror_check_pending = False
+        self.directory = None
+        self.observer = None
+        self.timer = None
+        self.metrics_server = None
+        metrics.set_callback('file_watcher_queue_depth', self.queue_depths,
+                             label='class')
+
+    def start(self):
+        """
+        Démarre l'écriture de l'historique, les threads de téléchargement,
+        le stabilisateur d'écriture et, s'il est activé, le point d'accès
+        des métriques.
+        """
+        db_manager.recorder.start()
+        self.transfer_queue.start()
+        self.write_stabilizer.start()
+        if get_setting('metrics', 'enabled', False):
+            server = MetricsServer(
+                host=str(get_setting('metrics', 'host', '127.0.0.1')),
+                port=int(get_setting('metrics', 'port', 9464))
+            )
+            try:
+                server.start()
+                self.metrics_server = server
+            except OSError as e:
+                logger.error("Cannot start the metrics endpoint: %s", e)
+
+    def queue_depths(self):
+        """
+        Retourne le nombre de fichiers en attente pour chaque classe de
+        priorité, y compris les classes vides.
+
+        Retourne
+        -------
+        dict
+            `{classe: nombre de fichiers}`.
+        """
+        depths = dict.fromkeys(
+            [scheduling_class.name
+             for scheduling_class in self.transfer_queue.pending.classes]
+            + [DEFAULT_CLASS], 0)
+        depths.update(self.transfer_queue.depths())
+        return depths
+
+    def connect(self, ftp_server, ftp_user, ftp_password):
+        """
+        Se connecte au serveur FTP, reprend les téléchargements mis de
+        côté faute de connexion et planifie la comparaison du répertoire
+        surveillé au serveur.
+
+        Paramètres
+        ----------
+        ftp_server : str
+            L'adresse du serveur FTP.
+        ftp_user : str
+            Le nom d'utilisateur pour la connexion FTP.
+        ftp_password : str
+            Le mot de passe pour la connexion FTP.
+
+        Retourne
+        -------
+        bool
+            True si la connexion est établie avec succès, False sinon.
+        """
+        if not self.ftp_manager.setup_ftp(ftp_server, ftp_user, ftp_password):
+            return False
+        self.transfer_queue.resume_held()
+        if self.directory:
+            self.mirror_check_pending = True
+            self.schedule_reconciliation(0)
+        return True
+
+    def start_watching(self, directory):
+        """
+        Démarre la surveillance d'un répertoire et planifie un premier
+        rapprochement immédiat.
+
+        Paramètres
+        ----------
+        directory : str
+            Chemin du répertoire local à surveiller.
+        """
+        # Import local : le choix du backend de watchdog est coûteux.
+        from watchdog.observers import Observer
+
+        self._stop_observer()
+        self.directory = directory
+        event_handler = MyHandler(self)
+        self.observer = Observer()
+        self.observer.schedule(
+            event_handler, self.directory, recursive=True
+        )
+        self.observer.start()
+        self.mirror_check_pending = True
+        self.schedule_reconciliation(0)
+
+    def schedule_reconciliation(self, delay):
+        """
+        Planifie le prochain rapprochement du répertoire surveillé.
+
+        Paramètres
+        ----------
+        delay : float
+            Délai en secondes avant le rapprochement.
+        """
+        if self.timer:
+            self.timer.cancel()
+        self.timer = threading.Timer(delay, self.check_for_new_files)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def check_for_new_files(self):
+        """
+        Rapproche le répertoire surveillé de son dernier instantané et
+        ajoute les fichiers nouveaux ou modifiés à la file de transfert,
+        puis planifie le passage suivant après `app.check_interval`
+        secondes. Le premier passage après une connexion compare aussi
+        l'instantané au serveur.
+        """
+        directory = self.directory
+        if directory and self.ftp_manager.pool is not None:
+            logger.info("Vérification des nouveaux fichiers...")
+            self.reconciler.scan(directory)
+            if self.mirror_check_pending:
+                self.mirror_check_pending = False
+                self.verify_remote_mirror(directory)
+        if directory == self.directory:
+            self.schedule_reconciliation(self.check_interval)
+
+    def verify_remote_mirror(self, directory):
+        """
+        Compare l'instantané du répertoire surveillé aux listes des
+        répertoires distants et ajoute à la file les fichiers absents du
+        serveur ou dont la taille diffère.
+
+        Paramètres
+        ----------
+        directory : str
+            Chemin du répertoire local surveillé.
+        """
+        remote_cache = self.ftp_manager.remote_cache
+        dedup_index = self.transfer_queue.dedup_index
+        remote_cache.invalidate()
+        missing = 0
+        try:
+            entries = self.reconciler.snapshot_entries(directory)
+            for file_path in remote_cache.diff(entries):
+                if dedup_index is not None:
+                    dedup_index.forget(self.ftp_manager.remote_path(file_path))
+                self.enqueue_upload(file_path)
+                missing += 1
+        except all_errors as e:
+            logger.error("Remote mirror check failed: %s", e)
+            return
+        logger.info("Remote mirror check: %s files missing on the server.",
+                    missing)
+
+    def _stop_observer(self):
+        """
+        Arrête l'observateur et le rapprochement périodique en cours.
+        """
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        self.reconciler.stop()
+
+    def stop(self):
+        """
+        Arrête la surveillance du répertoire, annule le timer, arrête les
+        threads de transfert et écrit l'historique en attente.
+        """
+        self._stop_observer()
+        self.write_stabilizer.stop()
+        self.transfer_queue.stop()
+        self.ftp_manager.close()
+        db_manager.recorder.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+    def enqueue_upload(self, file_path):
+        """
+        Ajoute le fichier spécifié à la file de téléchargement. Le transfert
+        est effectué par un thread de travail de `transfer_queue`.
+
+        Paramètres
+        ----------
+        file_path : str
+            Chemin du fichier à télécharger.
+        """
+        self.transfer_queue.enqueue(file_path)
+
+    def snapshot_uploaded(self, file_path, stat):
+        """
+        Ajoute un fichier présent sur le serveur à l'instantané du
+        répertoire surveillé, pour que le rapprochement suivant ne le
+        soumette pas à nouveau.
+
+        Paramètres
+        ----------
+        file_path : str
+            Chemin du fichier téléchargé.
+        stat : os.stat_result
+            Les informations du fichier prises avant l'envoi.
+        """
+        directory = self.directory
+        if not directory:
+            return
+        root = os.path.join(directory, '')
+        if not file_path.startswith(root):
+            return
+        db_manager.save_snapshot_entry(file_path, directory, stat.st_size,
+                                       stat.st_mtime_ns)
+
+    def handle_transfer_result(self, file_path, success, file_size=None,
+                               duration_ms=None, compressed_size=None):
+        """
+        Enregistre le résultat d'un transfert et le transmet à `on_result`.
+
+        Paramètres
+        ----------
+        file_path : str
+            Chemin du fichier transféré.
+        success : bool
+            Indique si le transfert a réussi.
+        file_size : int, optional
+            Taille du fichier en octets.
+        duration_ms : int, optional
+            Durée du transfert en millisecondes.
+        compressed_size : int, optional
+            Taille envoyée en octets, si le fichier a été compressé.
+        """
+        self.record_transfer(file_path, success, file_size, duration_ms,
+                             compressed_size)
+        if self.on_result is not None:
+            self.on_result(file_path, success)
+
+    @staticmethod
+    def record_transfer(file_path, success, file_size=None,
+                        duration_ms=None, compressed_size=None):
+        """
+        Transmet le résultat du transfert au thread d'écriture de
+        l'historique, qui l'enregistre par lots dans la base de données.
+
+        Paramètres
+        ----------
+        file_path : str
+            Chemin du fichier transféré.
+        success : bool
+            Indique si le transfert a réussi.
+        file_size : int, optional
+            Taille du fichier en octets.
+        duration_ms : int, optional
+            Durée du transfert en millisecondes.
+        compressed_size : int, optional
+            Taille envoyée en octets, si le fichier a été compressé.
+        """
+        status = 'Success' if success else 'Failure'
+        db_manager.record_transfer(os.path.basename(file_path),
+                                   status=status, file_size=file_size,
+                                   duration_ms=duration_ms,
+                                   compressed_size=compressed_size)
+
+
+class MyHandler(FileSystemEventHandler):
+    """
+    Gestionnaire d'événements pour surveiller les modifications du
+    système de fichiers.
+
+    Les événements sont transmis au stabilisateur d'écriture du
+    WatchService, qui ajoute chaque fichier à la file de transfert une fois
+    son écriture terminée.
+
+    Attributs
+    ---------
+    file_watcher : WatchService
+        Le service dont le stabilisateur reçoit les événements.
+    """
+
+    def __init__(self, file_watcher):
+        """
+        Initialise le gestionnaire d'événements.
+
+        Paramètres
+        ----------
+        file_watcher : WatchService
+            Le service dont le stabilisateur reçoit les événements.
+        """
+        self.file_watcher = file_watcher
+
+    def on_created(self, event):
+        """
+        Appelé lorsqu'un nouveau fichier est créé dans le répertoire surveillé.
+
+        Paramètres
+        ----------
+        event : FileSystemEvent
+            L'événement de création de fichier.
+        """
+        if not event.is_directory:
+            logger.info("Nouveau fichier détecté : %s", event.src_path)
+            self.file_watcher.write_stabilizer.touch(event.src_path)
+
+    def on_modified(self, event):
+        """
+        Appelé lorsqu'un fichier du répertoire surveillé est modifié.
+
+        Paramètres
+        ----------
+        event : FileSystemEvent
+            L'événement de modification de fichier.
+        """
+        if not event.is_directory:
+            self.file_watcher.write_stabilizer.touch(event.src_path)
+
+    def on_closed(self, event):
+        """
+        Appelé lorsqu'un fichier ouvert en écriture est fermé (inotify
+        uniquement).
+
+        Paramètres
+        ----------
+        event : FileSystemEvent
+            L'événement de fermeture de fichier.
+        """
+        if not event.is_directory:
+            self.file_watcher.write_stabilizer.mark_closed(event.src_path)
+
+    def on_moved(self, event):
+        """
+        Appelé lorsqu'un fichier est renommé ou déplacé. Le fichier est
+        suivi sous son nouveau nom.
+
+        Paramètres
+        ----------
+        event : FileSystemEvent
+            L'événement de déplacement de fichier.
+        """
+        if not event.is_directory:
+            self.file_watcher.write_stabilizer.discard(event.src_path)
+            self.file_watcher.write_stabilizer.touch(event.dest_path)
+
+    def on_deleted(self, event):
+        """
+        Appelé lorsqu'un fichier est supprimé avant la fin de son écriture.
+
+        Paramètres
+        ----------
+        event : FileSystemEvent
+            L'événement de suppression de fichier.
+        """
+        if not event.is_directory:
+            self.file_watcher.write_stabilizer.discard(event.src_path)
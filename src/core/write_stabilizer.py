@@ -0,0 +1,194 @@
+"""
+Module de détection de fin d'écriture des fichiers.
+
+Ce module fournit la classe WriteStabilizer qui s'intercale entre les
+événements du système de fichiers et la file de transfert. Les événements
+de création, de modification et de fermeture sont regroupés par chemin, et
+un fichier n'est transmis qu'une fois son écriture terminée : soit lorsque
+sa taille et sa date de modification n'ont pas changé pendant une période
+de calme, soit dès qu'une fermeture après écriture est signalée.
+"""
+
+import os
+import threading
+import time
+
+
+class _PendingFile:
+    """
+    État d'un fichier en cours d'écriture.
+    """
+    __slots__ = ('size', 'mtime_ns', 'last_change', 'closed')
+
+    def __init__(self, now):
+        self.size = None
+        self.mtime_ns = None
+        self.last_change = now
+        self.closed = False
+
+
+class WriteStabilizer:
+    """
+    Regroupe les événements par fichier et signale chaque fichier une seule
+    fois, lorsque son écriture est terminée.
+
+    Attributs
+    ---------
+    on_ready : callable
+        Fonction appelée avec le chemin d'un fichier dont l'écriture est
+        terminée, depuis le thread de surveillance.
+    quiet_period : float
+        Durée en secondes pendant laquelle la taille et la date de
+        modification doivent rester inchangées.
+    poll_interval : float
+        Intervalle en secondes entre deux vérifications des fichiers en
+        attente.
+    """
+
+    def __init__(self, on_ready, quiet_period=2.0, poll_interval=0.5):
+        """
+        Initialise le stabilisateur.
+
+        Paramètres
+        ----------
+        on_ready : callable
+            Fonction appelée avec le chemin d'un fichier terminé.
+        quiet_period : float
+            Durée de calme en secondes avant de considérer un fichier
+            comme terminé.
+        poll_interval : float
+            Intervalle en secondes entre deux vérifications.
+        """
+        self.on_ready = on_ready
+        self.quiet_period = quiet_period
+        self.poll_interval = poll_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def touch(self, path):
+        """
+        Signale une création ou une modification du fichier. Le délai de
+        calme du fichier repart de zéro.
+
+        Paramètres
+        ----------
+        path : str
+            Chemin du fichier concerné.
+        """
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending.get(path)
+            if pending is None:
+                self._pending[path] = _PendingFile(now)
+            else:
+                pending.last_change = now
+                pending.closed = False
+
+    def mark_closed(self, path):
+        """
+        Signale la fermeture du fichier après écriture. Le fichier est
+        transmis à la prochaine vérification sans attendre le délai de calme.
+
+        Paramètres
+        ----------
+        path : str
+            Chemin du fichier concerné.
+        """
+        with self._lock:
+            pending = self._pending.get(path)
+            if pending is None:
+                pending = self._pending[path] = _PendingFile(time.monotonic())
+            pending.closed = True
+
+    def discard(self, path):
+        """
+        Oublie un fichier supprimé ou renommé avant la fin de son écriture.
+
+        Paramètres
+        ----------
+        path : str
+            Chemin du fichier concerné.
+        """
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def pending_count(self):
+        """
+        Retourne le nombre de fichiers en cours d'écriture.
+
+        Retourne
+        -------
+        int
+            Nombre de fichiers en attente de stabilisation.
+        """
+        with self._lock:
+            return len(self._pending)
+
+    def start(self):
+        """
+        Démarre le thread de surveillance s'il n'est pas déjà démarré.
+        """
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="write-stabilizer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Arrête le thread de surveillance. Les fichiers encore en cours
+        d'écriture ne sont pas transmis.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """
+        Boucle du thread de surveillance.
+        """
+        while not self._stop_event.wait(self.poll_interval):
+            for path in self._collect_ready():
+                self.on_ready(path)
+
+    def _collect_ready(self):
+        """
+        Vérifie les fichiers en attente et retire ceux dont l'écriture est
+        terminée.
+
+        Retourne
+        -------
+        list of str
+            Chemins des fichiers prêts à être téléchargés.
+        """
+        with self._lock:
+            candidates = list(self._pending.items())
+        ready = []
+        now = time.monotonic()
+        for path, pending in candidates:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.discard(path)
+                continue
+            with self._lock:
+                if self._pending.get(path) is not pending:
+                    continue
+                if (stat.st_size, stat.st_mtime_ns) != (pending.size,
+                                                        pending.mtime_ns):
+                    first_stat = pending.size is None
+                    pending.size = stat.st_size
+                    pending.mtime_ns = stat.st_mtime_ns
+                    if not first_stat:
+                        pending.last_change = now
+                        continue
+                if (pending.closed
+                        or now - pending.last_change >= self.quiet_period):
+                    del self._pending[path]
+                    ready.append(path)
+        return ready
@@ -0,0 +1,117 @@
+"""
+Démon de surveillance sans interface graphique.
+
+Ce module lance le WatchService sans charger PyQt5 ni tkinter, pour les
+serveurs sans affichage. Le répertoire surveillé et le serveur FTP sont lus
+dans config.yaml (`paths.watched_directory`, `ftp.server`, `ftp.user`), le
+mot de passe dans la variable d'environnement FTP_PASSWORD ou, à défaut,
+dans `ftp.password`. Les messages sont journalisés avec `logging` (section
+`logging` de config.yaml). Exemple :
+
+    python -m src.daemon --directory /srv/depot
+
+Le démon s'arrête proprement sur SIGINT ou SIGTERM : les téléchargements
+en attente restent dans la file durable et sont repris au démarrage
+suivant.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import threading
+
+from src.core.watch_service import WatchService
+from src.utils.config import get_setting
+from src.utils.logging_setup import configure_logging
+
+logger = logging.getLogger('src.daemon')
+
+
+def connect_with_retry(service, stop_event):
+    """
+    Se connecte au serveur FTP configuré, en réessayant avec un délai
+    croissant jusqu'au succès ou à l'arrêt du démon.
+
+    Paramètres
+    ----------
+    service : WatchService
+        Le service à connecter.
+    stop_event : threading.Event
+        L'événement signalant l'arrêt du démon.
+
+    Retourne
+    -------
+    bool
+        True si la connexion est établie, False si le démon s'arrête avant.
+    """
+    server = get_setting('ftp', 'server')
+    user = get_setting('ftp', 'user')
+    password = os.environ.get('FTP_PASSWORD',
+                              get_setting('ftp', 'password', ''))
+    delay = float(get_setting('app', 'retry_base_delay', 30))
+    max_delay = float(get_setting('app', 'retry_max_delay', 3600))
+    while not service.connect(server, user, password):
+        logger.warning("Cannot connect to %s, retrying in %.0fs.",
+                       server, delay)
+        if stop_event.wait(delay):
+            return False
+        delay = min(delay * 2, max_delay)
+    return True
+
+
+def main(argv=None):
+    """
+    Point d'entrée du démon.
+
+    Paramètres
+    ----------
+    argv : list of str, optional
+        Les arguments de la ligne de commande. Par défaut, `sys.argv`.
+
+    Retourne
+    -------
+    int
+        Le code de sortie du processus.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m src.daemon',
+        description="Surveille un répertoire et télécharge ses nouveaux "
+                    "fichiers vers le serveur FTP, sans interface graphique."
+    )
+    parser.add_argument('--directory',
+                        default=get_setting('paths', 'watched_directory'),
+                        help="répertoire à surveiller (par défaut, "
+                             "paths.watched_directory)")
+    parser.add_argument('--log-level', default=None,
+                        help="niveau de journalisation (par défaut, "
+                             "logging.level)")
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level)
+
+    if not args.directory:
+        parser.error("no directory to watch")
+    directory = os.path.abspath(os.path.expanduser(args.directory))
+    if not os.path.isdir(directory):
+        logger.error("Watched directory %s does not exist.", directory)
+        return 1
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    service = WatchService()
+    service.start()
+    try:
+        service.start_watching(directory)
+        logger.info("Watching %s.", directory)
+        if connect_with_retry(service, stop_event):
+            stop_event.wait()
+    finally:
+        logger.info("Stopping.")
+        service.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
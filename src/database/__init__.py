@@ -5,5 +5,6 @@ File Watcher FTP.
 """
 
 from .db_manager import DBManager, db_manager
+from .history_recorder import HistoryRecorder
 
-__all__ = ['DBManager', 'db_manager']
+__all__ = ['DBManager', 'db_manager', 'HistoryRecorder']
@@ -6,27 +6,47 @@ Il fournit des fonctionnalités pour initialiser la base de données,
 enregistrer les transferts de fichiers et récupérer l'historique des
 transferts. Le module utilise un fichier de configuration YAML pour
 définir le chemin de la base de données.
+
+Les transferts sont écrits par un unique thread (voir HistoryRecorder) qui
+les valide par lots. Les lectures utilisent une connexion persistante par
+thread, en mode WAL, et le schéma est mis à jour par des migrations
+versionnées (voir migrations.py).
+
+Importer ce module n'ouvre pas la base : la configuration est lue, le
+répertoire de la base créé et les migrations appliquées lors de la
+première utilisation de `db_manager`.
 """
 
+import logging
 import os
 import sqlite3
+import threading
 from datetime import datetime
-import yaml
+from src.database.history_recorder import HistoryRecorder
+from src.database.migrations import migrate
+from src.utils.config import get_setting
+
+logger = logging.getLogger(__name__)
 
+DEFAULT_DB_PATH = './data/TransferHistory.db'
 
-def load_config():
+
+def get_db_path():
     """
-    Charge la configuration depuis le fichier config.yaml.
+    Retourne le chemin de la base de données configuré.
 
     Returns:
-        dict: Le contenu du fichier de configuration.
+        str: Le chemin absolu du réglage `paths.database`.
     """
-    with open('config.yaml', 'r', encoding='utf-8') as config_file:
-        return yaml.safe_load(config_file)
+    return os.path.abspath(os.path.expanduser(
+        get_setting('paths', 'database', DEFAULT_DB_PATH)))
 
 
-config = load_config()
-DB_PATH = os.path.abspath(config['paths']['database'])
+def __getattr__(name):
+    # DB_PATH reste disponible, mais n'est calculé qu'au premier accès.
+    if name == 'DB_PATH':
+        return db_manager.db_path
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class DBManager:
@@ -42,77 +62,151 @@ class DBManager:
     def __init__(self):
         """
         Initialise une nouvelle instance de DBManager.
+
+        Aucune base n'est ouverte : la base est initialisée lors du premier
+        appel qui en a besoin. Les connexions sont ouvertes à la demande,
+        une par thread, et conservées pour les appels suivants.
         """
-        self.connection = None
-        self.cursor = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._path = None
+        self._recorder = None
 
-    def connect(self):
+    @property
+    def db_path(self):
+        """
+        str: Le chemin absolu de la base. Le premier accès crée son
+        répertoire et applique les migrations du schéma.
+        """
+        if self._path is None:
+            with self._lock:
+                if self._path is None:
+                    self._path = self._initialize(get_db_path())
+        return self._path
+
+    @property
+    def recorder(self):
+        """
+        HistoryRecorder: Le thread d'écriture de l'historique, créé au
+        premier accès.
+        """
+        if self._recorder is None:
+            db_path = self.db_path
+            with self._lock:
+                if self._recorder is None:
+                    self._recorder = HistoryRecorder(
+                        db_path,
+                        batch_size=int(
+                            get_setting('history', 'batch_size', 200)),
+                        flush_interval=float(get_setting(
+                            'history', 'flush_interval_ms', 500)) / 1000,
+                        synchronous=str(
+                            get_setting('history', 'synchronous', 'NORMAL'))
+                    )
+        return self._recorder
+
+    def _initialize(self, db_path):
         """
-        Établit une connexion à la base de données SQLite.
+        Crée le répertoire de la base et applique les migrations.
+
+        Args:
+            db_path (str): Le chemin absolu de la base.
+
+        Returns:
+            str: `db_path`, même si l'initialisation a échoué ; l'erreur
+            est journalisée et les appels suivants échoueront à leur tour.
         """
         try:
-            self.connection = sqlite3.connect(DB_PATH)
-            self.cursor = self.connection.cursor()
-            print(f"Connected to the database at {DB_PATH}")
-        except sqlite3.Error as e:
-            print(f"Error connecting to database: {e}")
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            connection = self._open(db_path)
+            self._local.connection = connection
+            migrate(connection)
+            logger.info("Database initialized successfully.")
+        except (OSError, sqlite3.Error) as e:
+            logger.error("Error initializing database: %s", e)
+        return db_path
+
+    @staticmethod
+    def _open(db_path):
+        """
+        Ouvre une connexion SQLite en mode WAL.
+
+        Args:
+            db_path (str): Le chemin de la base.
+
+        Returns:
+            sqlite3.Connection: La nouvelle connexion.
+        """
+        connection = sqlite3.connect(db_path, timeout=30)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        logger.info("Connected to the database at %s", db_path)
+        return connection
+
+    def connect(self):
+        """
+        Retourne la connexion SQLite du thread courant, en l'ouvrant en
+        mode WAL lors du premier appel.
+
+        Returns:
+            sqlite3.Connection: La connexion propre au thread courant.
+
+        Raises:
+            sqlite3.Error: Si la base ne peut pas être ouverte.
+        """
+        db_path = self.db_path
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._open(db_path)
+            self._local.connection = connection
+        return connection
 
     def close(self):
         """
-        Ferme la connexion à la base de données si elle est ouverte.
+        Ferme la connexion du thread courant si elle est ouverte.
         """
-        if self.connection:
-            self.cursor.close()
-            self.connection.close()
-            print("Database connection closed.")
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+            logger.info("Database connection closed.")
 
     def initialize_database(self):
         """
-        Initialise la structure de la base de données en créant la table
-        nécessaire.
+        Initialise la structure de la base de données en appliquant les
+        migrations du schéma qui n'ont pas encore été appliquées. Elles le
+        sont aussi automatiquement à la première utilisation de la base.
         """
-        self.connect()
         try:
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS FileTransfers (
-                    ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                    FileName TEXT NOT NULL,
-                    TransferDate TEXT NOT NULL,
-                    Status TEXT NOT NULL
-                )
-            """)
-            self.connection.commit()
-            print("Database initialized successfully.")
+            migrate(self.connect())
+            logger.info("Database initialized successfully.")
         except sqlite3.Error as e:
-            print(f"Error initializing database: {e}")
-        finally:
-            self.close()
+            logger.error("Error initializing database: %s", e)
 
-    def record_transfer(self, file_name, transfer_date=None, status="Success"):
+    def record_transfer(self, file_name, transfer_date=None, status="Success",
+                        file_size=None, duration_ms=None,
+                        compressed_size=None):
         """
         Enregistre un transfert de fichier dans la base de données.
 
+        L'enregistrement est transmis au thread d'écriture, qui le valide
+        avec les suivants ; utiliser `self.recorder.flush()` pour attendre
+        sa validation.
+
         Args:
             file_name (str): Le nom du fichier transféré.
             transfer_date (str, optional): La date et l'heure du transfert.
             Si None, utilise la date actuelle.
             status (str, optional): Le statut du transfert.
             Par défaut "Success".
+            file_size (int, optional): La taille du fichier en octets.
+            duration_ms (int, optional): La durée du transfert en
+            millisecondes.
+            compressed_size (int, optional): La taille envoyée en octets, si
+            le fichier a été compressé.
         """
-        self.connect()
-        try:
-            if transfer_date is None:
-                transfer_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.cursor.execute("""
-                INSERT INTO FileTransfers (FileName, TransferDate, Status)
-                VALUES (?, ?, ?)
-            """, (file_name, transfer_date, status))
-            self.connection.commit()
-            print(f"Transfer recorded: {file_name} at {transfer_date}")
-        except sqlite3.Error as e:
-            print(f"Error recording transfer: {e}")
-        finally:
-            self.close()
+        self.recorder.record(file_name, status, transfer_date, file_size,
+                             duration_ms, compressed_size)
 
     def get_transfer_history(self, start_date=None, end_date=None,
                              status=None, limit=None):
@@ -132,7 +226,6 @@ class DBManager:
             list of dict: Liste des transferts correspondant aux
             critères spécifiés.
         """
-        self.connect()
         try:
             query = "SELECT * FROM FileTransfers"
             conditions = []
@@ -155,25 +248,442 @@ class DBManager:
             if conditions:
                 query += " WHERE " + " AND ".join(conditions)
 
-            query += " ORDER BY TransferDate DESC"
+            query += " ORDER BY TransferDate DESC, ID DESC"
 
             if limit:
-                query += f" LIMIT {limit}"
+                query += " LIMIT ?"
+                params.append(int(limit))
 
-            self.cursor.execute(query, params)
-            results = self.cursor.fetchall()
+            cursor = self.connect().execute(query, params)
+            results = cursor.fetchall()
 
             # Convert results to a list of dictionaries for easier use
-            columns = [column[0] for column in self.cursor.description]
+            columns = [column[0] for column in cursor.description]
             return [dict(zip(columns, row)) for row in results]
         except sqlite3.Error as e:
-            print(f"Error retrieving transfer history: {e}")
+            logger.error("Error retrieving transfer history: %s", e)
+            return []
+
+    def get_history_page(self, start_key=None, limit=500, inclusive=False):
+        """
+        Récupère une page de l'historique, du plus récent au plus ancien,
+        par pagination sur la clé `(TransferDate, ID)`.
+
+        Contrairement à OFFSET, le coût d'une page ne dépend pas de sa
+        position dans l'historique grâce à l'index sur TransferDate.
+
+        Args:
+            start_key (tuple, optional): La clé `(TransferDate, ID)` à
+            partir de laquelle lire. Si None, lit depuis le transfert le
+            plus récent.
+            limit (int, optional): Nombre maximum de lignes à retourner.
+            inclusive (bool, optional): Si True, la ligne de clé
+            `start_key` est incluse dans la page.
+
+        Returns:
+            list of tuple: Les lignes `(ID, FileName, TransferDate, Status)`.
+        """
+        query = "SELECT ID, FileName, TransferDate, Status FROM FileTransfers"
+        params = []
+        if start_key is not None:
+            operator = "<=" if inclusive else "<"
+            query += f" WHERE (TransferDate, ID) {operator} (?, ?)"
+            params.extend(start_key)
+        query += " ORDER BY TransferDate DESC, ID DESC LIMIT ?"
+        params.append(int(limit))
+        try:
+            return self.connect().execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error retrieving transfer history: %s", e)
+            return []
+
+    def get_last_transfer_id(self):
+        """
+        Retourne le plus grand identifiant de l'historique des transferts.
+
+        Returns:
+            int: L'identifiant du dernier transfert enregistré, ou 0.
+        """
+        try:
+            row = self.connect().execute(
+                "SELECT MAX(ID) FROM FileTransfers"
+            ).fetchone()
+            return row[0] or 0
+        except sqlite3.Error as e:
+            logger.error("Error retrieving transfer history: %s", e)
+            return 0
+
+    def get_history_since(self, last_id, limit=1000):
+        """
+        Récupère les transferts enregistrés après un identifiant donné, dans
+        l'ordre d'enregistrement. La requête ne parcourt que la fin de la
+        clé primaire.
+
+        Args:
+            last_id (int): Le plus grand identifiant déjà connu.
+            limit (int, optional): Nombre maximum de lignes à retourner.
+
+        Returns:
+            list of tuple: Les lignes `(ID, FileName, TransferDate, Status)`.
+        """
+        try:
+            return self.connect().execute("""
+                SELECT ID, FileName, TransferDate, Status FROM FileTransfers
+                WHERE ID > ? ORDER BY ID LIMIT ?
+            """, (int(last_id), int(limit))).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error retrieving transfer history: %s", e)
+            return []
+
+    def get_rollups(self, granularity="hour", limit=48):
+        """
+        Récupère les agrégats de l'historique les plus récents, sans
+        parcourir FileTransfers.
+
+        Args:
+            granularity (str, optional): "hour" ou "day".
+            limit (int, optional): Nombre maximum de périodes à retourner.
+
+        Returns:
+            list of tuple: Les lignes `(Bucket, Successes, Failures, Bytes,
+            DurationMs, TimedTransfers, SuccessDurationMs)`, de la plus
+            récente à la plus ancienne.
+        """
+        try:
+            return self.connect().execute("""
+                SELECT Bucket, Successes, Failures, Bytes, DurationMs,
+                       TimedTransfers, SuccessDurationMs
+                FROM TransferRollups WHERE Granularity = ?
+                ORDER BY Bucket DESC LIMIT ?
+            """, (granularity, int(limit))).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error retrieving transfer statistics: %s", e)
+            return []
+
+    def get_failure_hotspots(self, since_day, limit=20):
+        """
+        Récupère les extensions de fichiers qui échouent le plus depuis une
+        date donnée.
+
+        Args:
+            since_day (str): Premier jour pris en compte (AAAA-MM-JJ).
+            limit (int, optional): Nombre maximum d'extensions à retourner.
+
+        Returns:
+            list of tuple: Les lignes `(Extension, Failures)`, par nombre
+            d'échecs décroissant.
+        """
+        try:
+            return self.connect().execute("""
+                SELECT Extension, SUM(Failures) AS Total
+                FROM FailureHotspots WHERE Day >= ?
+                GROUP BY Extension ORDER BY Total DESC LIMIT ?
+            """, (since_day, int(limit))).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error retrieving transfer statistics: %s", e)
+            return []
+
+    def get_resume_offset(self, remote_path, local_path, file_size,
+                          mtime_ns):
+        """
+        Retourne le dernier décalage confirmé d'un téléchargement
+        interrompu, s'il concerne la même version du fichier local.
+
+        Un enregistrement qui correspond à une autre version du fichier
+        (taille ou date de modification différente) est supprimé.
+
+        Args:
+            remote_path (str): Le chemin du fichier sur le serveur.
+            local_path (str): Le chemin du fichier local.
+            file_size (int): La taille actuelle du fichier local.
+            mtime_ns (int): La date de modification du fichier local, en
+            nanosecondes.
+
+        Returns:
+            int or None: Le décalage enregistré, ou None si aucun
+            téléchargement de cette version n'a été interrompu.
+        """
+        try:
+            connection = self.connect()
+            with connection:
+                row = connection.execute("""
+                    SELECT LocalPath, FileSize, MtimeNs, Offset
+                    FROM ResumableUploads WHERE RemotePath = ?
+                """, (remote_path,)).fetchone()
+                if row is None:
+                    return None
+                if tuple(row[:3]) == (local_path, file_size, mtime_ns):
+                    return row[3]
+                connection.execute(
+                    "DELETE FROM ResumableUploads WHERE RemotePath = ?",
+                    (remote_path,))
+                return None
+        except sqlite3.Error as e:
+            logger.error("Error reading resume offset: %s", e)
+            return None
+
+    def save_resume_offset(self, remote_path, local_path, file_size,
+                           mtime_ns, offset):
+        """
+        Enregistre le décalage confirmé par le serveur pour un
+        téléchargement en cours.
+
+        Args:
+            remote_path (str): Le chemin du fichier sur le serveur.
+            local_path (str): Le chemin du fichier local.
+            file_size (int): La taille du fichier local.
+            mtime_ns (int): La date de modification du fichier local, en
+            nanosecondes.
+            offset (int): Le nombre d'octets déjà présents sur le serveur.
+        """
+        updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute("""
+                    INSERT OR REPLACE INTO ResumableUploads
+                    (RemotePath, LocalPath, FileSize, MtimeNs, Offset,
+                     UpdatedAt)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (remote_path, local_path, file_size, mtime_ns, offset,
+                      updated_at))
+        except sqlite3.Error as e:
+            logger.error("Error saving resume offset: %s", e)
+
+    def clear_resume_offset(self, remote_path):
+        """
+        Supprime l'enregistrement de reprise d'un téléchargement terminé.
+
+        Args:
+            remote_path (str): Le chemin du fichier sur le serveur.
+        """
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute(
+                    "DELETE FROM ResumableUploads WHERE RemotePath = ?",
+                    (remote_path,))
+        except sqlite3.Error as e:
+            logger.error("Error clearing resume offset: %s", e)
+
+    def get_outbox_entry(self, local_path):
+        """
+        Retourne l'état d'un fichier dans la file durable des
+        téléchargements.
+
+        Args:
+            local_path (str): Le chemin du fichier local.
+
+        Returns:
+            tuple or None: `(State, Attempts)`, ou None si le fichier n'est
+            pas dans la file.
+        """
+        try:
+            return self.connect().execute("""
+                SELECT State, Attempts FROM TransferOutbox
+                WHERE LocalPath = ?
+            """, (local_path,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Error reading transfer outbox: %s", e)
+            return None
+
+    def save_outbox_entry(self, local_path, state, attempts=0,
+                          next_attempt_at=0.0, last_error=None):
+        """
+        Enregistre l'état d'un fichier dans la file durable des
+        téléchargements.
+
+        Args:
+            local_path (str): Le chemin du fichier local.
+            state (str): "pending", "in_flight", "retry" ou "dead".
+            attempts (int, optional): Nombre de tentatives échouées.
+            next_attempt_at (float, optional): Date (horodatage Unix) de la
+            prochaine tentative, pour l'état "retry".
+            last_error (str, optional): La dernière erreur rencontrée.
+        """
+        updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute("""
+                    INSERT OR REPLACE INTO TransferOutbox
+                    (LocalPath, State, Attempts, NextAttemptAt, LastError,
+                     UpdatedAt)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (local_path, state, attempts, next_attempt_at,
+                      last_error, updated_at))
+        except sqlite3.Error as e:
+            logger.error("Error saving transfer outbox: %s", e)
+
+    def delete_outbox_entry(self, local_path):
+        """
+        Retire un fichier de la file durable des téléchargements.
+
+        Args:
+            local_path (str): Le chemin du fichier local.
+        """
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute(
+                    "DELETE FROM TransferOutbox WHERE LocalPath = ?",
+                    (local_path,))
+        except sqlite3.Error as e:
+            logger.error("Error updating transfer outbox: %s", e)
+
+    def get_outbox_entries(self, states):
+        """
+        Retourne les fichiers de la file durable dans les états donnés.
+
+        Args:
+            states (iterable of str): Les états recherchés.
+
+        Returns:
+            list of tuple: Les lignes `(LocalPath, State, Attempts,
+            NextAttemptAt)`, par date de prochaine tentative.
+        """
+        states = list(states)
+        placeholders = ", ".join("?" * len(states))
+        try:
+            return self.connect().execute(f"""
+                SELECT LocalPath, State, Attempts, NextAttemptAt
+                FROM TransferOutbox WHERE State IN ({placeholders})
+                ORDER BY NextAttemptAt
+            """, states).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error reading transfer outbox: %s", e)
             return []
-        finally:
-            self.close()
+
+    def get_due_retries(self, now):
+        """
+        Retourne les fichiers dont la prochaine tentative est échue.
+
+        Args:
+            now (float): L'horodatage Unix courant.
+
+        Returns:
+            list of tuple: Les lignes `(LocalPath, Attempts)`.
+        """
+        try:
+            return self.connect().execute("""
+                SELECT LocalPath, Attempts FROM TransferOutbox
+                WHERE State = 'retry' AND NextAttemptAt <= ?
+                ORDER BY NextAttemptAt
+            """, (now,)).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error reading transfer outbox: %s", e)
+            return []
+
+    def get_next_retry_time(self):
+        """
+        Retourne la date de la prochaine tentative programmée.
+
+        Returns:
+            float or None: L'horodatage Unix de la prochaine tentative, ou
+            None si aucune n'est programmée.
+        """
+        try:
+            return self.connect().execute("""
+                SELECT MIN(NextAttemptAt) FROM TransferOutbox
+                WHERE State = 'retry'
+            """).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error("Error reading transfer outbox: %s", e)
+            return None
+
+    def get_latest_upload(self, remote_path):
+        """
+        Retourne l'empreinte du dernier téléchargement réussi vers un chemin
+        distant, quel que soit le fichier local envoyé : c'est le contenu
+        présent sur le serveur.
+
+        Args:
+            remote_path (str): Le chemin du fichier sur le serveur.
+
+        Returns:
+            tuple or None: `(LocalPath, FileSize, MtimeNs, Digest)`, ou None
+            si aucun téléchargement vers ce chemin n'est enregistré.
+        """
+        try:
+            connection = self.connect()
+            # UploadedAt est à la seconde : à égalité, la ligne la plus
+            # récemment écrite a le plus grand rowid.
+            return connection.execute("""
+                SELECT LocalPath, FileSize, MtimeNs, Digest
+                FROM UploadIndex WHERE RemotePath = ?
+                ORDER BY UploadedAt DESC, rowid DESC LIMIT 1
+            """, (remote_path,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Error reading upload index: %s", e)
+            return None
+
+    def save_upload_index(self, local_path, remote_path, file_size,
+                          mtime_ns, digest):
+        """
+        Enregistre l'empreinte d'un fichier téléchargé avec succès.
+
+        Args:
+            local_path (str): Le chemin du fichier local.
+            remote_path (str): Le chemin du fichier sur le serveur.
+            file_size (int): La taille du fichier.
+            mtime_ns (int): La date de modification du fichier, en
+            nanosecondes.
+            digest (str): L'empreinte du contenu.
+        """
+        uploaded_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute("""
+                    INSERT OR REPLACE INTO UploadIndex
+                    (LocalPath, RemotePath, FileSize, MtimeNs, Digest,
+                     UploadedAt)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (local_path, remote_path, file_size, mtime_ns, digest,
+                      uploaded_at))
+        except sqlite3.Error as e:
+            logger.error("Error saving upload index: %s", e)
+
+    def delete_upload_index(self, remote_path):
+        """
+        Oublie les téléchargements enregistrés vers un chemin distant, par
+        exemple lorsque le fichier a disparu du serveur.
+
+        Args:
+            remote_path (str): Le chemin du fichier sur le serveur.
+        """
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute(
+                    "DELETE FROM UploadIndex WHERE RemotePath = ?",
+                    (remote_path,))
+        except sqlite3.Error as e:
+            logger.error("Error deleting upload index: %s", e)
+
+    def save_snapshot_entry(self, path, root, file_size, mtime_ns):
+        """
+        Enregistre dans l'instantané du répertoire surveillé un fichier
+        téléchargé, pour que le rapprochement suivant ne le signale pas à
+        nouveau.
+
+        Args:
+            path (str): Le chemin du fichier local.
+            root (str): Le répertoire surveillé qui le contient.
+            file_size (int): La taille du fichier téléchargé.
+            mtime_ns (int): Sa date de modification, en nanosecondes.
+        """
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute("""
+                    INSERT OR REPLACE INTO DirectorySnapshot
+                    (Path, Root, FileSize, MtimeNs)
+                    VALUES (?, ?, ?, ?)
+                """, (path, root, file_size, mtime_ns))
+        except sqlite3.Error as e:
+            logger.error("Error saving directory snapshot: %s", e)
 
 
-# Initialiser le gestionnaire de base de données
+# Gestionnaire partagé ; la base est initialisée à sa première utilisation
 db_manager = DBManager()
-# Assurez-vous que la base de données est initialisée
-db_manager.initialize_database()
@@ -0,0 +1,384 @@
+"""
+Module d'enregistrement groupé de l'historique des transferts.
+
+Ce module fournit la classe HistoryRecorder : un thread unique qui écrit
+l'historique des transferts dans SQLite. Les transferts lui sont transmis
+par une file et sont validés par lots (tous les N enregistrements ou toutes
+les T millisecondes), en mode WAL, ce qui évite une synchronisation disque
+par fichier et toute contention entre les threads de téléchargement.
+
+Dans la même transaction, l'écrivain met à jour les agrégats par heure et
+par jour (TransferRollups) et le décompte des échecs par extension
+(FailureHotspots), de sorte que les statistiques se lisent sans parcourir
+FileTransfers.
+"""
+
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import closing
+from datetime import datetime
+
+from src.utils.file_names import file_extension
+from src.utils.metrics import metrics, record_phase
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class HistoryRecorder:
+    """
+    Écrivain unique de la table FileTransfers.
+
+    Attributs
+    ---------
+    db_path : str
+        Chemin de la base SQLite.
+    batch_size : int
+        Nombre maximal d'enregistrements validés en une transaction.
+    flush_interval : float
+        Délai maximal en secondes avant la validation d'un lot incomplet.
+    synchronous : str
+        Valeur de `PRAGMA synchronous` utilisée par l'écrivain.
+    max_retries : int
+        Nombre de nouvelles tentatives d'un lot refusé par une erreur
+        passagère (base verrouillée, par exemple).
+    retry_delay : float
+        Délai en secondes avant la première nouvelle tentative ; il double
+        à chaque échec.
+    error : Exception
+        L'erreur qui a arrêté le thread d'écriture, ou None.
+    """
+
+    def __init__(self, db_path, batch_size=200, flush_interval=0.5,
+                 synchronous='NORMAL', max_retries=3, retry_delay=0.5):
+        """
+        Initialise l'écrivain sans démarrer son thread.
+
+        Paramètres
+        ----------
+        db_path : str
+            Chemin de la base SQLite.
+        batch_size : int
+            Nombre maximal d'enregistrements par transaction.
+        flush_interval : float
+            Délai maximal en secondes avant la validation d'un lot.
+        synchronous : str
+            Valeur de `PRAGMA synchronous` (OFF, NORMAL, FULL ou EXTRA).
+        max_retries : int
+            Nombre de nouvelles tentatives d'un lot après une erreur
+            passagère.
+        retry_delay : float
+            Délai en secondes avant la première nouvelle tentative.
+        """
+        self.db_path = db_path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous
+        self.max_retries = max(0, int(max_retries))
+        self.retry_delay = retry_delay
+        self.error = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Démarre le thread d'écriture s'il n'est pas déjà démarré. Les
+        enregistrements en attente sont validés à la fin du programme.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="history-recorder", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def record(self, file_name, status, transfer_date=None, file_size=None,
+               duration_ms=None, compressed_size=None):
+        """
+        Ajoute un transfert à la file d'écriture.
+
+        Paramètres
+        ----------
+        file_name : str
+            Le nom du fichier transféré.
+        status : str
+            Le statut du transfert ('Success' ou 'Failure').
+        transfer_date : str, optional
+            La date et l'heure du transfert. Si None, utilise la date
+            actuelle.
+        file_size : int, optional
+            La taille du fichier en octets, si elle est connue.
+        duration_ms : int, optional
+            La durée du transfert en millisecondes, si elle est connue.
+        compressed_size : int, optional
+            La taille envoyée en octets, si le fichier a été compressé.
+        """
+        if self.error is not None:
+            # Le thread d'écriture s'est arrêté : la file ne serait jamais
+            # vidée.
+            return
+        if transfer_date is None:
+            transfer_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.start()
+        self._queue.put((file_name, transfer_date, status, file_size,
+                         duration_ms, compressed_size))
+
+    def flush(self, timeout=None):
+        """
+        Attend que tous les enregistrements transmis avant l'appel soient
+        validés.
+
+        Paramètres
+        ----------
+        timeout : float, optional
+            Délai d'attente maximal en secondes.
+
+        Retourne
+        -------
+        bool
+            True si les enregistrements ont été validés avant le délai,
+            False si le délai est dépassé ou si le thread d'écriture s'est
+            arrêté sur une erreur (voir `error`).
+        """
+        thread = self._thread
+        if thread is None:
+            return True
+        if self.error is not None:
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.1 if deadline is None else min(
+                0.1, max(0.0, deadline - time.monotonic()))
+            if done.wait(wait):
+                return self.error is None
+            if not thread.is_alive():
+                return done.is_set() and self.error is None
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self):
+        """
+        Valide les enregistrements en attente et arrête le thread
+        d'écriture.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join()
+
+    def _open(self):
+        """
+        Ouvre la connexion de l'écrivain en mode WAL.
+
+        Retourne
+        -------
+        sqlite3.Connection
+            La connexion configurée.
+        """
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute(f"PRAGMA synchronous = {self.synchronous}")
+        return connection
+
+    def _run(self):
+        """
+        Boucle du thread d'écriture : regroupe les enregistrements et les
+        valide par lots. Si la base ne peut pas être ouverte, l'erreur est
+        enregistrée dans `error`, les appels de `flush` en attente sont
+        libérés et les enregistrements suivants sont perdus.
+        """
+        try:
+            with closing(self._open()) as connection:
+                stopping = False
+                while not stopping:
+                    rows, waiters, stopping = self._next_batch()
+                    if rows:
+                        self._commit(connection, rows)
+                    for waiter in waiters:
+                        waiter.set()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.exception("History writer stopped, transfers are no "
+                             "longer recorded: %s", e)
+            self.error = e
+            self._release_waiters()
+
+    def _release_waiters(self):
+        """
+        Vide la file d'un thread d'écriture arrêté et signale les appels de
+        `flush` qui y attendent.
+        """
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _next_batch(self):
+        """
+        Attend le premier enregistrement puis collecte les suivants jusqu'à
+        `batch_size` enregistrements ou `flush_interval` secondes.
+
+        Retourne
+        -------
+        tuple
+            `(rows, waiters, stopping)` : les lignes à insérer, les
+            événements de `flush` à signaler, et True si l'arrêt a été
+            demandé.
+        """
+        rows, waiters = [], []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is _STOP:
+                return rows, waiters, True
+            if isinstance(item, threading.Event):
+                # Un flush valide immédiatement le lot en cours.
+                waiters.append(item)
+                return rows, waiters, False
+            rows.append(item)
+            if len(rows) >= self.batch_size:
+                return rows, waiters, False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return rows, waiters, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return rows, waiters, False
+
+    @staticmethod
+    def _rollups(rows):
+        """
+        Agrège un lot d'enregistrements par heure, par jour et, pour les
+        échecs, par jour et par extension.
+
+        Paramètres
+        ----------
+        rows : list of tuple
+            Les lignes `(FileName, TransferDate, Status, FileSize,
+            DurationMs, CompressedSize)` du lot.
+
+        Retourne
+        -------
+        tuple
+            `(rollups, hotspots)` : les lignes à ajouter à TransferRollups
+            et à FailureHotspots.
+        """
+        buckets = defaultdict(lambda: [0, 0, 0, 0, 0, 0])
+        hotspots = defaultdict(int)
+        for (file_name, transfer_date, status, file_size, duration_ms,
+             _) in rows:
+            day = transfer_date[:10]
+            keys = (('hour', transfer_date[:13] + ':00'), ('day', day))
+            for key in keys:
+                counters = buckets[key]
+                if status == 'Success':
+                    counters[0] += 1
+                    counters[2] += file_size or 0
+                    counters[5] += duration_ms or 0
+                else:
+                    counters[1] += 1
+                if duration_ms is not None:
+                    counters[3] += duration_ms
+                    counters[4] += 1
+            if status != 'Success':
+                hotspots[(day, file_extension(file_name))] += 1
+        rollups = [key + tuple(counters) for key, counters in buckets.items()]
+        return rollups, [key + (count,) for key, count in hotspots.items()]
+
+    def _commit(self, connection, rows):
+        """
+        Valide un lot, en le réessayant après un délai croissant si la base
+        est momentanément indisponible. Le lot n'est abandonné qu'après
+        `max_retries` nouvelles tentatives, ou sur une autre erreur.
+
+        Paramètres
+        ----------
+        connection : sqlite3.Connection
+            La connexion de l'écrivain.
+        rows : list of tuple
+            Les lignes à insérer (voir `_write`).
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._write(connection, rows)
+                return
+            except sqlite3.OperationalError as e:
+                error = e
+                if attempt == self.max_retries:
+                    break
+                delay = self.retry_delay * 2 ** attempt
+                logger.warning("Cannot record %s transfers (%s), retrying in "
+                               "%.1fs.", len(rows), e, delay)
+                time.sleep(delay)
+            except sqlite3.Error as e:
+                error = e
+                break
+        logger.error("Error recording %s transfers: %s", len(rows), error)
+
+    @classmethod
+    def _write(cls, connection, rows):
+        """
+        Insère un lot d'enregistrements et met à jour les agrégats dans une
+        seule transaction.
+
+        Paramètres
+        ----------
+        connection : sqlite3.Connection
+            La connexion de l'écrivain.
+        rows : list of tuple
+            Les lignes `(FileName, TransferDate, Status, FileSize,
+            DurationMs, CompressedSize)` à insérer.
+
+        Lève
+        ----
+        sqlite3.Error
+            Si l'écriture échoue ; la transaction est annulée.
+        """
+        rollups, hotspots = cls._rollups(rows)
+        started = time.monotonic()
+        with connection:
+            connection.executemany("""
+                INSERT INTO FileTransfers
+                (FileName, TransferDate, Status, FileSize, DurationMs,
+                 CompressedSize)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            connection.executemany("""
+                INSERT INTO TransferRollups
+                (Granularity, Bucket, Successes, Failures, Bytes,
+                 DurationMs, TimedTransfers, SuccessDurationMs)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (Granularity, Bucket) DO UPDATE SET
+                    Successes = Successes + excluded.Successes,
+                    Failures = Failures + excluded.Failures,
+                    Bytes = Bytes + excluded.Bytes,
+                    DurationMs = DurationMs + excluded.DurationMs,
+                    TimedTransfers = TimedTransfers
+                                     + excluded.TimedTransfers,
+                    SuccessDurationMs = SuccessDurationMs
+                                        + excluded.SuccessDurationMs
+            """, rollups)
+            connection.executemany("""
+                INSERT INTO FailureHotspots (Day, Extension, Failures)
+                VALUES (?, ?, ?)
+                ON CONFLICT (Day, Extension) DO UPDATE SET
+                    Failures = Failures + excluded.Failures
+            """, hotspots)
+        record_phase('history_write', time.monotonic() - started)
+        metrics.inc('file_watcher_history_rows_total', len(rows))
@@ -0,0 +1,218 @@
+"""
+Module des migrations du schéma de la base de données.
+
+Chaque migration est une liste d'instructions SQL associée à un numéro de
+version. La version du schéma est conservée dans `PRAGMA user_version` ;
+les migrations plus récentes que cette version sont appliquées dans
+l'ordre, chacune dans sa propre transaction, ce qui met à jour sur place
+les fichiers TransferHistory.db existants.
+"""
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    # Version 1 : schéma initial. Les instructions sont idempotentes pour
+    # les bases créées avant l'introduction des versions.
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS FileTransfers (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            FileName TEXT NOT NULL,
+            TransferDate TEXT NOT NULL,
+            Status TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ResumableUploads (
+            RemotePath TEXT PRIMARY KEY,
+            LocalPath TEXT NOT NULL,
+            FileSize INTEGER NOT NULL,
+            MtimeNs INTEGER NOT NULL,
+            Offset INTEGER NOT NULL,
+            UpdatedAt TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS UploadIndex (
+            LocalPath TEXT PRIMARY KEY,
+            RemotePath TEXT NOT NULL,
+            FileSize INTEGER NOT NULL,
+            MtimeNs INTEGER NOT NULL,
+            Digest TEXT NOT NULL,
+            UploadedAt TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS IdxUploadIndexRemoteDigest
+        ON UploadIndex (RemotePath, Digest)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS DirectorySnapshot (
+            Path TEXT PRIMARY KEY,
+            Root TEXT NOT NULL,
+            FileSize INTEGER NOT NULL,
+            MtimeNs INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS IdxDirectorySnapshotRoot
+        ON DirectorySnapshot (Root)
+        """,
+    ]),
+    # Version 2 : index de l'historique pour les tris par date et les
+    # filtres par statut.
+    (2, [
+        """
+        CREATE INDEX IF NOT EXISTS IdxFileTransfersDate
+        ON FileTransfers (TransferDate)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS IdxFileTransfersStatusDate
+        ON FileTransfers (Status, TransferDate)
+        """,
+    ]),
+    # Version 3 : taille et durée des transferts, et agrégats par heure et
+    # par jour tenus à jour par l'écrivain de l'historique. Les agrégats
+    # sont initialisés à partir de l'historique existant.
+    (3, [
+        "ALTER TABLE FileTransfers ADD COLUMN FileSize INTEGER",
+        "ALTER TABLE FileTransfers ADD COLUMN DurationMs INTEGER",
+        """
+        CREATE TABLE TransferRollups (
+            Granularity TEXT NOT NULL,
+            Bucket TEXT NOT NULL,
+            Successes INTEGER NOT NULL DEFAULT 0,
+            Failures INTEGER NOT NULL DEFAULT 0,
+            Bytes INTEGER NOT NULL DEFAULT 0,
+            DurationMs INTEGER NOT NULL DEFAULT 0,
+            TimedTransfers INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Granularity, Bucket)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE FailureHotspots (
+            Day TEXT NOT NULL,
+            Extension TEXT NOT NULL,
+            Failures INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Day, Extension)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO TransferRollups (Granularity, Bucket, Successes, Failures)
+        SELECT 'hour', substr(TransferDate, 1, 13) || ':00',
+               SUM(Status = 'Success'), SUM(Status != 'Success')
+        FROM FileTransfers GROUP BY 2
+        """,
+        """
+        INSERT INTO TransferRollups (Granularity, Bucket, Successes, Failures)
+        SELECT 'day', substr(TransferDate, 1, 10),
+               SUM(Status = 'Success'), SUM(Status != 'Success')
+        FROM FileTransfers GROUP BY 2
+        """,
+        # L'extension est la partie du nom qui suit le dernier point, comme
+        # dans HistoryRecorder.
+        """
+        INSERT INTO FailureHotspots (Day, Extension, Failures)
+        SELECT substr(TransferDate, 1, 10),
+               CASE WHEN instr(FileName, '.') = 0 THEN ''
+                    ELSE '.' || lower(replace(
+                        FileName,
+                        rtrim(FileName, replace(FileName, '.', '')),
+                        ''))
+               END,
+               COUNT(*)
+        FROM FileTransfers WHERE Status != 'Success' GROUP BY 1, 2
+        """,
+    ]),
+    # Version 4 : file durable des téléchargements (en attente, en cours,
+    # à réessayer ou abandonnés).
+    (4, [
+        """
+        CREATE TABLE TransferOutbox (
+            LocalPath TEXT PRIMARY KEY,
+            State TEXT NOT NULL,
+            Attempts INTEGER NOT NULL DEFAULT 0,
+            NextAttemptAt REAL NOT NULL DEFAULT 0,
+            LastError TEXT,
+            UpdatedAt TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IdxTransferOutboxState
+        ON TransferOutbox (State, NextAttemptAt)
+        """,
+    ]),
+    # Version 5 : taille envoyée des fichiers compressés avant l'envoi.
+    (5, [
+        "ALTER TABLE FileTransfers ADD COLUMN CompressedSize INTEGER",
+    ]),
+    # Version 6 : durée cumulée des seuls transferts réussis, qui sert au
+    # calcul du débit. Elle est initialisée à partir de l'historique, par
+    # intervalles de dates pour profiter de l'index (Status, TransferDate).
+    (6, [
+        """
+        ALTER TABLE TransferRollups
+        ADD COLUMN SuccessDurationMs INTEGER NOT NULL DEFAULT 0
+        """,
+        """
+        UPDATE TransferRollups SET SuccessDurationMs = (
+            SELECT COALESCE(SUM(DurationMs), 0) FROM FileTransfers
+            WHERE Status = 'Success'
+              AND TransferDate >= TransferRollups.Bucket
+              AND TransferDate < CASE TransferRollups.Granularity
+                  WHEN 'hour' THEN substr(TransferRollups.Bucket, 1, 13)
+                                   || ':60'
+                  ELSE TransferRollups.Bucket || 'z'
+              END
+        )
+        """,
+    ]),
+]
+
+
+def schema_version(connection):
+    """
+    Retourne la version du schéma de la base.
+
+    Args:
+        connection (sqlite3.Connection): La connexion à la base.
+
+    Returns:
+        int: La version enregistrée dans `PRAGMA user_version`.
+    """
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(connection):
+    """
+    Applique les migrations manquantes à la base.
+
+    Args:
+        connection (sqlite3.Connection): La connexion à la base.
+
+    Returns:
+        int: La version du schéma après migration.
+
+    Raises:
+        sqlite3.Error: Si une migration échoue. Les migrations déjà
+        appliquées restent validées.
+    """
+    current = schema_version(connection)
+    for version, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            connection.execute("BEGIN")
+            for statement in statements:
+                connection.execute(statement)
+            connection.execute(f"PRAGMA user_version = {version}")
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+        logger.info("Database schema migrated to version %s.", version)
+        current = version
+    return current
@@ -6,5 +6,7 @@ d'interface utilisateur de l'application File Watcher FTP.
 from .main_window import FileWatcher
 from .ftp_credentials_dialog import FTPCredentialsDialog
 from .history_dialog import HistoryDialog
+from .stats_dialog import StatsDialog
 
-__all__ = ['FileWatcher', 'FTPCredentialsDialog', 'HistoryDialog']
+__all__ = ['FileWatcher', 'FTPCredentialsDialog', 'HistoryDialog',
+           'StatsDialog']
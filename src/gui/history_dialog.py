@@ -3,31 +3,185 @@ Module contenant la classe HistoryDialog pour afficher l'historique
 des transferts de fichiers.
 """
 
-from sqlite3 import DatabaseError
-from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from collections import OrderedDict
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
 from PyQt5.QtGui import QColor, QBrush
 from PyQt5.QtWidgets import (
-    QDialog, QPushButton, QTableView, QVBoxLayout, QApplication
+    QDialog, QHBoxLayout, QPushButton, QTableView, QVBoxLayout, QApplication
 )
 
 from src.database.db_manager import db_manager
+from src.gui.stats_dialog import StatsDialog
+from src.utils.config import get_setting
+
+# Nombre de lignes examinées pour ajuster la largeur des colonnes.
+RESIZE_SAMPLE_ROWS = 200
 
 
 class HistoryTableModel(QAbstractTableModel):
     """
     Modèle de table pour afficher l'historique des transferts de fichiers.
+
+    Les lignes sont chargées par pages à mesure que la vue défile
+    (`canFetchMore`/`fetchMore`), par pagination sur la clé
+    `(TransferDate, ID)`. Seules les `max_pages` pages les plus récemment
+    consultées sont gardées en mémoire ; une page évincée est relue depuis
+    la base à partir de sa première clé.
+
+    Les transferts enregistrés après le chargement sont ajoutés en tête par
+    `refresh`, qui ne lit que les lignes d'identifiant supérieur au plus
+    grand identifiant déjà affiché.
     """
 
-    def __init__(self, data):
+    def __init__(self, store=None, page_size=500, max_pages=10):
         """
-        Initialise le modèle avec les données fournies.
+        Initialise le modèle sans charger de données.
 
         Args:
-            data (list): Liste des données à afficher dans le tableau.
+            store (DBManager, optional): Source de l'historique. Par défaut,
+            le gestionnaire de base de données de l'application.
+            page_size (int): Nombre de lignes lues par requête.
+            max_pages (int): Nombre maximal de pages gardées en mémoire.
+            Au-delà de `page_size * max_pages` nouvelles lignes, le modèle
+            est rechargé plutôt que de les garder toutes en tête.
         """
         super().__init__()
-        self._data = data
+        self._store = store if store is not None else db_manager
+        self._page_size = page_size
+        self._max_pages = max_pages
         self._headers = ["ID", "Nom du fichier", "Date de transfert", "Statut"]
+        self._pages = OrderedDict()
+        self._page_keys = []
+        self._next_key = None
+        self._row_count = 0
+        self._exhausted = False
+        self._recent = []
+        self._last_id = 0
+
+    @staticmethod
+    def _format(row):
+        """
+        Convertit une ligne de la base en valeurs affichables.
+
+        Args:
+            row (tuple): La ligne `(ID, FileName, TransferDate, Status)`.
+
+        Returns:
+            list: Les valeurs des colonnes sous forme de chaînes.
+        """
+        return [str(row[0]), row[1], row[2], row[3]]
+
+    def reload(self):
+        """
+        Oublie les lignes chargées et recharge la première page.
+        """
+        self.beginResetModel()
+        self._pages.clear()
+        self._page_keys = []
+        self._next_key = None
+        self._row_count = 0
+        self._exhausted = False
+        self._recent = []
+        # Lu avant la première page : un transfert enregistré entre les deux
+        # requêtes peut apparaître deux fois, mais aucun n'est omis.
+        self._last_id = self._store.get_last_transfer_id()
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def refresh(self):
+        """
+        Ajoute en tête du modèle les transferts enregistrés depuis le
+        dernier chargement.
+
+        Returns:
+            int: Le nombre de lignes ajoutées.
+        """
+        limit = self._page_size * self._max_pages
+        rows = self._store.get_history_since(self._last_id, limit + 1)
+        if not rows:
+            return 0
+        if len(rows) > limit or len(self._recent) + len(rows) > limit:
+            # Trop de nouvelles lignes : recharger coûte une seule page.
+            self.reload()
+            return len(rows)
+        self.beginInsertRows(QModelIndex(), 0, len(rows) - 1)
+        self._recent[:0] = [self._format(row) for row in reversed(rows)]
+        self._last_id = rows[-1][0]
+        self.endInsertRows()
+        return len(rows)
+
+    def canFetchMore(self, _parent=QModelIndex()):
+        """
+        Indique si des lignes plus anciennes restent à charger.
+
+        Args:
+            parent (QModelIndex): Index du parent. Par défaut, QModelIndex().
+
+        Returns:
+            bool: True si une page supplémentaire peut être chargée.
+        """
+        return not self._exhausted
+
+    def fetchMore(self, _parent=QModelIndex()):
+        """
+        Charge la page suivante de l'historique et l'ajoute en fin de
+        modèle.
+
+        Args:
+            parent (QModelIndex): Index du parent. Par défaut, QModelIndex().
+        """
+        if self._exhausted:
+            return
+        rows = self._store.get_history_page(self._next_key, self._page_size)
+        if len(rows) < self._page_size:
+            self._exhausted = True
+        if not rows:
+            return
+        page_index = len(self._page_keys)
+        first = len(self._recent) + self._row_count
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._page_keys.append((rows[0][2], rows[0][0]))
+        self._next_key = (rows[-1][2], rows[-1][0])
+        self._cache_page(page_index, [self._format(row) for row in rows])
+        self._row_count += len(rows)
+        self.endInsertRows()
+
+    def _cache_page(self, page_index, rows):
+        """
+        Garde une page en mémoire et évince la moins récemment utilisée.
+
+        Args:
+            page_index (int): Numéro de la page.
+            rows (list): Les lignes formatées de la page.
+        """
+        self._pages[page_index] = rows
+        self._pages.move_to_end(page_index)
+        while len(self._pages) > self._max_pages:
+            self._pages.popitem(last=False)
+
+    def _row(self, row):
+        """
+        Retourne une ligne, en relisant sa page si elle a été évincée.
+
+        Args:
+            row (int): Numéro de la ligne dans le modèle.
+
+        Returns:
+            list: Les valeurs de la ligne, ou None si elle n'existe plus.
+        """
+        if row < len(self._recent):
+            return self._recent[row]
+        row -= len(self._recent)
+        page_index, offset = divmod(row, self._page_size)
+        page = self._pages.get(page_index)
+        if page is None:
+            rows = self._store.get_history_page(
+                self._page_keys[page_index], self._page_size, inclusive=True)
+            page = [self._format(item) for item in rows]
+            self._cache_page(page_index, page)
+        else:
+            self._pages.move_to_end(page_index)
+        return page[offset] if offset < len(page) else None
 
     def rowCount(self, _parent=QModelIndex()):
         """
@@ -37,9 +191,9 @@ class HistoryTableModel(QAbstractTableModel):
             parent (QModelIndex): Index du parent. Par défaut, QModelIndex().
 
         Returns:
-            int: Nombre de lignes dans le modèle.
+            int: Nombre de lignes chargées jusqu'ici.
         """
-        return len(self._data)
+        return len(self._recent) + self._row_count
 
     def columnCount(self, _parent=QModelIndex()):
         """
@@ -68,12 +222,18 @@ class HistoryTableModel(QAbstractTableModel):
         if not index.isValid():
             return None
 
+        if role not in (Qt.DisplayRole, Qt.BackgroundRole):
+            return None
+        row = self._row(index.row())
+        if row is None:
+            return None
+
         if role == Qt.DisplayRole:
-            return self._data[index.row()][index.column()]
+            return row[index.column()]
 
         elif role == Qt.BackgroundRole and index.column() == 3:
             # Statut est dans la 4ème colonne
-            status = self._data[index.row()][3]
+            status = row[3]
             if status == "Success":
                 return QBrush(QColor(Qt.green))
             else:
@@ -106,6 +266,9 @@ class HistoryTableModel(QAbstractTableModel):
 class HistoryDialog(QDialog):
     """
     Fenêtre de dialogue pour afficher l'historique des transferts de fichiers.
+
+    Tant que la fenêtre est visible, les nouveaux transferts sont ajoutés
+    périodiquement en tête du tableau, selon `history.refresh_interval_ms`.
     """
 
     def __init__(self, parent=None):
@@ -126,50 +289,84 @@ class HistoryDialog(QDialog):
         """
         layout = QVBoxLayout()
 
-        # Création du tableau
+        # Création du tableau, alimenté page par page pendant le défilement
         self.table_view = QTableView()
+        self.model = HistoryTableModel()
+        self.table_view.setModel(self.model)
+        # La largeur des colonnes est calculée sur un échantillon de lignes
+        self.table_view.horizontalHeader().setResizeContentsPrecision(
+            RESIZE_SAMPLE_ROWS
+        )
         layout.addWidget(self.table_view)
 
-        # Bouton pour rafraîchir les données
+        # Boutons pour rafraîchir les données et afficher les statistiques
+        buttons_layout = QHBoxLayout()
         refresh_button = QPushButton("Rafraîchir")
-        refresh_button.clicked.connect(self.load_data)
-        layout.addWidget(refresh_button)
+        refresh_button.clicked.connect(self.refresh_data)
+        buttons_layout.addWidget(refresh_button)
+        stats_button = QPushButton("Statistiques")
+        stats_button.clicked.connect(self.show_stats)
+        buttons_layout.addWidget(stats_button)
+        layout.addLayout(buttons_layout)
 
         self.setLayout(layout)
 
+        # Rafraîchissement automatique des nouveaux transferts
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(
+            int(get_setting('history', 'refresh_interval_ms', 1000))
+        )
+        self.refresh_timer.timeout.connect(self.refresh_data)
+
         # Chargement initial des données
         self.load_data()
 
     def load_data(self):
         """
-        Charge les données de l'historique des transferts depuis
-        la base de données.
-        """
-        # Récupération des données depuis la base de données
-        try:
-            history_data = db_manager.get_transfer_history()
-        except (DatabaseError, ConnectionError) as e:
-            print(f"Erreur lors de la récupération des données : {e}")
-            history_data = []
-
-        # Conversion des données en liste de listes pour le modèle de tableau
-        table_data = [
-            [
-                str(item.get('ID', '')),
-                item.get('FileName', ''),
-                item.get('TransferDate', ''),
-                item.get('Status', '')
-            ]
-            for item in history_data
-        ]
-
-        # Création et définition du modèle de tableau
-        model = HistoryTableModel(table_data)
-        self.table_view.setModel(model)
-
-        # Ajustement automatique de la largeur des colonnes
+        Recharge l'historique des transferts depuis la base de données.
+        Seule la première page est lue ; les suivantes le sont lorsque la
+        vue défile.
+        """
+        self.model.reload()
+
+        # Ajustement de la largeur des colonnes sur les lignes chargées
         self.table_view.resizeColumnsToContents()
 
+    def refresh_data(self):
+        """
+        Ajoute au tableau les transferts enregistrés depuis le dernier
+        rafraîchissement, sans relire les lignes déjà affichées.
+        """
+        self.model.refresh()
+
+    def show_stats(self):
+        """
+        Ouvre la fenêtre des statistiques des transferts.
+        """
+        StatsDialog(self).exec_()
+
+    def showEvent(self, event):
+        """
+        Démarre le rafraîchissement automatique à l'affichage.
+
+        Args:
+            event (QShowEvent): L'événement d'affichage.
+        """
+        super().showEvent(event)
+        if self.refresh_timer.interval() > 0:
+            self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        """
+        Arrête le rafraîchissement automatique lorsque la fenêtre est
+        masquée.
+
+        Args:
+            event (QHideEvent): L'événement de masquage.
+        """
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
 
 if __name__ == "__main__":
     import sys
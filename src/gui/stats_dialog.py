@@ -0,0 +1,240 @@
+"""
+Module contenant la classe StatsDialog pour afficher les statistiques des
+transferts de fichiers.
+
+Les statistiques sont lues dans les agrégats par heure et par jour tenus à
+jour par l'écrivain de l'historique : leur coût dépend du nombre de
+périodes affichées, et non du nombre de transferts enregistrés.
+"""
+
+from datetime import date, timedelta
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtWidgets import (
+    QDialog, QComboBox, QHBoxLayout, QLabel, QPushButton, QTableView,
+    QVBoxLayout, QApplication
+)
+
+from src.database.db_manager import db_manager
+
+# Durée en secondes des périodes d'agrégation.
+BUCKET_SECONDS = {"hour": 3600, "day": 86400}
+
+
+class StatsTableModel(QAbstractTableModel):
+    """
+    Modèle de table en lecture seule pour une liste de lignes déjà
+    formatées.
+    """
+
+    def __init__(self, headers, data=None):
+        """
+        Initialise le modèle.
+
+        Args:
+            headers (list): Les titres des colonnes.
+            data (list, optional): Les lignes à afficher. Par défaut, vide.
+        """
+        super().__init__()
+        self._headers = headers
+        self._data = data or []
+
+    def set_rows(self, data):
+        """
+        Remplace les lignes affichées.
+
+        Args:
+            data (list): Les nouvelles lignes.
+        """
+        self.beginResetModel()
+        self._data = data
+        self.endResetModel()
+
+    def rowCount(self, _parent=QModelIndex()):
+        """
+        Retourne le nombre de lignes dans le modèle.
+
+        Args:
+            parent (QModelIndex): Index du parent. Par défaut, QModelIndex().
+
+        Returns:
+            int: Nombre de lignes dans le modèle.
+        """
+        return len(self._data)
+
+    def columnCount(self, _parent=QModelIndex()):
+        """
+        Retourne le nombre de colonnes dans le modèle.
+
+        Args:
+            parent (QModelIndex): Index du parent. Par défaut, QModelIndex().
+
+        Returns:
+            int: Nombre de colonnes dans le modèle.
+        """
+        return len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """
+        Retourne les données pour un index et un rôle donnés.
+
+        Args:
+            index (QModelIndex): L'index de la cellule.
+            role (Qt.ItemDataRole): Le rôle pour lequel les données sont
+            demandées.
+
+        Returns:
+            QVariant: Les données demandées ou None si non applicable.
+        """
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self._data[index.row()][index.column()]
+        if role == Qt.TextAlignmentRole and index.column() > 0:
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """
+        Retourne les données de l'en-tête pour une section donnée.
+
+        Args:
+            section (int): Numéro de section de l'en-tête.
+            orientation (Qt.Orientation): Orientation de l'en-tête.
+            role (Qt.ItemDataRole): Rôle pour lequel les données sont
+            demandées.
+
+        Returns:
+            QVariant: Les données de l'en-tête ou None si non applicable.
+        """
+        if (
+            role == Qt.DisplayRole
+            and orientation == Qt.Horizontal
+            and 0 <= section < len(self._headers)
+        ):
+            return self._headers[section]
+        return None
+
+
+def format_rollup(row, bucket_seconds):
+    """
+    Calcule les indicateurs affichés pour une période agrégée.
+
+    Args:
+        row (tuple): La ligne `(Bucket, Successes, Failures, Bytes,
+        DurationMs, TimedTransfers, SuccessDurationMs)` de TransferRollups.
+        bucket_seconds (int): La durée de la période en secondes.
+
+    Returns:
+        list: Les valeurs des colonnes sous forme de chaînes. Le débit
+        rapporte les octets envoyés à la durée des seuls transferts
+        réussis ; la durée moyenne porte sur tous les transferts chronométrés.
+    """
+    (bucket, successes, failures, size, duration_ms, timed,
+     success_duration_ms) = row
+    total = successes + failures
+    ratio = f"{100 * successes / total:.1f} %" if total else "-"
+    rate = f"{total / bucket_seconds:.2f}"
+    throughput = (f"{size / 1048576 / (success_duration_ms / 1000):.2f}"
+                  if success_duration_ms else "-")
+    average = f"{duration_ms / timed:.0f}" if timed else "-"
+    return [bucket, str(total), str(successes), str(failures), ratio, rate,
+            throughput, average]
+
+
+class StatsDialog(QDialog):
+    """
+    Fenêtre de dialogue pour afficher le débit, le taux de réussite et les
+    extensions qui échouent le plus.
+    """
+
+    def __init__(self, parent=None, periods=48, hotspot_days=7):
+        """
+        Initialise la fenêtre de dialogue.
+
+        Args:
+            parent (QWidget, optional): Le widget parent. Par défaut, None.
+            periods (int, optional): Nombre de périodes affichées.
+            hotspot_days (int, optional): Nombre de jours pris en compte
+            pour les échecs par extension.
+        """
+        super().__init__(parent)
+        self.periods = periods
+        self.hotspot_days = hotspot_days
+        self.setWindowTitle("Statistiques des transferts")
+        self.resize(760, 500)
+        self.init_ui()
+
+    def init_ui(self):
+        """
+        Initialise l'interface utilisateur de la fenêtre de dialogue.
+        """
+        layout = QVBoxLayout()
+
+        # Choix de la période d'agrégation
+        granularity_layout = QHBoxLayout()
+        granularity_layout.addWidget(QLabel("Période :"))
+        self.granularity_combo = QComboBox()
+        self.granularity_combo.addItem("Heure", "hour")
+        self.granularity_combo.addItem("Jour", "day")
+        self.granularity_combo.currentIndexChanged.connect(self.load_data)
+        granularity_layout.addWidget(self.granularity_combo)
+        granularity_layout.addStretch()
+        layout.addLayout(granularity_layout)
+
+        # Tableau des agrégats
+        self.rollup_model = StatsTableModel([
+            "Période", "Transferts", "Succès", "Échecs", "Réussite",
+            "Fichiers/s", "Débit (Mo/s)", "Durée moy. (ms)"
+        ])
+        self.rollup_view = QTableView()
+        self.rollup_view.setModel(self.rollup_model)
+        layout.addWidget(self.rollup_view)
+
+        # Tableau des échecs par extension
+        layout.addWidget(QLabel(
+            f"Échecs par extension ({self.hotspot_days} derniers jours)"
+        ))
+        self.hotspot_model = StatsTableModel(["Extension", "Échecs"])
+        self.hotspot_view = QTableView()
+        self.hotspot_view.setModel(self.hotspot_model)
+        layout.addWidget(self.hotspot_view)
+
+        # Bouton pour rafraîchir les données
+        refresh_button = QPushButton("Rafraîchir")
+        refresh_button.clicked.connect(self.load_data)
+        layout.addWidget(refresh_button)
+
+        self.setLayout(layout)
+
+        # Chargement initial des données
+        self.load_data()
+
+    def load_data(self):
+        """
+        Charge les agrégats et les échecs par extension depuis la base de
+        données.
+        """
+        granularity = self.granularity_combo.currentData()
+        rows = db_manager.get_rollups(granularity, self.periods)
+        self.rollup_model.set_rows([
+            format_rollup(row, BUCKET_SECONDS[granularity]) for row in rows
+        ])
+
+        since = date.today() - timedelta(days=self.hotspot_days - 1)
+        hotspots = db_manager.get_failure_hotspots(since.isoformat())
+        self.hotspot_model.set_rows([
+            [extension or "(aucune)", str(failures)]
+            for extension, failures in hotspots
+        ])
+
+        self.rollup_view.resizeColumnsToContents()
+        self.hotspot_view.resizeColumnsToContents()
+
+
+if __name__ == "__main__":
+    import sys
+
+    app = QApplication(sys.argv)
+    dialog = StatsDialog()
+    dialog.show()
+    sys.exit(app.exec_())
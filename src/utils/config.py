@@ -0,0 +1,80 @@
+"""
+Module de chargement de la configuration de l'application.
+
+Ce module lit le fichier config.yaml une seule fois, lors du premier accès
+à un paramètre et non à l'importation, et fournit un accès simple aux
+paramètres, avec une valeur par défaut lorsqu'une clé est absente. La
+variable d'environnement FILE_WATCHER_CONFIG permet d'indiquer un autre
+fichier que config.yaml dans le répertoire courant.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = 'config.yaml'
+CONFIG_ENV_VAR = 'FILE_WATCHER_CONFIG'
+
+_config_cache = None
+
+
+def load_config():
+    """
+    Charge la configuration depuis le fichier config.yaml, ou depuis le
+    fichier indiqué par FILE_WATCHER_CONFIG.
+
+    Returns:
+        dict: Le contenu du fichier de configuration.
+    """
+    # Import local : PyYAML n'est chargé que si la configuration est lue.
+    import yaml
+
+    with open(config_path(), 'r', encoding='utf-8') as config_file:
+        return yaml.safe_load(config_file) or {}
+
+
+def config_path():
+    """
+    Retourne le chemin du fichier de configuration.
+
+    Returns:
+        str: La valeur de FILE_WATCHER_CONFIG, ou `CONFIG_FILE`.
+    """
+    return os.environ.get(CONFIG_ENV_VAR) or CONFIG_FILE
+
+
+def get_config():
+    """
+    Retourne la configuration, chargée lors du premier appel.
+
+    Returns:
+        dict: Le contenu du fichier de configuration, ou un dictionnaire
+        vide si le fichier est introuvable.
+    """
+    global _config_cache  # pylint: disable=global-statement
+    if _config_cache is None:
+        try:
+            _config_cache = load_config()
+        except FileNotFoundError:
+            logger.warning("Configuration file not found: %s",
+                           config_path())
+            _config_cache = {}
+    return _config_cache
+
+
+def get_setting(section, key, default=None):
+    """
+    Retourne la valeur d'un paramètre de configuration.
+
+    Args:
+        section (str): La section du fichier (par exemple 'app').
+        key (str): La clé du paramètre dans la section.
+        default (any, optional): Valeur retournée si le paramètre est absent.
+
+    Returns:
+        any: La valeur du paramètre ou `default`.
+    """
+    values = get_config().get(section) or {}
+    value = values.get(key)
+    return default if value is None else value
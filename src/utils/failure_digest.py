@@ -0,0 +1,115 @@
+"""
+Module de regroupement des échecs de téléchargement pour les notifications.
+
+Lorsque le serveur FTP devient indisponible au milieu d'une rafale, des
+milliers de fichiers échouent en quelques secondes. Plutôt qu'une
+notification par fichier, le FailureDigest accumule les échecs pendant une
+fenêtre de temps puis émet un seul résumé : le nombre d'échecs et l'erreur
+la plus fréquente. Le détail de chaque fichier reste dans l'historique.
+"""
+
+import time
+from collections import Counter
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class FailureDigest(QObject):
+    """
+    Accumule les échecs pendant `window` secondes et émet un résumé.
+
+    La fenêtre s'ouvre au premier échec ; les échecs suivants s'y ajoutent
+    jusqu'à son expiration. À utiliser depuis le thread de l'interface
+    graphique (voir StatusBus).
+
+    Attributs
+    ---------
+    digest_ready : pyqtSignal(str, str)
+        Émis avec le titre et le texte du résumé.
+    window : float
+        La durée de la fenêtre de regroupement, en secondes.
+    """
+
+    digest_ready = pyqtSignal(str, str)
+
+    def __init__(self, window=30.0, parent=None):
+        """
+        Initialise le regroupement.
+
+        Paramètres
+        ----------
+        window : float, optional
+            La durée de la fenêtre de regroupement, en secondes. Par
+            défaut, 30.
+        parent : QObject, optional
+            L'objet Qt parent.
+        """
+        super().__init__(parent)
+        self.window = max(float(window), 0.0)
+        self._errors = Counter()
+        self._count = 0
+        self._opened_at = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    def add(self, failures):
+        """
+        Ajoute des échecs à la fenêtre en cours, ou en ouvre une.
+
+        Paramètres
+        ----------
+        failures : list of tuple
+            Les couples `(chemin, erreur)` des fichiers abandonnés.
+        """
+        for _, error in failures:
+            self._errors[error or "erreur inconnue"] += 1
+        self._count += len(failures)
+        if self._count and not self._timer.isActive():
+            self._opened_at = time.monotonic()
+            self._timer.start(int(self.window * 1000))
+
+    def flush(self):
+        """
+        Émet le résumé des échecs accumulés et ferme la fenêtre.
+        """
+        self._timer.stop()
+        if not self._count:
+            return
+        elapsed = max(1, round(time.monotonic() - self._opened_at))
+        self.digest_ready.emit(
+            "Échec du téléchargement",
+            self.summary(self._count, elapsed, self._errors)
+        )
+        self._errors = Counter()
+        self._count = 0
+
+    @staticmethod
+    def summary(count, elapsed, errors):
+        """
+        Rédige le texte du résumé.
+
+        Paramètres
+        ----------
+        count : int
+            Le nombre d'échecs.
+        elapsed : int
+            La durée couverte, en secondes.
+        errors : Counter
+            Le nombre d'échecs par erreur.
+
+        Retourne
+        -------
+        str
+            Le texte du résumé.
+        """
+        if count == 1:
+            text = "1 téléchargement a échoué"
+        else:
+            text = f"{count} téléchargements ont échoué"
+        text += f" au cours des {elapsed} dernières secondes."
+        error, occurrences = errors.most_common(1)[0]
+        text += f"\nErreur la plus fréquente : {error}"
+        if len(errors) > 1:
+            text += f" ({occurrences} sur {count})"
+        return text + "\nLe détail est disponible dans l'historique."
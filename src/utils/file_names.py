@@ -0,0 +1,48 @@
+"""
+Module des noms de fichiers.
+
+Ce module fournit l'extraction et la normalisation des extensions, partagées
+par les règles qui s'appliquent à une extension : classes de priorité,
+plafonds de débit, compression et décompte des échecs.
+"""
+
+import os
+
+
+def file_extension(path):
+    """
+    Retourne l'extension d'un fichier, en minuscules.
+
+    Seul le nom du fichier est examiné : un point dans un répertoire parent
+    ne donne pas d'extension, et un nom qui commence par un point
+    (`.bashrc`) n'en a pas.
+
+    Paramètres
+    ----------
+    path : str
+        Le chemin ou le nom du fichier.
+
+    Retourne
+    -------
+    str
+        L'extension précédée du point, ou une chaîne vide.
+    """
+    return os.path.splitext(path)[1].lower()
+
+
+def normalize_extension(extension):
+    """
+    Normalise une extension lue dans la configuration pour la comparer au
+    résultat de `file_extension`.
+
+    Paramètres
+    ----------
+    extension : str
+        L'extension, avec ou sans point (la casse est ignorée).
+
+    Retourne
+    -------
+    str
+        L'extension en minuscules, précédée d'un point.
+    """
+    return '.' + extension.lower().lstrip('.')
@@ -0,0 +1,44 @@
+"""
+Module de configuration de la journalisation.
+
+Ce module configure le module `logging` d'après la section `logging` du
+fichier config.yaml : les messages sont écrits sur la sortie d'erreur et,
+si un fichier est indiqué, dans ce fichier.
+"""
+
+import logging
+import os
+
+from src.utils.config import get_setting
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+
+def configure_logging(level=None, log_file=None):
+    """
+    Configure la journalisation de l'application.
+
+    Args:
+        level (str, optional): Le niveau minimal des messages (par exemple
+            'INFO'). Par défaut, le réglage `logging.level`.
+        log_file (str, optional): Le fichier dans lequel écrire les
+            messages. Par défaut, le réglage `logging.file` ; une chaîne
+            vide désactive le fichier.
+
+    Returns:
+        logging.Logger: Le journal racine configuré.
+    """
+    if level is None:
+        level = get_setting('logging', 'level', 'INFO')
+    if log_file is None:
+        log_file = get_setting('logging', 'file', '')
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        log_file = os.path.expanduser(log_file)
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    logging.basicConfig(level=str(level).upper(), format=LOG_FORMAT,
+                        handlers=handlers, force=True)
+    return logging.getLogger()
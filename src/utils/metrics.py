@@ -0,0 +1,386 @@
+"""
+Module des métriques du processus.
+
+Ce module tient, en mémoire et sous un seul verrou, des compteurs, des
+jauges et des histogrammes à seaux fixes, pour un coût de quelques
+microsecondes par mesure. Chaque téléchargement est découpé en phases
+chronométrées avec l'horloge monotone : attente dans la file
+(`queue_wait`), obtention d'une connexion authentifiée (`connect`), envoi
+des données (`transfer`) ; l'écriture de l'historique (`history_write`) est
+mesurée par lot.
+
+Les métriques peuvent être exposées au format texte de Prometheus sur un
+point d'accès HTTP local (section `metrics` de config.yaml) :
+
+    curl http://127.0.0.1:9464/metrics
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_FAMILIES = (
+    ('file_watcher_phase_seconds', 'histogram',
+     "Durée des phases d'un téléchargement."),
+    ('file_watcher_uploads_total', 'counter',
+     "Téléchargements terminés, par résultat."),
+    ('file_watcher_upload_bytes_total', 'counter',
+     "Octets envoyés par les téléchargements réussis."),
+    ('file_watcher_upload_errors_total', 'counter',
+     "Téléchargements échoués, par classe d'erreur."),
+    ('file_watcher_uploads_in_flight', 'gauge',
+     "Téléchargements en cours."),
+    ('file_watcher_queue_depth', 'gauge',
+     "Fichiers en attente de téléchargement, par classe de priorité."),
+    ('file_watcher_ftp_connections_opened_total', 'counter',
+     "Connexions FTP ouvertes et authentifiées."),
+    ('file_watcher_history_rows_total', 'counter',
+     "Transferts enregistrés dans l'historique."),
+)
+
+
+class _Histogram:
+    """
+    Histogramme à seaux fixes.
+    """
+
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class MetricsRegistry:
+    """
+    Ensemble des métriques du processus.
+
+    Attributs
+    ---------
+    buckets : tuple of float
+        Les bornes supérieures des seaux des histogrammes, en secondes.
+    """
+
+    def __init__(self, families=_FAMILIES, buckets=DEFAULT_BUCKETS):
+        """
+        Initialise des métriques vides.
+
+        Paramètres
+        ----------
+        families : iterable of tuple
+            Les triplets `(nom, type, description)` des métriques.
+        buckets : tuple of float
+            Les bornes des seaux des histogrammes.
+        """
+        self.buckets = tuple(buckets)
+        self._families = {name: (kind, text) for name, kind, text in families}
+        self._values = {name: {} for name in self._families}
+        self._callbacks = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        """
+        Ajoute `amount` à un compteur ou à une jauge.
+
+        Paramètres
+        ----------
+        name : str
+            Le nom de la métrique.
+        amount : float
+            La valeur à ajouter (négative pour une jauge).
+        **labels
+            Les étiquettes de la série.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._values[name]
+            values[key] = values.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """
+        Ajoute une mesure à un histogramme.
+
+        Paramètres
+        ----------
+        name : str
+            Le nom de l'histogramme.
+        value : float
+            La mesure, en secondes.
+        **labels
+            Les étiquettes de la série.
+        """
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._values[name].get(key)
+            if histogram is None:
+                histogram = _Histogram(len(self.buckets) + 1)
+                self._values[name][key] = histogram
+            histogram.counts[index] += 1
+            histogram.sum += value
+
+    def set_callback(self, name, function, label=None):
+        """
+        Calcule une jauge au moment de l'exposition.
+
+        Paramètres
+        ----------
+        name : str
+            Le nom de la jauge.
+        function : callable
+            Fonction sans argument qui retourne la valeur ou, si `label`
+            est donné, un dictionnaire `{valeur de l'étiquette: valeur}`.
+        label : str, optional
+            Le nom de l'étiquette des séries.
+        """
+        self._callbacks[name] = (function, label)
+
+    def render(self):
+        """
+        Retourne les métriques au format texte de Prometheus.
+
+        Retourne
+        -------
+        str
+            Le texte de l'exposition.
+        """
+        with self._lock:
+            snapshot = {
+                name: {
+                    key: (list(value.counts), value.sum)
+                    if isinstance(value, _Histogram) else value
+                    for key, value in values.items()
+                }
+                for name, values in self._values.items()
+            }
+        for name, (function, label) in list(self._callbacks.items()):
+            value = function()
+            if label is None:
+                snapshot[name] = {(): value}
+            else:
+                snapshot[name] = {((label, str(item)),): count
+                                  for item, count in value.items()}
+        lines = []
+        for name, (kind, text) in self._families.items():
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(snapshot.get(name, {}).items()):
+                if kind == 'histogram':
+                    lines.extend(self._render_histogram(name, key, *value))
+                else:
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _render_histogram(self, name, key, counts, total):
+        """
+        Retourne les lignes d'une série d'histogramme.
+        """
+        lines = []
+        cumulative = 0
+        bounds = [f"{bound:g}" for bound in self.buckets] + ['+Inf']
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(key + (('le', bound),))} "
+                         f"{cumulative}")
+        lines.append(f"{name}_sum{_labels(key)} {_number(total)}")
+        lines.append(f"{name}_count{_labels(key)} {cumulative}")
+        return lines
+
+
+def _number(value):
+    """
+    Met en forme une valeur sans perte de précision.
+    """
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _labels(key):
+    """
+    Met en forme les étiquettes d'une série, échappées pour Prometheus.
+    """
+    if not key:
+        return ''
+    pairs = (
+        name + '="' + str(value).replace('\\', '\\\\')
+        .replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in key
+    )
+    return '{' + ','.join(pairs) + '}'
+
+
+metrics = MetricsRegistry()
+
+_transfer = threading.local()
+
+
+def record_phase(phase, seconds):
+    """
+    Enregistre la durée d'une phase dans l'histogramme des phases et, si
+    un téléchargement est en cours dans ce thread, dans ses phases.
+
+    Paramètres
+    ----------
+    phase : str
+        Le nom de la phase.
+    seconds : float
+        La durée, en secondes.
+    """
+    metrics.observe('file_watcher_phase_seconds', seconds, phase=phase)
+    phases = getattr(_transfer, 'phases', None)
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed_phase(phase):
+    """
+    Chronomètre le bloc comme une phase (voir `record_phase`).
+
+    Paramètres
+    ----------
+    phase : str
+        Le nom de la phase.
+    """
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.monotonic() - started)
+
+
+def begin_transfer():
+    """
+    Commence à collecter les phases d'un téléchargement dans ce thread.
+    """
+    _transfer.phases = {}
+
+
+def transfer_phases():
+    """
+    Retourne les phases du téléchargement en cours dans ce thread.
+
+    Retourne
+    -------
+    dict
+        `{phase: durée en secondes}`, vide si aucune collecte n'est en
+        cours.
+    """
+    return getattr(_transfer, 'phases', None) or {}
+
+
+def end_transfer():
+    """
+    Termine la collecte commencée par `begin_transfer`.
+    """
+    _transfer.phases = None
+
+
+def error_class(error):
+    """
+    Retourne la classe d'une erreur, pour l'étiquette `error_class`.
+
+    Paramètres
+    ----------
+    error : Exception or str
+        L'erreur, ou sa description.
+
+    Retourne
+    -------
+    str
+        Le nom de la classe de l'exception, ou 'UploadError' pour une
+        description.
+    """
+    if isinstance(error, BaseException):
+        return type(error).__name__
+    return 'UploadError'
+
+
+class MetricsServer:
+    """
+    Point d'accès HTTP qui expose les métriques sur `/metrics`.
+
+    Attributs
+    ---------
+    host : str
+        L'adresse d'écoute.
+    port : int
+        Le port d'écoute (le port choisi si 0 était demandé).
+    """
+
+    def __init__(self, host='127.0.0.1', port=9464, registry=None):
+        """
+        Initialise le point d'accès sans l'ouvrir.
+
+        Paramètres
+        ----------
+        host : str
+            L'adresse d'écoute. Par défaut, la boucle locale seulement.
+        port : int
+            Le port d'écoute (0 pour un port libre).
+        registry : MetricsRegistry, optional
+            Les métriques exposées. Par défaut, celles du processus.
+        """
+        self.host = host
+        self.port = port
+        self.registry = registry if registry is not None else metrics
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """
+        Ouvre le point d'accès dans un thread.
+
+        Lève
+        ----
+        OSError
+            Si le port ne peut pas être ouvert.
+        """
+        # Import local : le serveur HTTP n'est chargé que s'il est activé.
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # pylint: disable=invalid-name
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type',
+                                 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            # pylint: disable-next=redefined-builtin
+            def log_message(self, format, *args):
+                logger.debug("%s " + format, self.address_string(), *args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="metrics-http", daemon=True)
+        self._thread.start()
+        logger.info("Metrics available at http://%s:%s/metrics",
+                    self.host, self.port)
+
+    def stop(self):
+        """
+        Ferme le point d'accès.
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
@@ -1,11 +1,14 @@
 """
 Module pour créer des icônes personnalisées avec des polygones colorés
 en utilisant PIL et PyQt5.
+
+Les icônes d'état sont dessinées une seule fois par couleur puis
+réutilisées (voir `status_icon`).
 """
 
+from functools import lru_cache
 from math import cos, pi, sin
-from PIL import Image, ImageDraw
-from PyQt5.QtGui import QIcon, QPixmap
+from PyQt5.QtGui import QIcon, QImage, QPixmap
 
 
 def draw_polygon(draw, n, radius, position, fill_color):
@@ -40,15 +43,36 @@ def create_icon_image(color='red'):
     Retourne :
         QIcon : Une icône PyQt5 contenant l'image générée.
     """
+    # Import local : PIL n'est chargé qu'à la création de la première icône.
+    from PIL import Image, ImageDraw
+
     image = Image.new('RGB', (64, 64), color='white')
     draw = ImageDraw.Draw(image)
     center = (32, 32)
     radius = 20
     draw_polygon(draw, 9, radius, center, fill_color=color)
 
-    # Convertir l'image PIL en QIcon
+    # Convertir l'image PIL en QIcon : les octets bruts ne sont pas un
+    # format de fichier, ils sont donc décrits à QImage (copie, car `data`
+    # n'appartient pas à Qt).
     image = image.convert("RGBA")
     data = image.tobytes("raw", "RGBA")
-    qimage = QPixmap()
-    qimage.loadFromData(data)
-    return QIcon(qimage)
+    qimage = QImage(data, image.width, image.height,
+                    QImage.Format_RGBA8888).copy()
+    return QIcon(QPixmap.fromImage(qimage))
+
+
+@lru_cache(maxsize=None)
+def status_icon(color='red'):
+    """
+    Retourne l'icône de la couleur donnée, dessinée au premier appel puis
+    conservée. À appeler depuis le thread de l'interface graphique.
+
+    Paramètres :
+        color (str ou tuple) :
+        La couleur du polygone. Par défaut 'red'.
+
+    Retourne :
+        QIcon : L'icône partagée pour cette couleur.
+    """
+    return create_icon_image(color)
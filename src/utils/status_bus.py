@@ -0,0 +1,129 @@
+"""
+Module de transmission des résultats de transfert à l'interface graphique.
+
+Les résultats arrivent depuis les threads de téléchargement ; Qt interdit
+de toucher aux widgets hors du thread de l'interface. Le StatusBus
+accumule les résultats sous verrou et les transmet au thread de
+l'interface par des signaux, regroupés pour ne pas dépasser un nombre
+donné de mises à jour par seconde : une rafale de 10 000 fichiers produit
+quelques dizaines de rafraîchissements au lieu de 10 000.
+"""
+
+import threading
+import time
+
+from PyQt5.QtCore import QObject, Qt, QTimer, pyqtSignal
+
+
+class StatusBus(QObject):
+    """
+    Regroupe les résultats de transfert et les émet dans le thread de
+    l'interface graphique.
+
+    Les méthodes `post_result` et `post_failure` peuvent être appelées
+    depuis n'importe quel thread ; les signaux sont toujours émis dans le
+    thread propriétaire du bus.
+
+    Attributs
+    ---------
+    results_ready : pyqtSignal(int, int, bool)
+        Émis avec le nombre de transferts réussis et échoués depuis
+        l'émission précédente, et l'état du dernier transfert.
+    failures_ready : pyqtSignal(list)
+        Émis avec les couples `(chemin, erreur)` des fichiers abandonnés
+        après toutes les tentatives depuis l'émission précédente.
+    interval : float
+        Le délai minimal, en secondes, entre deux émissions.
+    """
+
+    results_ready = pyqtSignal(int, int, bool)
+    failures_ready = pyqtSignal(list)
+    _wake = pyqtSignal()
+
+    def __init__(self, max_rate=10, parent=None):
+        """
+        Initialise le bus.
+
+        Paramètres
+        ----------
+        max_rate : float, optional
+            Le nombre maximal d'émissions par seconde. Par défaut, 10.
+        parent : QObject, optional
+            L'objet Qt parent, dont le thread reçoit les signaux.
+        """
+        super().__init__(parent)
+        self.interval = 1.0 / max(float(max_rate), 0.001)
+        self._lock = threading.Lock()
+        self._succeeded = 0
+        self._failed = 0
+        self._last_success = True
+        self._failures = []
+        self._scheduled = False
+        self._last_flush = 0.0
+        self._wake.connect(self._schedule, Qt.QueuedConnection)
+
+    def post_result(self, success):
+        """
+        Enregistre le résultat d'un transfert.
+
+        Paramètres
+        ----------
+        success : bool
+            Indique si le transfert a réussi.
+        """
+        with self._lock:
+            if success:
+                self._succeeded += 1
+            else:
+                self._failed += 1
+            self._last_success = success
+            self._request_flush()
+
+    def post_failure(self, file_path, error=None):
+        """
+        Enregistre un fichier abandonné après toutes les tentatives.
+
+        Paramètres
+        ----------
+        file_path : str
+            Chemin du fichier.
+        error : str, optional
+            La dernière erreur rencontrée.
+        """
+        with self._lock:
+            self._failures.append((file_path, error))
+            self._request_flush()
+
+    def _request_flush(self):
+        """
+        Demande une émission, si aucune n'est déjà prévue. Appelée sous
+        verrou.
+        """
+        if not self._scheduled:
+            self._scheduled = True
+            self._wake.emit()
+
+    def _schedule(self):
+        """
+        Programme l'émission dans le thread de l'interface, au plus tôt
+        `interval` secondes après la précédente.
+        """
+        delay = self._last_flush + self.interval - time.monotonic()
+        QTimer.singleShot(max(0, int(delay * 1000)), self.flush)
+
+    def flush(self):
+        """
+        Émet les résultats accumulés. À appeler depuis le thread de
+        l'interface.
+        """
+        with self._lock:
+            succeeded, failed = self._succeeded, self._failed
+            last_success = self._last_success
+            failures, self._failures = self._failures, []
+            self._succeeded = self._failed = 0
+            self._scheduled = False
+        self._last_flush = time.monotonic()
+        if succeeded or failed:
+            self.results_ready.emit(succeeded, failed, last_success)
+        if failures:
+            self.failures_ready.emit(failures)
@@ -6,9 +6,12 @@ Ce module fournit une fonction pour créer et afficher une icône dans la barre
 des tâches en utilisant PyQt5, avec une gestion des erreurs pour assurer
 une utilisation fiable.
 """
+import logging
 from PyQt5.QtWidgets import QSystemTrayIcon
 from PyQt5.QtGui import QIcon
 
+logger = logging.getLogger(__name__)
+
 
 def tray_icon(app, icon_path):
     """
@@ -39,12 +42,10 @@ def tray_icon(app, icon_path):
         return tray
 
     except FileNotFoundError as e:
-        print(f"Erreur : {e}")
+        logger.error("Erreur : %s", e)
         return None
 
     except (OSError, ValueError) as e:
-        print(
-            f"Une erreur inattendue s'est produite lors de la création de la "
-            f"barre des tâches : {e}"
-        )
+        logger.error("Une erreur inattendue s'est produite lors de la "
+                     "création de la barre des tâches : %s", e)
         return None
@@ -0,0 +1,3 @@
+"""
+Tests du File Watcher FTP.
+"""
@@ -0,0 +1,65 @@
+"""
+Fixtures communes des tests.
+
+Les tests utilisent un fichier de configuration et une base temporaires, et
+un serveur FTP local (pyftpdlib) démarré dans un thread.
+"""
+
+import threading
+
+import pytest
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.servers import ThreadedFTPServer
+
+from src.utils import config
+
+FTP_USER = 'user'
+FTP_PASSWORD = 'secret'
+
+
+@pytest.fixture(autouse=True)
+def config_file(tmp_path, monkeypatch):
+    """
+    Remplace config.yaml par un fichier temporaire dont la base est dans
+    `tmp_path`.
+    """
+    path = tmp_path / 'config.yaml'
+    path.write_text(
+        f"paths:\n  database: {tmp_path / 'TransferHistory.db'}\n",
+        encoding='utf-8'
+    )
+    monkeypatch.setenv(config.CONFIG_ENV_VAR, str(path))
+    monkeypatch.setattr(config, '_config_cache', None)
+    return path
+
+
+@pytest.fixture
+def ftp_server(tmp_path, monkeypatch):
+    """
+    Retourne une fonction qui démarre un serveur FTP local et règle
+    `ftp.port` sur son port. La fonction accepte la classe du gestionnaire
+    de commandes et les droits de l'utilisateur, et retourne le répertoire
+    racine du serveur.
+    """
+    servers = []
+
+    def start(handler=FTPHandler, perm='elradfmwMT'):
+        root = tmp_path / 'ftproot'
+        root.mkdir()
+        authorizer = DummyAuthorizer()
+        authorizer.add_user(FTP_USER, FTP_PASSWORD, str(root), perm=perm)
+        handler = type(handler.__name__, (handler,),
+                       {'authorizer': authorizer})
+        server = ThreadedFTPServer(('127.0.0.1', 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        servers.append((server, thread))
+        monkeypatch.setitem(config.get_config(), 'ftp',
+                            {'port': server.socket.getsockname()[1]})
+        return root
+
+    yield start
+    for server, thread in servers:
+        server.close_all()
+        thread.join(5)
@@ -0,0 +1,125 @@
+"""
+Tests du moteur de transfert asynchrone contre un serveur pyftpdlib.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+
+from src.core.async_ftp import AsyncFTPManager
+from src.core.ftp_manager import create_ftp_manager
+from src.utils import config
+from tests.conftest import FTP_PASSWORD, FTP_USER
+
+
+class CountingHandler(FTPHandler):
+    """
+    Gestionnaire de commandes qui compte les connexions authentifiées et
+    peut couper la connexion de contrôle au premier STOR reçu.
+    """
+
+    logins = 0
+    drop_next_stor = False
+
+    def on_login(self, username):
+        CountingHandler.logins += 1
+
+    def ftp_STOR(self, file, mode='w'):
+        if CountingHandler.drop_next_stor:
+            CountingHandler.drop_next_stor = False
+            self.close()
+            return None
+        return super().ftp_STOR(file, mode)
+
+
+@pytest.fixture
+def async_manager(ftp_server):
+    """
+    Démarre le serveur de test et retourne une fonction qui crée un
+    gestionnaire du moteur `async` connecté à ce serveur.
+    """
+    CountingHandler.logins = 0
+    CountingHandler.drop_next_stor = False
+    managers = []
+    root = ftp_server(CountingHandler)
+
+    def make(**settings):
+        ftp = config.get_config()['ftp']
+        ftp.update(engine='async', **settings)
+        manager = create_ftp_manager(pool_size=1)
+        manager.configure('127.0.0.1', FTP_USER, FTP_PASSWORD)
+        managers.append(manager)
+        return manager
+
+    make.root = root
+    yield make
+    for manager in managers:
+        manager.close()
+
+
+def write_file(tmp_path, name, data):
+    path = tmp_path / 'upload' / name
+    path.parent.mkdir(exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_async_engine_uploads_and_reuses_the_session(async_manager,
+                                                     tmp_path):
+    manager = async_manager()
+    assert isinstance(manager, AsyncFTPManager)
+    for index in range(3):
+        path = write_file(tmp_path, f'{index}.txt', os.urandom(1000))
+        assert manager.upload_to_ftp(path)
+        assert (async_manager.root / f'{index}.txt').read_bytes() == (
+            open(path, 'rb').read())
+    assert CountingHandler.logins == 1
+
+
+def test_dead_session_is_replaced_once(async_manager, tmp_path):
+    manager = async_manager()
+    path = write_file(tmp_path, 'a.txt', b'payload')
+    CountingHandler.drop_next_stor = True
+    stats = {}
+    assert manager.upload_to_ftp(path, stats), stats
+    assert (async_manager.root / 'a.txt').read_bytes() == b'payload'
+    assert CountingHandler.logins == 2
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/mem'),
+                    reason="requires /proc/self/mem")
+def test_local_read_error_is_not_retried(async_manager):
+    # La lecture de /proc/self/mem à l'adresse 0 échoue (EIO).
+    manager = async_manager()
+    stats = {}
+    assert not manager.upload_to_ftp('/proc/self/mem', stats)
+    assert stats['error_class'] == 'OSError'
+    assert CountingHandler.logins == 1
+    # La session interrompue n'est pas réutilisée, et son emprunt est
+    # rendu.
+    assert not manager._idle
+    assert manager._slots._value == manager.max_sessions
+
+
+def test_close_cancels_pending_uploads(async_manager, tmp_path):
+    manager = async_manager(bandwidth_limit=10000)
+    path = write_file(tmp_path, 'slow.bin', os.urandom(200000))
+    results = []
+    stats = {}
+    thread = threading.Thread(
+        target=lambda: results.append(manager.upload_to_ftp(path, stats)))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not manager._futures and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2)
+    started = time.monotonic()
+    manager.close()
+    thread.join(5)
+    assert time.monotonic() - started < 5
+    assert results == [False]
+    assert stats['error_class'] == 'ConnectionAbortedError'
+    assert not manager.upload_to_ftp(path)
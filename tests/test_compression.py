@@ -0,0 +1,116 @@
+"""
+Tests de la compression des fichiers à la volée.
+"""
+
+import gzip
+import io
+import os
+
+import pytest
+
+from src.core import compression
+from src.core.compression import CompressionPolicy, send_compressed
+from src.core.ftp_manager import FTPManager
+from src.core.transfer_queue import TransferQueue
+from src.database.db_manager import DBManager
+from src.utils import config
+from tests.conftest import FTP_PASSWORD, FTP_USER
+
+DATA = b'date;value\n' + b''.join(
+    f'2024-01-01;{index}\n'.encode() for index in range(20000))
+
+
+class FakeConnection:
+    """
+    Connexion de données qui retient les octets envoyés.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def sendall(self, data):
+        self.data += data
+
+
+def test_policy_selects_files_by_extension_and_size():
+    policy = CompressionPolicy('gzip', extensions=['CSV', '.log'],
+                               min_size=100)
+    assert policy.codec_for('/data/a.csv', 100).name == 'gzip'
+    assert policy.codec_for('/data/b.LOG', 1000).suffix == '.gz'
+    assert policy.codec_for('/data/a.csv', 99) is None
+    assert policy.codec_for('/data/a.txt', 1000) is None
+    assert CompressionPolicy('gzip').codec_for('/data/a', 0) is not None
+    assert CompressionPolicy().codec_for('/data/a.csv', 1000) is None
+    assert CompressionPolicy('lzma').codec is None
+
+
+def test_zstd_falls_back_to_gzip_without_zstandard(monkeypatch):
+    def missing(level=3):
+        raise ImportError("zstd compression requires the zstandard package")
+
+    monkeypatch.setattr(compression, 'zstd_codec', missing)
+    assert CompressionPolicy('zstd', level=19).codec.name == 'gzip'
+
+
+@pytest.mark.parametrize('block_size', [7, 4096, 1 << 20])
+def test_gzip_stream_round_trips(block_size):
+    conn = FakeConnection()
+    codec = CompressionPolicy('gzip').codec
+    sent = send_compressed(conn, io.BytesIO(DATA), codec, block_size)
+    assert sent == len(conn.data) < len(DATA)
+    assert gzip.decompress(bytes(conn.data)) == DATA
+
+
+def test_zstd_stream_round_trips():
+    zstandard = pytest.importorskip('zstandard')
+    conn = FakeConnection()
+    codec = CompressionPolicy('zstd').codec
+    assert codec.suffix == '.zst'
+    send_compressed(conn, io.BytesIO(DATA), codec, 4096)
+    reader = zstandard.ZstdDecompressor().stream_reader(bytes(conn.data))
+    assert reader.read() == DATA
+
+
+def test_compressed_upload_is_recorded_with_its_sent_size(
+        ftp_server, tmp_path, monkeypatch):
+    root = ftp_server()
+    monkeypatch.setitem(config.get_config(), 'compression', {
+        'enabled': True, 'algorithm': 'gzip', 'extensions': ['.csv'],
+        'min_size': 1024})
+    path = tmp_path / 'upload' / 'data.csv'
+    path.parent.mkdir()
+    path.write_bytes(DATA)
+    small = path.with_name('small.csv')
+    small.write_bytes(b'a;b\n')
+
+    store = DBManager()
+    manager = FTPManager(pool_size=1)
+    manager.configure('127.0.0.1', FTP_USER, FTP_PASSWORD)
+
+    def on_result(file_path, success, file_size, duration_ms,
+                  compressed_size):
+        store.record_transfer(os.path.basename(file_path),
+                              status='Success' if success else 'Failure',
+                              file_size=file_size, duration_ms=duration_ms,
+                              compressed_size=compressed_size)
+
+    queue = TransferQueue(1, manager, on_result)
+    try:
+        assert manager.remote_path(str(path)) == 'data.csv.gz'
+        queue._process(str(path))
+        queue._process(str(small))
+        assert store.recorder.flush(timeout=10)
+    finally:
+        manager.close()
+        store.recorder.close()
+
+    sent = (root / 'data.csv.gz').read_bytes()
+    assert gzip.decompress(sent) == DATA
+    assert (root / 'small.csv').read_bytes() == b'a;b\n'
+    rows = store.connect().execute("""
+        SELECT FileName, Status, FileSize, CompressedSize
+        FROM FileTransfers ORDER BY ID
+    """).fetchall()
+    assert rows == [('data.csv', 'Success', len(DATA), len(sent)),
+                    ('small.csv', 'Success', 4, None)]
+
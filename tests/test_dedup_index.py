@@ -0,0 +1,107 @@
+"""
+Tests de l'index de déduplication des téléchargements.
+"""
+
+import hashlib
+import os
+
+import pytest
+
+from src.core import dedup_index
+from src.core.dedup_index import DedupIndex, file_digest
+from src.database.db_manager import DBManager
+
+
+@pytest.fixture
+def digests(monkeypatch):
+    """
+    Compte les calculs d'empreinte.
+    """
+    calls = []
+    original = dedup_index.file_digest
+
+    def counting_digest(file_path, chunk_size):
+        calls.append(file_path)
+        return original(file_path, chunk_size)
+
+    monkeypatch.setattr(dedup_index, 'file_digest', counting_digest)
+    return calls
+
+
+@pytest.fixture
+def index():
+    return DedupIndex(DBManager(), chunk_size=4)
+
+
+def upload(index, path, remote_path):
+    """
+    Simule un téléchargement réussi : consulte puis enregistre l'index.
+    """
+    unchanged, fingerprint = index.check(str(path), remote_path)
+    if not unchanged:
+        index.record(str(path), remote_path, fingerprint)
+    return unchanged
+
+
+def test_file_digest_reads_in_chunks(tmp_path):
+    path = tmp_path / 'a.bin'
+    data = os.urandom(1000)
+    path.write_bytes(data)
+    assert file_digest(str(path), chunk_size=7) == (
+        hashlib.blake2b(data).hexdigest())
+
+
+def test_unchanged_file_is_skipped_without_hashing(index, digests, tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'content')
+    assert not upload(index, path, 'a.txt')
+    assert len(digests) == 1
+    assert upload(index, path, 'a.txt')
+    assert len(digests) == 1
+
+
+def test_touched_file_with_same_content_is_skipped(index, digests, tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'content')
+    upload(index, path, 'a.txt')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert upload(index, path, 'a.txt')
+    assert len(digests) == 2
+    # La nouvelle date est mémorisée : pas de nouveau calcul.
+    assert upload(index, path, 'a.txt')
+    assert len(digests) == 2
+
+
+def test_modified_file_is_uploaded(index, tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'content')
+    upload(index, path, 'a.txt')
+    path.write_bytes(b'other content')
+    assert not upload(index, path, 'a.txt')
+
+
+def test_only_the_latest_upload_to_a_remote_path_counts(index, tmp_path):
+    first, second = tmp_path / 'one' / 'a.txt', tmp_path / 'two' / 'a.txt'
+    for path, data in ((first, b'first'), (second, b'second')):
+        path.parent.mkdir()
+        path.write_bytes(data)
+    upload(index, first, 'a.txt')
+    upload(index, second, 'a.txt')
+    # Le serveur contient le second fichier : le premier doit être renvoyé.
+    assert not upload(index, first, 'a.txt')
+    assert not upload(index, second, 'a.txt')
+    assert upload(index, second, 'a.txt')
+
+
+def test_forget_forces_the_next_upload(index, tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'content')
+    upload(index, path, 'a.txt')
+    index.forget('a.txt')
+    assert not upload(index, path, 'a.txt')
+
+
+def test_missing_file_is_not_skipped(index, tmp_path):
+    assert index.check(str(tmp_path / 'missing.txt'), 'missing.txt') == (
+        False, None)
@@ -0,0 +1,153 @@
+"""
+Tests des envois reprenables et segmentés de FTPManager contre un serveur
+pyftpdlib.
+"""
+
+import logging
+import os
+
+import pytest
+from pyftpdlib.handlers import DTPHandler, FTPHandler
+
+from src.core.ftp_manager import FTPManager
+from src.database.db_manager import DBManager
+from tests.conftest import FTP_PASSWORD, FTP_USER
+
+SIZE = 8 * 1024 * 1024
+
+
+class InterruptingDTPHandler(DTPHandler):
+    """
+    Canal de données qui interrompt le premier envoi reçu après
+    `interrupt_after` octets, comme une connexion perdue.
+    """
+
+    interrupt_after = None
+
+    def handle_read(self):
+        super().handle_read()
+        limit = InterruptingDTPHandler.interrupt_after
+        if (limit is not None and not self._closed
+                and self.tot_bytes_received >= limit):
+            InterruptingDTPHandler.interrupt_after = None
+            self._resp = ("426 Connection lost; transfer aborted.",
+                          logging.getLogger(__name__).debug)
+            self.close()
+
+    handle_read_event = handle_read
+
+
+class RecordingHandler(FTPHandler):
+    """
+    Gestionnaire de commandes qui retient les décalages REST reçus et la
+    taille des fichiers partiels.
+    """
+
+    dtp_handler = InterruptingDTPHandler
+    rest_offsets = []
+    partial_sizes = []
+
+    def ftp_REST(self, line):
+        RecordingHandler.rest_offsets.append(int(line))
+        return super().ftp_REST(line)
+
+    def on_incomplete_file_received(self, file):
+        RecordingHandler.partial_sizes.append(os.path.getsize(file))
+
+
+@pytest.fixture
+def payload(tmp_path):
+    """
+    Écrit un fichier local de `SIZE` octets aléatoires.
+    """
+    path = tmp_path / 'upload' / 'large.bin'
+    path.parent.mkdir()
+    path.write_bytes(os.urandom(SIZE))
+    return path
+
+
+def make_manager(**attributes):
+    """
+    Crée un FTPManager reprenable connecté au serveur de test.
+    """
+    manager = FTPManager(pool_size=2, offset_store=DBManager())
+    manager.resume_threshold = 0
+    for name, value in attributes.items():
+        setattr(manager, name, value)
+    manager.configure('127.0.0.1', FTP_USER, FTP_PASSWORD)
+    return manager
+
+
+def test_interrupted_upload_resumes_at_remote_size(ftp_server, payload):
+    root = ftp_server(RecordingHandler)
+    RecordingHandler.rest_offsets = []
+    RecordingHandler.partial_sizes = []
+    InterruptingDTPHandler.interrupt_after = SIZE // 4
+    manager = make_manager()
+    try:
+        stats = {}
+        assert manager.upload_to_ftp(str(payload), stats), stats
+    finally:
+        manager.close()
+
+    assert len(RecordingHandler.partial_sizes) == 1
+    partial = RecordingHandler.partial_sizes[0]
+    assert 0 < partial < SIZE
+    # La reprise part de la taille confirmée par SIZE.
+    assert RecordingHandler.rest_offsets == [partial]
+    assert (root / 'large.bin').read_bytes() == payload.read_bytes()
+    assert manager.offset_store.get_resume_offset(
+        'large.bin', str(payload), SIZE, payload.stat().st_mtime_ns) is None
+
+
+class SparseRestHandler(FTPHandler):
+    """
+    Gestionnaire de commandes qui accepte REST au-delà de la fin du
+    fichier, en l'agrandissant, comme les serveurs compatibles avec l'envoi
+    segmenté.
+    """
+
+    def ftp_STOR(self, file, mode='w'):
+        offset = self._restart_position
+        if offset and 'a' not in mode and os.path.getsize(file) < offset:
+            os.truncate(file, offset)
+        return super().ftp_STOR(file, mode)
+
+
+def test_segmented_upload_reassembles_file(ftp_server, payload):
+    root = ftp_server(SparseRestHandler)
+    manager = make_manager(segment_threshold=1, segments=4)
+    try:
+        stats = {}
+        assert manager.upload_to_ftp(str(payload), stats), stats
+        assert manager._segments_supported is True
+    finally:
+        manager.close()
+    assert (root / 'large.bin').read_bytes() == payload.read_bytes()
+
+
+def test_segmented_upload_falls_back_when_rest_past_eof_is_refused(
+        ftp_server, payload):
+    # pyftpdlib refuse REST au-delà de la fin du fichier (554).
+    root = ftp_server()
+    manager = make_manager(segment_threshold=1, segments=4)
+    try:
+        stats = {}
+        assert manager.upload_to_ftp(str(payload), stats), stats
+        assert manager._segments_supported is False
+    finally:
+        manager.close()
+    assert (root / 'large.bin').read_bytes() == payload.read_bytes()
+
+
+def test_segmented_upload_refused_by_permissions_keeps_segments(
+        ftp_server, payload):
+    ftp_server(SparseRestHandler, perm='elr')
+    manager = make_manager(segment_threshold=1, segments=4)
+    try:
+        stats = {}
+        assert not manager.upload_to_ftp(str(payload), stats)
+        assert stats['error'].startswith('550')
+        assert manager._segments_supported is not False
+    finally:
+        manager.close()
@@ -0,0 +1,78 @@
+"""
+Tests du pool de connexions FTP contre un serveur pyftpdlib.
+"""
+
+import time
+from ftplib import error_perm
+
+import pytest
+
+from src.core.ftp_pool import FTPConnectionPool
+from src.utils.config import get_setting
+from tests.conftest import FTP_PASSWORD, FTP_USER
+
+
+def make_pool(**options):
+    """
+    Crée un pool de connexions vers le serveur de test.
+    """
+    return FTPConnectionPool('127.0.0.1', FTP_USER, FTP_PASSWORD,
+                             port=get_setting('ftp', 'port'), **options)
+
+
+def test_permission_error_keeps_the_session(ftp_server):
+    ftp_server()
+    pool = make_pool(max_size=1)
+    try:
+        with pytest.raises(error_perm):
+            with pool.connection() as client:
+                client.voidcmd('TYPE I')
+                client.size('missing.bin')
+        with pool.connection() as reused:
+            assert reused is client
+            reused.voidcmd('NOOP')
+    finally:
+        pool.close()
+
+
+def test_close_stops_the_keepalive_thread(ftp_server):
+    ftp_server()
+    pool = make_pool(max_size=2, keepalive_interval=0.01)
+    clients = [pool.acquire(), pool.acquire()]
+    for client in clients:
+        pool.release(client)
+    thread = pool._keepalive_thread
+    time.sleep(0.1)
+    pool.close()
+    assert not thread.is_alive()
+    assert not pool._idle
+    assert pool._open_count == 0
+
+
+def test_unexpected_error_discards_the_session(ftp_server):
+    ftp_server()
+    pool = make_pool(max_size=1)
+    try:
+        with pytest.raises(RuntimeError):
+            with pool.connection() as client:
+                raise RuntimeError("interrupted transfer")
+        assert not pool._idle
+        assert pool._open_count == 0
+        with pool.connection() as reopened:
+            assert reopened is not client
+    finally:
+        pool.close()
+
+
+def test_non_positive_keepalive_interval_disables_the_thread(ftp_server):
+    ftp_server()
+    pool = make_pool(max_size=1, keepalive_interval=0)
+    try:
+        with pool.connection() as client:
+            client.voidcmd('NOOP')
+        assert pool._keepalive_thread is None
+        # Sans maintien, la connexion inactive est vérifiée puis réutilisée.
+        with pool.connection() as reused:
+            assert reused is client
+    finally:
+        pool.close()
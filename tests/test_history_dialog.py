@@ -0,0 +1,140 @@
+"""
+Tests du modèle paginé et du rafraîchissement de l'historique des
+transferts.
+"""
+
+import pytest
+from PyQt5.QtCore import QModelIndex, Qt
+
+from src.database.db_manager import DBManager
+from src.gui.history_dialog import HistoryTableModel
+
+
+class CountingStore:
+    """
+    Enveloppe d'un DBManager qui compte les pages lues.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self.page_reads = []
+
+    def get_history_page(self, start_key=None, limit=500, inclusive=False):
+        self.page_reads.append((start_key, inclusive))
+        return self._store.get_history_page(start_key, limit, inclusive)
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+
+def add_transfers(store, count, start=0):
+    """
+    Ajoute `count` transferts, trois par seconde, pour que des lignes
+    partagent la même date.
+    """
+    connection = store.connect()
+    with connection:
+        connection.executemany("""
+            INSERT INTO FileTransfers (FileName, TransferDate, Status)
+            VALUES (?, ?, ?)
+        """, [(f'file{index}.txt',
+               f'2024-01-01 10:{index // 180:02d}:{index // 3 % 60:02d}',
+               'Success' if index % 4 else 'Failure')
+              for index in range(start, start + count)])
+
+
+@pytest.fixture
+def store():
+    return DBManager()
+
+
+def displayed_ids(model):
+    return [int(model.data(model.index(row, 0)))
+            for row in range(model.rowCount())]
+
+
+def test_history_pages_follow_the_key_without_gaps(store):
+    add_transfers(store, 25)
+    pages, key = [], None
+    while True:
+        page = store.get_history_page(key, limit=4)
+        if not page:
+            break
+        pages.append(page)
+        key = (page[-1][2], page[-1][0])
+    ids = [row[0] for page in pages for row in page]
+    assert ids == list(range(25, 0, -1))
+    # `inclusive` relit une page à partir de sa première clé.
+    first = pages[2][0]
+    assert store.get_history_page((first[2], first[0]), 4,
+                                  inclusive=True) == pages[2]
+
+
+def test_model_fetches_pages_while_scrolling(store):
+    add_transfers(store, 10)
+    model = HistoryTableModel(store, page_size=4)
+    model.reload()
+    assert model.rowCount() == 4
+    while model.canFetchMore(QModelIndex()):
+        model.fetchMore(QModelIndex())
+    assert displayed_ids(model) == list(range(10, 0, -1))
+    assert model.data(model.index(0, 1)) == 'file9.txt'
+    assert model.data(model.index(0, 4)) is None
+    assert model.data(model.index(3, 3), Qt.BackgroundRole) is not None
+
+
+def test_evicted_page_is_read_again_from_its_key(store):
+    add_transfers(store, 12)
+    counting = CountingStore(store)
+    model = HistoryTableModel(counting, page_size=3, max_pages=2)
+    model.reload()
+    while model.canFetchMore(QModelIndex()):
+        model.fetchMore(QModelIndex())
+    assert model.rowCount() == 12
+    reads = len(counting.page_reads)
+    # Seules les deux dernières pages sont en mémoire.
+    assert model.data(model.index(11, 0)) == '1'
+    assert len(counting.page_reads) == reads
+    assert model.data(model.index(1, 0)) == '11'
+    assert counting.page_reads[-1] == (('2024-01-01 10:00:03', 12), True)
+    assert len(counting.page_reads) == reads + 1
+    assert model.data(model.index(0, 0)) == '12'
+    assert len(counting.page_reads) == reads + 1
+    assert displayed_ids(model) == list(range(12, 0, -1))
+
+
+def test_refresh_adds_new_transfers_on_top(store):
+    add_transfers(store, 5)
+    counting = CountingStore(store)
+    model = HistoryTableModel(counting, page_size=10)
+    model.reload()
+    reads = len(counting.page_reads)
+    assert model.refresh() == 0
+
+    add_transfers(store, 2, start=5)
+    assert model.refresh() == 2
+    assert displayed_ids(model) == [7, 6, 5, 4, 3, 2, 1]
+    add_transfers(store, 1, start=7)
+    assert model.refresh() == 1
+    assert displayed_ids(model) == [8, 7, 6, 5, 4, 3, 2, 1]
+    # Le rafraîchissement ne relit pas les pages déjà affichées.
+    assert len(counting.page_reads) == reads
+
+
+def test_refresh_reloads_after_too_many_new_transfers(store):
+    add_transfers(store, 3)
+    model = HistoryTableModel(store, page_size=2, max_pages=2)
+    model.reload()
+    add_transfers(store, 5, start=3)
+    assert model.refresh() == 5
+    # Rechargé : seule la première page est lue.
+    assert displayed_ids(model) == [8, 7]
+    assert model.refresh() == 0
+
+
+def test_history_since_reads_after_the_watermark(store):
+    add_transfers(store, 6)
+    assert store.get_last_transfer_id() == 6
+    assert [row[0] for row in store.get_history_since(3)] == [4, 5, 6]
+    assert [row[0] for row in store.get_history_since(3, limit=2)] == [4, 5]
+    assert store.get_history_since(6) == []
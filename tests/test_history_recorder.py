@@ -0,0 +1,92 @@
+"""
+Tests de l'écrivain de l'historique des transferts.
+"""
+
+import sqlite3
+import threading
+
+from src.database.db_manager import DBManager
+from src.database.history_recorder import HistoryRecorder
+
+
+def test_batch_is_retried_while_the_database_is_locked(monkeypatch):
+    db_path = DBManager().db_path
+    open_connection = HistoryRecorder._open
+
+    def open_without_busy_wait(self):
+        connection = open_connection(self)
+        connection.execute("PRAGMA busy_timeout = 0")
+        return connection
+
+    monkeypatch.setattr(HistoryRecorder, '_open', open_without_busy_wait)
+    recorder = HistoryRecorder(db_path, retry_delay=0.1)
+    blocker = sqlite3.connect(db_path, isolation_level=None,
+                              check_same_thread=False)
+    blocker.execute("BEGIN EXCLUSIVE")
+    unlock = threading.Timer(0.3, blocker.execute, args=("COMMIT",))
+    unlock.start()
+    try:
+        recorder.record('a.txt', 'Success', file_size=10)
+        recorder.record('b.txt', 'Failure')
+        assert recorder.flush(timeout=10)
+    finally:
+        unlock.join()
+        recorder.close()
+        blocker.close()
+
+    with sqlite3.connect(db_path) as connection:
+        rows = connection.execute(
+            "SELECT FileName, Status FROM FileTransfers ORDER BY FileName"
+        ).fetchall()
+    assert rows == [('a.txt', 'Success'), ('b.txt', 'Failure')]
+
+
+def test_flush_returns_when_the_database_cannot_be_opened(tmp_path):
+    recorder = HistoryRecorder(str(tmp_path / 'missing' / 'history.db'))
+    try:
+        recorder.record('a.txt', 'Success')
+        assert not recorder.flush()
+        assert isinstance(recorder.error, sqlite3.Error)
+        # Les enregistrements suivants ne s'accumulent pas.
+        pending = recorder._queue.qsize()
+        recorder.record('b.txt', 'Success')
+        assert recorder._queue.qsize() == pending
+        assert not recorder.flush(timeout=1)
+    finally:
+        recorder.close()
+
+
+def test_rollups_and_hotspots_are_updated_with_each_batch():
+    store = DBManager()
+    recorder = HistoryRecorder(store.db_path, flush_interval=0.05)
+    transfers = [
+        ('a.txt', 'Success', '2024-01-01 10:05:00', 1000, 200),
+        ('b.TXT', 'Failure', '2024-01-01 10:30:00', None, 5000),
+        ('c.bin', 'Success', '2024-01-01 11:00:00', 3000, 300),
+        ('d', 'Failure', '2024-01-01 11:59:59', None, None),
+        ('e.txt', 'Failure', '2024-01-02 00:00:00', None, 100),
+    ]
+    try:
+        for file_name, status, date, size, duration in transfers[:2]:
+            recorder.record(file_name, status, date, size, duration)
+        assert recorder.flush(timeout=10)
+        for file_name, status, date, size, duration in transfers[2:]:
+            recorder.record(file_name, status, date, size, duration)
+        assert recorder.flush(timeout=10)
+    finally:
+        recorder.close()
+
+    # (Bucket, Successes, Failures, Bytes, DurationMs, TimedTransfers,
+    #  SuccessDurationMs)
+    assert store.get_rollups('hour') == [
+        ('2024-01-02 00:00', 0, 1, 0, 100, 1, 0),
+        ('2024-01-01 11:00', 1, 1, 3000, 300, 1, 300),
+        ('2024-01-01 10:00', 1, 1, 1000, 5200, 2, 200),
+    ]
+    assert store.get_rollups('day', limit=1) == [
+        ('2024-01-02', 0, 1, 0, 100, 1, 0)]
+    assert store.get_rollups('day')[1] == (
+        '2024-01-01', 2, 2, 4000, 5500, 3, 500)
+    assert store.get_failure_hotspots('2024-01-01') == [
+        ('.txt', 2), ('', 1)]
+    assert store.get_failure_hotspots('2024-01-02') == [('.txt', 1)]
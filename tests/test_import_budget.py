@@ -0,0 +1,97 @@
+"""
+Contrôle du temps d'importation des points d'entrée de l'application.
+
+Chaque module est importé dans un nouveau processus Python lancé avec
+`-X importtime`, depuis un répertoire temporaire vide. Le test échoue si :
+
+- le temps cumulé d'importation dépasse le budget du module ;
+- un module lourd ou facultatif interdit est chargé (PyQt5, tkinter, PIL,
+  PyYAML, zstandard selon le point d'entrée) ;
+- l'importation crée un fichier, par exemple la base de données.
+
+Le meilleur de plusieurs lancements est retenu. Les autres tests laissant
+des threads actifs, les budgets sont multipliés par `IMPORT_BUDGET_SCALE`
+(1,5 par défaut) ; fixez-la à 1 sur une machine au repos pour le contrôle
+strict, ou plus haut sur une machine lente.
+`python -m benchmarks.importtime` affiche les mêmes mesures sous forme de
+tableau.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+_HEAVY = ('PyQt5', 'tkinter', 'PIL', 'yaml', 'zstandard')
+
+# Module importé : (budget en ms, modules interdits).
+BUDGETS = {
+    'src.utils.config': (30, _HEAVY),
+    'src.database.db_manager': (40, _HEAVY),
+    'src.core.ftp_manager': (50, _HEAVY),
+    'src.core.watch_service': (80, _HEAVY),
+    'src.daemon': (100, _HEAVY),
+    'main': (150, ('tkinter', 'PIL', 'yaml', 'zstandard')),
+}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module, cwd):
+    """
+    Importe un module dans un nouveau processus.
+
+    Retourne `(durée en ms, ensemble des modules importés)`.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    env.pop('FILE_WATCHER_CONFIG', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, env=env, capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    cumulative = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, total, name = line.split('|', 2)
+        if not total.strip().isdigit():
+            continue
+        imported.add(name.strip())
+        if name.strip() == module:
+            cumulative = int(total) / 1000
+    return cumulative, imported
+
+
+def check(module, budget, forbidden, repeat):
+    """
+    Contrôle un module et retourne `(durée en ms, liste des problèmes)`.
+    """
+    problems = []
+    timings = []
+    with tempfile.TemporaryDirectory() as cwd:
+        for _ in range(repeat):
+            elapsed, imported = measure(module, cwd)
+            timings.append(elapsed)
+        created = os.listdir(cwd)
+    elapsed = min(timings)
+    if elapsed > budget:
+        problems.append(f"{elapsed:.1f} ms > budget {budget:.0f} ms")
+    loaded = sorted(name for name in forbidden if name in imported)
+    if loaded:
+        problems.append(f"imports {', '.join(loaded)}")
+    if created:
+        problems.append(f"creates {', '.join(sorted(created))}")
+    return elapsed, problems
+
+
+@pytest.mark.parametrize('module', list(BUDGETS))
+def test_import_stays_within_budget(module):
+    budget, forbidden = BUDGETS[module]
+    budget *= float(os.environ.get('IMPORT_BUDGET_SCALE', 1.5))
+    _, problems = check(module, budget, forbidden, repeat=5)
+    assert not problems, f"{module}: {'; '.join(problems)}"
@@ -0,0 +1,111 @@
+"""
+Tests des métriques du processus et de leur exposition Prometheus.
+"""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.utils import metrics as metrics_module
+from src.utils.metrics import (MetricsRegistry, MetricsServer, begin_transfer,
+                               end_transfer, error_class, record_phase,
+                               timed_phase, transfer_phases)
+
+FAMILIES = (
+    ('uploads_total', 'counter', "Téléchargements."),
+    ('phase_seconds', 'histogram', "Durée des phases."),
+    ('queue_depth', 'gauge', "Fichiers en attente."),
+)
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry(FAMILIES, buckets=(0.1, 1.0))
+
+
+def test_counters_are_rendered_per_label_set(registry):
+    registry.inc('uploads_total', result='success')
+    registry.inc('uploads_total', 2, result='success')
+    registry.inc('uploads_total', result='fail"ure\n')
+    assert registry.render().splitlines()[:4] == [
+        '# HELP uploads_total Téléchargements.',
+        '# TYPE uploads_total counter',
+        'uploads_total{result="fail\\"ure\\n"} 1',
+        'uploads_total{result="success"} 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    for value in (0.05, 0.1, 0.5, 3.0):
+        registry.observe('phase_seconds', value, phase='connect')
+    text = registry.render()
+    assert '\n'.join([
+        'phase_seconds_bucket{phase="connect",le="0.1"} 2',
+        'phase_seconds_bucket{phase="connect",le="1"} 3',
+        'phase_seconds_bucket{phase="connect",le="+Inf"} 4',
+        'phase_seconds_sum{phase="connect"} 3.65',
+        'phase_seconds_count{phase="connect"} 4',
+    ]) in text
+
+
+def test_callbacks_are_evaluated_at_render_time(registry):
+    depths = {0: 1}
+    registry.set_callback('queue_depth', lambda: dict(depths),
+                          label='priority')
+    assert 'queue_depth{priority="0"} 1\n' in registry.render()
+    depths[2] = 5
+    text = registry.render()
+    assert 'queue_depth{priority="0"} 1\n' in text
+    assert 'queue_depth{priority="2"} 5\n' in text
+    registry.set_callback('queue_depth', lambda: 1.5)
+    assert 'queue_depth 1.5\n' in registry.render()
+
+
+def test_phases_are_collected_for_the_current_transfer(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics_module, 'metrics', registry)
+    now = [100.0]
+    monkeypatch.setattr(metrics_module.time, 'monotonic', lambda: now[0])
+
+    record_phase('queue_wait', 0.5)
+    assert transfer_phases() == {}
+    begin_transfer()
+    try:
+        with timed_phase('connect'):
+            now[0] += 0.25
+        with pytest.raises(OSError):
+            with timed_phase('connect'):
+                now[0] += 0.5
+                raise OSError("refused")
+        assert transfer_phases() == {'connect': 0.75}
+    finally:
+        end_transfer()
+    assert transfer_phases() == {}
+    text = registry.render()
+    assert ('file_watcher_phase_seconds_count{phase="connect"} 2\n'
+            in text)
+    assert ('file_watcher_phase_seconds_sum{phase="queue_wait"} 0.5\n'
+            in text)
+
+
+def test_error_class_names_exceptions():
+    assert error_class(ConnectionResetError()) == 'ConnectionResetError'
+    assert error_class("550 Permission denied") == 'UploadError'
+
+
+def test_server_exposes_the_registry(registry):
+    registry.inc('uploads_total', result='success')
+    server = MetricsServer(port=0, registry=registry)
+    server.start()
+    try:
+        base = f'http://127.0.0.1:{server.port}'
+        with urllib.request.urlopen(base + '/metrics', timeout=5) as reply:
+            assert reply.headers['Content-Type'].startswith('text/plain')
+            assert reply.read().decode('utf-8') == registry.render()
+        with pytest.raises(urllib.error.HTTPError) as raised:
+            urllib.request.urlopen(base + '/other', timeout=5)
+        assert raised.value.code == 404
+    finally:
+        server.stop()
+    assert server._thread is None
@@ -0,0 +1,38 @@
+"""
+Tests des migrations du schéma de la base de données.
+"""
+
+import sqlite3
+from contextlib import closing
+
+from src.database import migrations
+
+
+def test_success_durations_are_filled_from_the_history(monkeypatch):
+    with closing(sqlite3.connect(':memory:', isolation_level=None)) as db:
+        monkeypatch.setattr(migrations, 'MIGRATIONS',
+                            migrations.MIGRATIONS[:5])
+        assert migrations.migrate(db) == 5
+        db.executemany("""
+            INSERT INTO FileTransfers
+            (FileName, TransferDate, Status, FileSize, DurationMs)
+            VALUES (?, ?, ?, ?, ?)
+        """, [('a', '2024-01-01 10:05:00', 'Success', 100, 1000),
+              ('b', '2024-01-01 10:59:59', 'Failure', None, 5000),
+              ('c', '2024-01-01 11:00:00', 'Success', 10, 500),
+              ('d', '2024-01-02 00:00:00', 'Success', 10, 50)])
+        db.execute("""
+            INSERT INTO TransferRollups (Granularity, Bucket, Successes)
+            VALUES ('hour', '2024-01-01 10:00', 1),
+                   ('hour', '2024-01-01 11:00', 1),
+                   ('day', '2024-01-01', 2)
+        """)
+        monkeypatch.undo()
+
+        assert migrations.migrate(db) == migrations.MIGRATIONS[-1][0]
+        assert db.execute("""
+            SELECT Granularity, Bucket, SuccessDurationMs
+            FROM TransferRollups ORDER BY Granularity, Bucket
+        """).fetchall() == [('day', '2024-01-01', 1500),
+                            ('hour', '2024-01-01 10:00', 1000),
+                            ('hour', '2024-01-01 11:00', 500)]
@@ -0,0 +1,139 @@
+"""
+Tests de la file durable des téléchargements.
+"""
+
+import queue
+
+import pytest
+
+from src.core.outbox import (DEAD, HELD, IN_FLIGHT, PENDING, RETRY,
+                             TransferOutbox)
+from src.database.db_manager import DBManager
+
+
+@pytest.fixture
+def store():
+    return DBManager()
+
+
+@pytest.fixture
+def submitted():
+    return queue.Queue()
+
+
+def make_outbox(store, submitted, **options):
+    """
+    Crée une file démarrée dont les soumissions sont placées dans
+    `submitted`.
+    """
+    outbox = TransferOutbox(store, **options)
+    outbox.start(submitted.put)
+    return outbox
+
+
+def test_restart_resumes_pending_in_flight_and_held_files(store, submitted):
+    outbox = TransferOutbox(store)
+    for path in ('pending.txt', 'in_flight.txt', 'held.txt', 'retry.txt'):
+        assert outbox.add(path)
+    outbox.begin('in_flight.txt')
+    outbox.release('held.txt')
+    outbox.begin('retry.txt')
+    outbox.fail('retry.txt', "timeout")
+
+    # Redémarrage après un plantage : une nouvelle file sur la même base.
+    restarted = make_outbox(store, submitted, base_delay=3600)
+    try:
+        assert restarted.resume() == 3
+    finally:
+        restarted.stop()
+    assert sorted(submitted.queue) == [
+        'held.txt', 'in_flight.txt', 'pending.txt']
+    for path in submitted.queue:
+        assert store.get_outbox_entry(path) == (PENDING, 0)
+    assert store.get_outbox_entry('retry.txt') == (RETRY, 1)
+
+
+def test_backoff_doubles_up_to_max_delay(store):
+    outbox = TransferOutbox(store, base_delay=10, max_delay=35)
+    for attempts, delay in ((1, 10), (2, 20), (3, 35), (8, 35)):
+        for _ in range(20):
+            assert delay / 2 <= outbox.backoff(attempts) <= delay
+
+
+def test_failed_upload_is_retried_then_dead_lettered(store, submitted):
+    dead = []
+    outbox = make_outbox(store, submitted, max_retries=1, base_delay=0.01,
+                         on_dead_letter=lambda *args: dead.append(args))
+    try:
+        assert outbox.add('a.txt')
+        outbox.begin('a.txt')
+        assert outbox.fail('a.txt', "refused")
+        assert store.get_outbox_entry('a.txt') == (RETRY, 1)
+        assert submitted.get(timeout=5) == 'a.txt'
+        assert store.get_outbox_entry('a.txt') == (PENDING, 1)
+
+        outbox.begin('a.txt')
+        assert not outbox.fail('a.txt', "refused again")
+    finally:
+        outbox.stop()
+    assert store.get_outbox_entry('a.txt') == (DEAD, 2)
+    assert dead == [('a.txt', "refused again")]
+    assert submitted.empty()
+
+
+def test_file_reported_again_keeps_its_attempts(store, submitted):
+    outbox = TransferOutbox(store, max_retries=1, base_delay=3600)
+    outbox.add('a.txt')
+    outbox.begin('a.txt')
+    outbox.fail('a.txt', "refused")
+    assert outbox.add('a.txt')
+    assert store.get_outbox_entry('a.txt') == (PENDING, 1)
+    outbox.begin('a.txt')
+    assert not outbox.fail('a.txt', "refused")
+    # Un fichier abandonné puis modifié a droit à une nouvelle tentative.
+    assert outbox.add('a.txt')
+    assert store.get_outbox_entry('a.txt') == (PENDING, 2)
+
+
+def test_file_modified_while_in_flight_is_submitted_after_the_attempt(
+        store, submitted):
+    outbox = make_outbox(store, submitted, base_delay=3600)
+    try:
+        outbox.add('a.txt')
+        outbox.begin('a.txt')
+        outbox.fail('a.txt', "refused")
+        outbox.add('a.txt')
+        outbox.begin('a.txt')
+        assert not outbox.add('a.txt')
+        assert store.get_outbox_entry('a.txt') == (IN_FLIGHT, 1)
+
+        outbox.complete('a.txt')
+        assert submitted.get(timeout=5) == 'a.txt'
+        assert store.get_outbox_entry('a.txt') == (PENDING, 1)
+
+        # Un échec pendant une modification ne compte pas.
+        outbox.begin('a.txt')
+        assert not outbox.add('a.txt')
+        assert outbox.fail('a.txt', "refused")
+        assert submitted.get(timeout=5) == 'a.txt'
+        assert store.get_outbox_entry('a.txt') == (PENDING, 1)
+
+        outbox.begin('a.txt')
+        outbox.complete('a.txt')
+    finally:
+        outbox.stop()
+    assert store.get_outbox_entry('a.txt') is None
+    assert submitted.empty()
+
+
+def test_held_files_are_submitted_on_connection(store, submitted):
+    outbox = make_outbox(store, submitted)
+    try:
+        outbox.add('a.txt')
+        outbox.release('a.txt')
+        assert store.get_outbox_entry('a.txt') == (HELD, 0)
+        assert outbox.resume_held() == 1
+    finally:
+        outbox.stop()
+    assert submitted.get_nowait() == 'a.txt'
+    assert store.get_outbox_entry('a.txt') == (PENDING, 0)
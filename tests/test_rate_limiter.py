@@ -0,0 +1,92 @@
+"""
+Tests des plafonds de débit des téléchargements.
+"""
+
+import os
+
+import pytest
+
+from src.core import rate_limiter
+from src.core.rate_limiter import RateLimiter, TokenBucket, throttle
+
+
+class FakeClock:
+    """
+    Horloge monotone avancée à la main, qui remplace aussi `time.sleep`.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_reserve_paces_sends_once_the_burst_is_spent(clock):
+    bucket = TokenBucket(1000, burst=500)
+    assert bucket.reserve(500) == 0
+    assert bucket.reserve(250) == pytest.approx(0.25)
+    # La dette est remboursée au débit du seau.
+    clock.now += 0.25
+    assert bucket.reserve(100) == pytest.approx(0.1)
+    clock.now += 10
+    assert bucket.reserve(500) == 0
+
+
+def test_unlimited_bucket_never_waits(clock):
+    bucket = TokenBucket(0)
+    assert bucket.reserve(10 ** 9) == 0
+
+
+def test_throttle_waits_for_the_slowest_bucket(clock):
+    fast = TokenBucket(1000, burst=1)
+    slow = TokenBucket(100, burst=1)
+    throttle([fast, slow], 101)
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_extension_limit_applies_by_file_name(tmp_path):
+    limiter = RateLimiter(extension_limits={'ISO': 100, '.mkv': 0})
+    buckets = limiter.buckets_for(str(tmp_path / 'disk.Iso'))
+    assert buckets[0] is limiter.global_bucket
+    assert [bucket.rate for bucket in buckets[1:]] == [100]
+    # Un plafond nul n'ajoute pas de seau ; un répertoire pointé ne
+    # donne pas d'extension au fichier.
+    assert limiter.buckets_for(str(tmp_path / 'film.mkv')) == [
+        limiter.global_bucket]
+    assert limiter.buckets_for(str(tmp_path / 'v1.iso' / 'README')) == [
+        limiter.global_bucket]
+
+
+def test_root_limit_applies_to_the_closest_root(tmp_path):
+    outer, inner = str(tmp_path), str(tmp_path / 'videos')
+    limiter = RateLimiter(root_limits={outer: 300, inner: 200})
+    nested = os.path.join(inner, 'season', 'episode.mkv')
+    assert [bucket.rate for bucket in limiter.buckets_for(nested)] == [
+        0, 200]
+    assert [bucket.rate for bucket in limiter.buckets_for(
+        os.path.join(outer, 'notes.txt'))] == [0, 300]
+    assert limiter.buckets_for('/elsewhere/file.txt') == [
+        limiter.global_bucket]
+
+
+def test_extension_and_root_buckets_are_shared(tmp_path):
+    limiter = RateLimiter(100, extension_limits={'.iso': 50},
+                          root_limits={str(tmp_path): 20})
+    first = limiter.buckets_for(str(tmp_path / 'a.iso'))
+    second = limiter.buckets_for(str(tmp_path / 'b.iso'))
+    assert [bucket.rate for bucket in first] == [100, 50, 20]
+    assert all(a is b for a, b in zip(first, second))
@@ -0,0 +1,75 @@
+"""
+Tests du rapprochement du répertoire surveillé avec son instantané.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from src.core import watch_service
+from src.core.reconciler import DirectoryReconciler
+from src.core.watch_service import WatchService
+from src.database.db_manager import DBManager
+from tests.conftest import FTP_PASSWORD, FTP_USER
+
+
+def write_settled(path, data=b'data'):
+    """
+    Écrit un fichier daté d'une minute, plus ancien que le délai de
+    stabilisation du rapprochement.
+    """
+    path.write_bytes(data)
+    settled = time.time() - 60
+    os.utime(path, (settled, settled))
+    return str(path)
+
+
+@pytest.fixture
+def watched(tmp_path):
+    directory = tmp_path / 'watched'
+    directory.mkdir()
+    return directory
+
+
+def test_first_scan_seeds_the_snapshot_without_reporting(watched):
+    old = write_settled(watched / 'old.txt')
+    changed = []
+    reconciler = DirectoryReconciler(DBManager().db_path, changed.append,
+                                     settle_seconds=1)
+
+    assert reconciler.scan(str(watched)) == 0
+    assert changed == []
+
+    new = write_settled(watched / 'new.txt')
+    write_settled(watched / 'old.txt', b'modified')
+    reconciler.scan(str(watched))
+    assert sorted(changed) == sorted([new, old])
+
+
+def test_uploaded_file_is_not_reported_by_the_next_scan(
+        ftp_server, watched, monkeypatch):
+    root = ftp_server()
+    monkeypatch.setattr(watch_service, 'db_manager', DBManager())
+    uploaded = threading.Event()
+    service = WatchService(on_result=lambda path, success: uploaded.set())
+    changed = []
+    service.reconciler.on_changed = changed.append
+    service.start()
+    try:
+        assert service.connect('127.0.0.1', FTP_USER, FTP_PASSWORD)
+        service.directory = str(watched)
+        service.reconciler.scan(str(watched))
+
+        # Chemin de watchdog : le fichier est ajouté directement à la file.
+        service.enqueue_upload(write_settled(watched / 'live.txt'))
+        assert uploaded.wait(10)
+        assert (root / 'live.txt').exists()
+
+        missed = write_settled(watched / 'missed.txt')
+        service.reconciler.scan(str(watched))
+    finally:
+        service.stop()
+
+    assert changed == [missed]
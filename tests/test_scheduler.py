@@ -0,0 +1,95 @@
+"""
+Tests de l'ordre de service de la file de téléchargement.
+"""
+
+import pytest
+
+from src.core import scheduler as scheduler_module
+from src.core.scheduler import DEFAULT_CLASS, UploadScheduler, build_classes
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Remplace l'horloge monotone du module par une horloge avancée à la
+    main.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(scheduler_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def make_file(directory, name, size):
+    path = directory / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * size)
+    return str(path)
+
+
+def drain(scheduler):
+    scheduler.close()
+    return list(iter(scheduler.get, None))
+
+
+def test_classify_by_extension_then_path(tmp_path):
+    scheduler = UploadScheduler(build_classes([
+        {'name': 'logs', 'priority': 0, 'extensions': ['LOG']},
+        {'name': 'reports', 'priority': 2, 'paths': [str(tmp_path / 'out')]},
+    ]), default_priority=1)
+    assert scheduler.classify(str(tmp_path / 'out' / 'a.Log')) == ('logs', 0)
+    assert scheduler.classify(str(tmp_path / 'out' / 'a.csv')) == (
+        'reports', 2)
+    assert scheduler.classify(str(tmp_path / 'output' / 'a.csv')) == (
+        DEFAULT_CLASS, 1)
+    # L'extension est prise dans le nom du fichier seulement.
+    assert scheduler.classify(str(tmp_path / 'v1.log' / 'README')) == (
+        DEFAULT_CLASS, 1)
+
+
+def test_urgent_class_and_small_files_are_served_first(tmp_path, clock):
+    scheduler = UploadScheduler(
+        build_classes([{'name': 'urgent', 'priority': 0,
+                        'extensions': ['.log']}]),
+        default_priority=1, class_delay=60, size_rate=100, max_wait=600)
+    large = make_file(tmp_path, 'large.bin', 1000)
+    small = make_file(tmp_path, 'small.bin', 10)
+    urgent = make_file(tmp_path, 'late.log', 1000)
+    for path in (large, small, urgent):
+        scheduler.put(path)
+    assert scheduler.depths() == {DEFAULT_CLASS: 2, 'urgent': 1}
+    assert drain(scheduler) == [urgent, small, large]
+    assert scheduler.depths() == {}
+
+
+def test_waiting_file_is_not_overtaken_after_max_wait(tmp_path, clock):
+    scheduler = UploadScheduler(
+        build_classes([{'name': 'urgent', 'priority': 0,
+                        'extensions': ['.log']}]),
+        default_priority=5, class_delay=60, size_rate=1, max_wait=100)
+    old = make_file(tmp_path, 'old.bin', 10 ** 6)
+    scheduler.put(old)
+    clock[0] += 99
+    early = make_file(tmp_path, 'early.log', 0)
+    scheduler.put(early)
+    clock[0] += 1
+    # Un fichier urgent arrivé `max_wait` secondes après le premier ne
+    # passe plus devant, quelle que soit la taille de celui-ci.
+    late = make_file(tmp_path, 'late.log', 0)
+    scheduler.put(late)
+    assert drain(scheduler) == [early, old, late]
+
+
+def test_files_with_equal_deadlines_keep_arrival_order(tmp_path, clock):
+    scheduler = UploadScheduler(size_rate=1, max_wait=0)
+    paths = [make_file(tmp_path, f'{index}.bin', 10 - index)
+             for index in range(5)]
+    for path in paths:
+        scheduler.put(path)
+    assert drain(scheduler) == paths
+
+
+def test_close_with_discard_empties_the_queue(tmp_path):
+    scheduler = UploadScheduler()
+    scheduler.put(make_file(tmp_path, 'a.bin', 1))
+    assert scheduler.close(discard=True) == 1
+    assert scheduler.get() is None
@@ -0,0 +1,23 @@
+"""
+Tests des indicateurs affichés par la fenêtre des statistiques.
+"""
+
+from src.gui.stats_dialog import BUCKET_SECONDS, format_rollup
+
+
+def test_format_rollup_uses_the_success_duration_for_throughput():
+    # 2 Mo envoyés en 2 s de transferts réussis ; un échec de 6 s.
+    row = ('2024-01-01 10:00', 3, 1, 2 * 1048576, 8000, 4, 2000)
+    assert format_rollup(row, BUCKET_SECONDS['hour']) == [
+        '2024-01-01 10:00', '4', '3', '1', '75.0 %', '0.00', '1.00', '2000']
+
+
+def test_format_rollup_without_timings():
+    row = ('2024-01-01', 0, 0, 0, 0, 0, 0)
+    assert format_rollup(row, BUCKET_SECONDS['day']) == [
+        '2024-01-01', '0', '0', '0', '-', '0.00', '-', '-']
+
+
+def test_format_rollup_transfer_rate():
+    row = ('2024-01-01 10:00', 7200, 0, 0, 0, 0, 0)
+    assert format_rollup(row, BUCKET_SECONDS['hour'])[5] == '2.00'
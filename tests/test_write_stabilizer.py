@@ -0,0 +1,114 @@
+"""
+Tests de la détection de fin d'écriture des fichiers.
+"""
+
+import threading
+
+import pytest
+
+from src.core import write_stabilizer
+from src.core.write_stabilizer import WriteStabilizer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Remplace l'horloge monotone du module par une horloge avancée à la
+    main.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(write_stabilizer.time, 'monotonic', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def stabilizer():
+    return WriteStabilizer(lambda path: None, quiet_period=2.0)
+
+
+def test_file_is_ready_after_a_quiet_period(stabilizer, clock, tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'start')
+    stabilizer.touch(str(path))
+    assert stabilizer._collect_ready() == []
+    clock[0] += 1.9
+    assert stabilizer._collect_ready() == []
+    clock[0] += 0.1
+    assert stabilizer._collect_ready() == [str(path)]
+    assert stabilizer.pending_count() == 0
+
+
+def test_growing_file_restarts_the_quiet_period(stabilizer, clock, tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'start')
+    stabilizer.touch(str(path))
+    stabilizer._collect_ready()
+    clock[0] += 1.5
+    # L'écriture continue sans événement : seule la taille a changé.
+    path.write_bytes(b'start and more')
+    assert stabilizer._collect_ready() == []
+    clock[0] += 1.5
+    assert stabilizer._collect_ready() == []
+    clock[0] += 0.5
+    assert stabilizer._collect_ready() == [str(path)]
+
+
+def test_new_event_restarts_the_quiet_period(stabilizer, clock, tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'start')
+    stabilizer.touch(str(path))
+    clock[0] += 1.5
+    stabilizer.touch(str(path))
+    clock[0] += 1.5
+    assert stabilizer._collect_ready() == []
+    clock[0] += 0.5
+    assert stabilizer._collect_ready() == [str(path)]
+
+
+def test_closed_file_is_ready_immediately(stabilizer, clock, tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'done')
+    stabilizer.touch(str(path))
+    stabilizer.mark_closed(str(path))
+    assert stabilizer._collect_ready() == [str(path)]
+    # Une nouvelle modification annule la fermeture signalée.
+    stabilizer.mark_closed(str(path))
+    stabilizer.touch(str(path))
+    assert stabilizer._collect_ready() == []
+
+
+def test_deleted_and_discarded_files_are_dropped(stabilizer, clock,
+                                                 tmp_path):
+    kept, deleted = tmp_path / 'kept.txt', tmp_path / 'deleted.txt'
+    kept.write_bytes(b'x')
+    deleted.write_bytes(b'x')
+    for path in (kept, deleted):
+        stabilizer.touch(str(path))
+    stabilizer.touch(str(tmp_path / 'moved.txt'))
+    stabilizer.discard(str(tmp_path / 'moved.txt'))
+    deleted.unlink()
+    clock[0] += 2
+    assert stabilizer._collect_ready() == [str(kept)]
+    assert stabilizer.pending_count() == 0
+
+
+def test_each_burst_of_events_is_reported_once(tmp_path):
+    ready = []
+    reported = threading.Event()
+
+    def on_ready(path):
+        ready.append(path)
+        reported.set()
+
+    stabilizer = WriteStabilizer(on_ready, quiet_period=0.1,
+                                 poll_interval=0.02)
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'data')
+    stabilizer.start()
+    try:
+        for _ in range(50):
+            stabilizer.touch(str(path))
+        assert reported.wait(5)
+    finally:
+        stabilizer.stop()
+    assert ready == [str(path)]